@@ -0,0 +1,264 @@
+"""
+Inverted index of scraped tweets by word, #hashtag and @mention, for term and co-occurrence queries.
+
+Tweet texts are tokenized in batches with one compiled regex. Every indexed tweet gets a dense document
+number and every token a term number. The postings of a term are the document numbers of the tweets
+holding it, appended to an array('I') as batches arrive. Documents are numbered in arrival order, so
+postings stay sorted without re-sorting. A forward index (the term numbers of every document, in one
+flat array) makes co-occurrence counts a numpy gather and bincount over the documents of a term, not
+a scan of the tweets. Queries read the arrays through numpy views under the lock. An array cannot grow
+while a view on it exists, so views are never returned.
+
+The index implements the sink interface (write/close), so it can be fed while scraping:
+
+    index = TweetIndex()
+    bot.attach_sink(index, 'tweets')
+    ...
+    index.tweets('#python', '@nasa')
+    index.co_occurring('#python', kind='hashtag')
+"""
+from array import array
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# URLs are matched so that their parts are not indexed, and give an empty token.
+TOKEN_PATTERN = re.compile(r'https?://\S+|([#@]\w+|\w{2,})')
+
+KINDS = {'word': 0, 'hashtag': 1, 'mention': 2}
+PREFIX_KINDS = {'#': KINDS['hashtag'], '@': KINDS['mention']}
+
+
+def tokenize(texts):
+    """
+    Tokenize tweet texts into their distinct words, #hashtags and @mentions.
+
+    Tokens are casefolded. Words shorter than 2 characters, pure numbers and URLs are dropped.
+
+    Parameters:
+        texts (iterable): Tweet texts. Missing values give no tokens.
+
+    Returns:
+        list: One list of distinct tokens per text, in order of first appearance.
+    """
+    findall = TOKEN_PATTERN.findall
+    return [list(dict.fromkeys(token for token in findall(text.casefold()) if token and not token.isdigit()))
+            if isinstance(text, str) else [] for text in texts]
+
+
+def normalize_term(term):
+    """
+    Returns:
+        str: The term as it is indexed, e.g. '#Python' -> '#python'.
+    """
+    return term.strip().casefold()
+
+
+class TweetIndex:
+    """
+    Incremental inverted index from words, hashtags and mentions to tweet IDs.
+    """
+    def __init__(self):
+        """
+        Initializes TweetIndex object.
+        """
+        self.tweet_ids = []
+        self.documents = {}
+        self.terms = []
+        self.term_ids = {}
+        self.kinds = array('B')
+        self.postings = []
+        self.doc_terms = array('I')
+        self.doc_offsets = array('Q', [0])
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tweet_ids)
+
+    def add(self, tweets):
+        """
+        Index a batch of tweets. Tweets already indexed, or without a tweet ID, are skipped.
+
+        Parameters:
+            tweets (DataFrame or list): Tweets with 'tweet_id' and 'tweet_text', as a DataFrame or as dictionaries.
+
+        Returns:
+            int: Number of tweets added.
+        """
+        if isinstance(tweets, pd.DataFrame):
+            pairs = zip(tweets['tweet_id'].tolist(), tweets['tweet_text'].tolist())
+        else:
+            pairs = ((tweet.get('tweet_id'), tweet.get('tweet_text')) for tweet in tweets)
+        with self.lock:
+            batch = {}
+            for tweet_id, text in pairs:
+                if tweet_id is None or tweet_id == 'NA' or pd.isna(tweet_id):
+                    continue
+                tweet_id = str(tweet_id)
+                if tweet_id not in self.documents and tweet_id not in batch:
+                    batch[tweet_id] = text
+            if not batch:
+                return 0
+
+            term_ids, terms, kinds, postings = self.term_ids, self.terms, self.kinds, self.postings
+            doc_terms, doc_offsets = self.doc_terms, self.doc_offsets
+            doc = len(self.tweet_ids)
+            for tweet_id, tokens in zip(batch, tokenize(batch.values())):
+                self.documents[tweet_id] = doc
+                self.tweet_ids.append(tweet_id)
+                for token in tokens:
+                    term = term_ids.get(token)
+                    if term is None:
+                        term = term_ids[token] = len(terms)
+                        terms.append(token)
+                        kinds.append(PREFIX_KINDS.get(token[0], 0))
+                        postings.append(array('I'))
+                    postings[term].append(doc)
+                    doc_terms.append(term)
+                doc_offsets.append(len(doc_terms))
+                doc += 1
+            return len(batch)
+
+    def write(self, records):
+        """
+        Sink interface, see BotFunctions.attach_sink: index the scraped tweet rows.
+
+        Parameters:
+            records (list): Tweet rows as dictionaries.
+
+        Returns:
+            None
+        """
+        self.add(records)
+
+    def close(self):
+        pass
+
+    def docs(self, term):
+        """
+        Document numbers of the tweets holding a term.
+
+        Parameters:
+            term (str): A word, '#hashtag' or '@mention', in any case.
+
+        Returns:
+            ndarray: Sorted uint32 document numbers.
+        """
+        term = self.term_ids.get(normalize_term(term))
+        if term is None:
+            return np.empty(0, dtype=np.uint32)
+        with self.lock:
+            return np.frombuffer(self.postings[term], dtype=np.uint32).copy()
+
+    def count(self, term):
+        """
+        Returns:
+            int: Number of tweets holding the term.
+        """
+        term = self.term_ids.get(normalize_term(term))
+        return 0 if term is None else len(self.postings[term])
+
+    def match(self, *terms, mode='all'):
+        """
+        Document numbers of the tweets holding all, or any, of the terms.
+
+        Parameters:
+            *terms (str): Words, '#hashtags' or '@mentions'.
+            mode (str): 'all' or 'any'. Defaults to 'all'.
+
+        Returns:
+            ndarray: Sorted uint32 document numbers.
+
+        Raises:
+            ValueError: If mode is not 'all' or 'any'.
+        """
+        if mode not in ('all', 'any'):
+            raise ValueError(f"mode must be 'all' or 'any', not {mode!r}.")
+        postings = [self.docs(term) for term in terms]
+        if not postings:
+            return np.empty(0, dtype=np.uint32)
+        if mode == 'any':
+            return np.unique(np.concatenate(postings))
+        # Shortest postings first, so every intersection is as small as possible
+        postings.sort(key=len)
+        docs = postings[0]
+        for other in postings[1:]:
+            if not len(docs):
+                break
+            docs = np.intersect1d(docs, other, assume_unique=True)
+        return docs
+
+    def tweets(self, *terms, mode='all'):
+        """
+        Tweet IDs of the tweets holding all, or any, of the terms, see match.
+
+        Returns:
+            list: Tweet IDs, in the order they were indexed.
+        """
+        tweet_ids = self.tweet_ids
+        return [tweet_ids[doc] for doc in self.match(*terms, mode=mode).tolist()]
+
+    def top(self, kind='hashtag', n=10):
+        """
+        Most frequent terms of a kind.
+
+        Parameters:
+            kind (str): 'word', 'hashtag' or 'mention'. Defaults to 'hashtag'.
+            n (int): Number of terms. Default is 10.
+
+        Returns:
+            list: (term, number of tweets) tuples, most frequent first.
+        """
+        with self.lock:
+            counts = np.fromiter(map(len, self.postings), dtype=np.int64, count=len(self.postings))
+            counts[np.frombuffer(self.kinds, dtype=np.uint8) != KINDS[kind]] = 0
+        return self.ranked(counts, n)
+
+    def co_occurring(self, *terms, kind='hashtag', n=10):
+        """
+        Terms of a kind most often found in the tweets holding the given terms.
+
+        Parameters:
+            *terms (str): Words, '#hashtags' or '@mentions' the tweets must all hold.
+            kind (str): 'word', 'hashtag' or 'mention'. Defaults to 'hashtag'.
+            n (int): Number of terms. Default is 10.
+
+        Returns:
+            list: (term, number of tweets holding it and the given terms) tuples, most frequent first.
+                The given terms are left out.
+        """
+        docs = self.match(*terms).astype(np.int64)
+        with self.lock:
+            offsets = np.frombuffer(self.doc_offsets, dtype=np.uint64)
+            starts = offsets[docs].astype(np.int64)
+            lengths = offsets[docs + 1].astype(np.int64) - starts
+            del offsets
+            # Positions of the terms of every document, concatenated
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            counts = np.bincount(np.frombuffer(self.doc_terms, dtype=np.uint32)[positions], minlength=len(self.kinds))
+            counts[np.frombuffer(self.kinds, dtype=np.uint8) != KINDS[kind]] = 0
+        for term in terms:
+            term = self.term_ids.get(normalize_term(term))
+            if term is not None:
+                counts[term] = 0
+        return self.ranked(counts, n)
+
+    def ranked(self, counts, n):
+        n = min(n, int(np.count_nonzero(counts)))
+        if n <= 0:
+            return []
+        best = np.argpartition(-counts, n - 1)[:n]
+        best = best[np.lexsort((best, -counts[best]))]
+        return [(self.terms[term], int(counts[term])) for term in best]
+
+    def memory_usage(self):
+        """
+        Returns:
+            dict: Bytes used by the 'postings' and the 'forward' index arrays.
+        """
+        return {
+            'postings': sum(postings.itemsize * len(postings) for postings in self.postings),
+            'forward': self.doc_terms.itemsize * len(self.doc_terms) + self.doc_offsets.itemsize * len(self.doc_offsets)
+        }
@@ -2,12 +2,8 @@ from twitterbot import TwitterBot as tb
 import time
 
 bot = tb(input("Enter Username: "))
-bot.open_website()
-if not bot.load_cookies():
-    bot.login(password=input('Enter password: '))
-    bot.save_cookies()
-else:
-    bot.refresh_page()
+session = bot.start_session(password=lambda: input('Enter password: '))
+print(f"{session['mode']} start in {session['seconds']:.2f}s")
 
 # tested -- works successfully
 
@@ -16,5 +12,6 @@ else:
 # bot.data_from_explore_tabs()
 # bot.generate_csv(csv_of='trending')
 
+print(bot.timing_summary())
 print('finished')
 time.sleep(60)
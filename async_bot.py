@@ -0,0 +1,565 @@
+"""
+Asyncio front end of BotFunctions, so one event loop can drive many browser sessions at once.
+
+Selenium is blocking, so AsyncBot hands every WebDriver round trip of its bot to a thread of its own.
+A session never has two commands in flight, and its thread is only busy for the length of one round trip.
+Waits are not handed to the thread. WebDriverWait and UI.content_growth_script hold a thread and a driver
+connection until the page changes. The waits of AsyncBot instead poll the page with short round trips
+and sleep between polls with asyncio.sleep, so the waits of every session overlap on the event loop.
+
+Rows are built by the same BotFunctions methods as in the blocking API. The async methods store the same
+records in the bot's row buffers and sinks, and record the same metrics and failures.
+
+    async def scrape(username):
+        bot = await AsyncBot.launch(username, profile='fast')
+        try:
+            await bot.call(bot.bot.start_session)
+            await bot.fetch_multiple_tweets_data()
+            await bot.data_from_explore_tabs()
+        finally:
+            await bot.quit()
+        return bot.bot
+
+    async def main(usernames):
+        return await asyncio.gather(*(scrape(username) for username in usernames))
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import time
+
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
+
+from errors import BotError, LoggedOut, RateLimited, SelectorTimeout, classify
+from instrumentation import timed
+from twitterbot import UI, TwitterBot
+
+# Seconds before the first poll of an asyncio wait. The interval then doubles after every poll, up to
+# DEFAULT_POLL_INTERVAL, so short waits end early without polling long ones too often.
+DEFAULT_FIRST_POLL = 0.005
+DEFAULT_POLL_INTERVAL = 0.05
+
+
+def operation(name):
+    """
+    Decorator running an AsyncBot coroutine method under the retry policy of the named operation of its bot.
+
+    Same as twitterbot.operation, but the backoff between attempts does not block the event loop.
+
+    Parameters:
+        name (str): Operation name, a key of BotFunctions.retry_policies.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            return await self.bot.retry_policies[name].run_async(
+                method, self, *args, **kwargs, on_failure=lambda error: self.bot.failures.record(name, error))
+        return wrapper
+    return decorator
+
+
+class AsyncBot:
+    """
+    Coroutine versions of the core BotFunctions operations, for one browser session.
+
+    Like a WebDriver session, an AsyncBot runs one operation at a time. Run several sessions concurrently
+    instead, e.g. with asyncio.gather or run_on_all. Any other blocking method of the bot can be awaited
+    through call, e.g. await async_bot.call(async_bot.bot.login, password).
+    """
+    def __init__(self, bot, poll_interval=DEFAULT_POLL_INTERVAL, first_poll=DEFAULT_FIRST_POLL, executor=None):
+        """
+        Initializes AsyncBot object.
+
+        Parameters:
+            bot (BotFunctions): The bot, e.g. a TwitterBot. Its rows, metrics, failures and limiter are shared.
+            poll_interval (float): Maximum seconds between two polls of a wait. Defaults to DEFAULT_POLL_INTERVAL.
+            first_poll (float): Seconds before the first poll of a wait. Defaults to DEFAULT_FIRST_POLL.
+            executor (Executor): Optional. Runs the WebDriver round trips. Defaults to a thread of this session.
+        """
+        self.bot = bot
+        self.poll_interval = poll_interval
+        self.first_poll = first_poll
+        self.own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'bot-{bot.username}')
+        self.executor = executor
+
+    @classmethod
+    async def launch(cls, username, poll_interval=DEFAULT_POLL_INTERVAL, first_poll=DEFAULT_FIRST_POLL,
+                     **bot_options):
+        """
+        Start a TwitterBot without blocking the event loop.
+
+        Parameters:
+            username (str): Account used by the bot.
+            poll_interval (float): Maximum seconds between two polls of a wait. Defaults to DEFAULT_POLL_INTERVAL.
+            first_poll (float): Seconds before the first poll of a wait. Defaults to DEFAULT_FIRST_POLL.
+            **bot_options: Passed to TwitterBot, e.g. profile='fast'.
+
+        Returns:
+            AsyncBot: The session, with its browser started.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'bot-{username}')
+        loop = asyncio.get_running_loop()
+        try:
+            bot = await loop.run_in_executor(executor, functools.partial(TwitterBot, username, **bot_options))
+        except BaseException:
+            executor.shutdown(wait=False)
+            raise
+        async_bot = cls(bot, poll_interval, first_poll, executor)
+        async_bot.own_executor = True
+        return async_bot
+
+    @property
+    def driver(self):
+        return self.bot.driver
+
+    @property
+    def metrics(self):
+        return self.bot.metrics
+
+    async def call(self, function, *args, **kwargs):
+        """
+        Run a blocking function, usually a WebDriver round trip, in the thread of the session.
+
+        Parameters:
+            function (callable): The function.
+            *args, **kwargs: Passed to the function.
+
+        Returns:
+            The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    async def execute_script(self, script, *args):
+        return await self.call(self.driver.execute_script, script, *args)
+
+    async def open_website(self, url='https://twitter.com/?lang=en'):
+        """
+        Open a URL, see BotFunctions.open_website.
+
+        Parameters:
+            url (str): The URL of the website to open.
+
+        Returns:
+            None
+        """
+        await self.call(self.bot.open_website, url)
+
+    async def quit(self):
+        """
+        Quit the driver, ignoring errors from a driver that already crashed, and stop the session's thread.
+
+        Returns:
+            None
+        """
+        try:
+            await self.call(self.driver.quit)
+        except WebDriverException as e:
+            print(e)
+        finally:
+            if self.own_executor:
+                self.executor.shutdown(wait=False)
+
+    async def pace(self, tokens=1):
+        """
+        Wait for the account's limiter to allow the next scrape step, see BotFunctions.pace.
+
+        Parameters:
+            tokens (float): Number of tokens the step takes. Default is 1.
+
+        Returns:
+            None
+        """
+        limiter = self.bot.limiter
+        if limiter is None:
+            return
+        wait = limiter.wait_time(tokens)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = limiter.wait_time(tokens)
+        # The tokens are available, acquire only blocks the session's thread if another session took them first
+        await self.call(limiter.acquire, tokens)
+
+    async def polls(self, deadline):
+        """
+        Sleep between the polls of a wait, without blocking the event loop.
+
+        Parameters:
+            deadline (float): time.monotonic() value after which the wait gives up.
+
+        Yields:
+            None, after every sleep: first first_poll seconds, then twice as long every time up to poll_interval,
+                and never past the deadline. Stops once the deadline has passed.
+        """
+        interval = self.first_poll
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.poll_interval)
+            yield
+
+    async def wait_for_element_presence(self, wait_time, by, value, find_all=False):
+        """
+        Wait for the presence of a web element identified by the given selector, see UI.wait_for_element_presence.
+
+        Parameters:
+            wait_time (float): Maximum time to wait for the element to be present, in seconds.
+            by: Locator strategy to use for finding the element (e.g., By.ID, By.XPATH).
+            value: Value of the locator (e.g., ID, XPath expression) to locate the element.
+            find_all (bool): If True, return all the elements matching the selector. Default is False.
+
+        Returns:
+            WebElement or List[WebElement]: The located web element(s).
+
+        Raises:
+            SelectorTimeout: If the element is not found within the specified wait time.
+        """
+        deadline = time.monotonic() + wait_time
+        elements = await self.call(self.driver.find_elements, by, value)
+        if not elements:
+            async for _ in self.polls(deadline):
+                elements = await self.call(self.driver.find_elements, by, value)
+                if elements:
+                    break
+            else:
+                raise SelectorTimeout(value, wait_time)
+        return elements if find_all else elements[0]
+
+    async def perform(self, wait_time, by, value, action, keys=None, message=None):
+        """
+        Perform the desired action on a located element, see BotFunctions.perform.
+
+        Parameters:
+            wait_time (float): Maximum time to wait for the element to be present, in seconds.
+            by: Locator strategy to use for finding the element (e.g., By.ID, By.XPATH).
+            value: Value of the locator (e.g., ID, XPath expression) to locate the element.
+            action (str): Type of action to perform on the located element. Available actions: 'click', 'send_keys'.
+            keys: Additional data to send to the located element (default is None).
+            message: Message to show if the element is not located (default is None). When given, the element
+                is optional and a missing element is not an error.
+
+        Returns:
+            None
+
+        Raises:
+            SelectorTimeout: If the element is not found within the specified wait time and no message is given.
+        """
+        try:
+            element = await self.wait_for_element_presence(wait_time, by, value)
+        except SelectorTimeout:
+            if message is None:
+                raise
+            print(message)
+            return
+        if action == 'send_keys':
+            await self.call(element.send_keys, keys)
+        else:
+            await self.call(element.click)
+
+    async def locate(self, name, wait_time=None, find_all=False, context=None, required=True):
+        """
+        Locate an element by its logical name in the bot's selector registry, see BotFunctions.locate.
+
+        Parameters:
+            name (str): Logical element name, e.g. 'tweet_container' or 'trends'.
+            wait_time (float): Optional. Maximum time to wait, in seconds. Defaults to the bot's 'element' wait timeout.
+            find_all (bool): If True, return all the matching elements. Default is False.
+            context: Optional. WebElement to search from instead of the whole page.
+            required (bool): If False, return None instead of raising when the element is missing. Default is True.
+
+        Returns:
+            WebElement or List[WebElement]: The located element(s), or None if not required and not found in time.
+
+        Raises:
+            SelectorTimeout: If a required element is not found in time.
+            RateLimited, LoggedOut: If a required element is missing because of the page state.
+        """
+        if wait_time is None:
+            wait_time = self.bot.wait_timeouts['element']
+        deadline = time.monotonic() + wait_time
+        search_from = context if context is not None else self.driver
+        elements = await self.call(self.bot.registry.find, search_from, name, 0, find_all)
+        if elements is None:
+            async for _ in self.polls(deadline):
+                elements = await self.call(self.bot.registry.find, search_from, name, 0, find_all)
+                if elements is not None:
+                    break
+        if elements is None and required:
+            await self.call(self.bot.check_page_state)
+            raise SelectorTimeout(name, wait_time)
+        return elements
+
+    async def act(self, name, action, keys=None, message=None, context=None, wait_time=None):
+        """
+        Perform the desired action on an element located by its logical name, see BotFunctions.act.
+
+        Parameters:
+            name (str): Logical element name in the selector registry.
+            action (str): Type of action to perform on the located element. Available actions: 'click', 'send_keys'.
+            keys: Additional data to send to the located element (default is None).
+            message: Message to show if the element is not located (default is None). When given, the element
+                is optional and a missing element is not an error.
+            context: Optional. WebElement to search from instead of the whole page.
+            wait_time (float): Optional. Maximum time to wait, in seconds.
+
+        Returns:
+            None
+
+        Raises:
+            SelectorTimeout: If the element is not found in time and no message is given.
+        """
+        element = await self.locate(name, wait_time, context=context, required=message is None)
+        if element is None:
+            print(message)
+            return
+        if action == 'send_keys':
+            await self.call(element.send_keys, keys)
+        else:
+            await self.call(element.click)
+
+    async def wait_for_new_content(self, xpath, previous_count=None, step='scroll', wait_time=None):
+        """
+        Wait until new elements matching the XPath are rendered, or the page goes idle, see
+        BotFunctions.wait_for_new_content.
+
+        The page is polled with UI.node_count_script. It is idle once neither the node count nor the number
+        of loaded network resources changed for the bot's 'idle' wait timeout. If the poll script fails in the page
+        or times out, the failure is counted in the bot's failures under 'wait_for_content' and the rest of the
+        step timeout is slept. Other driver errors, e.g. a crashed browser, are raised.
+
+        Parameters:
+            xpath (str): XPath of the elements to count, e.g. UI.new_trends or UI.tweet_container.
+            previous_count (int): Optional. Node count before the action that loads new content.
+            step (str): Name of the wait step in the bot's wait timeouts. Defaults to 'scroll'.
+            wait_time (float): Optional. Wait at most this long instead of the step timeout.
+
+        Returns:
+            dict: 'count' of matching nodes, 'reason' ('grown', 'idle' or 'timeout') and 'elapsed' seconds,
+                or None if the page could not be polled.
+
+        Raises:
+            WebDriverException: If the driver stopped responding.
+        """
+        timeout = self.bot.wait_timeouts[step] if wait_time is None else wait_time
+        idle_time = self.bot.wait_timeouts['idle']
+        start = time.monotonic()
+        result = None
+        try:
+            page = await self.execute_script(UI.node_count_script, xpath)
+            previous = page['count'] if previous_count is None else previous_count
+            changed = start
+            reason = 'grown' if page['count'] > previous else None
+            if reason is None:
+                async for _ in self.polls(start + timeout):
+                    polled = await self.execute_script(UI.node_count_script, xpath)
+                    now = time.monotonic()
+                    if polled != page:
+                        changed = now
+                    page = polled
+                    if page['count'] > previous:
+                        reason = 'grown'
+                        break
+                    if now - changed >= idle_time:
+                        reason = 'idle'
+                        break
+                else:
+                    reason = 'timeout'
+            result = {'count': int(page['count']), 'reason': reason, 'elapsed': time.monotonic() - start}
+        except (JavascriptException, TimeoutException) as e:
+            self.bot.failures.record('wait_for_content', classify(e))
+            await asyncio.sleep(max(start + timeout - time.monotonic(), 0))
+        self.bot.record_wait(step, timeout, time.monotonic() - start)
+        return result
+
+    async def load_tweets(self):
+        """
+        Locate and return all the tweets present on the webpage.
+
+        Returns:
+            list: A list containing all the tweets found on the webpage.
+
+        Raises:
+            SelectorTimeout: If no tweet is found.
+        """
+        return await self.locate('tweet_container', find_all=True)
+
+    @timed()
+    async def fetch_tweets_data_batch(self, only_new=False):
+        """
+        Extract data from every tweet present on the webpage in a single WebDriver round trip,
+        see BotFunctions.fetch_tweets_data_batch.
+
+        Parameters:
+            only_new (bool): If True, skip the tweets returned by an earlier call and tag the returned ones. Default
+                is False.
+
+        Returns:
+            list: A list of dictionaries with the same keys as BotFunctions.fetch_single_tweet_details.
+
+        Raises:
+            SelectorTimeout: If no tweet is found.
+            RateLimited, LoggedOut: If no tweet is found because of the page state.
+            JavascriptException: If the extraction script fails.
+        """
+        await self.locate('tweet_container')
+        mark = UI.extracted_marker if only_new else None
+        start = time.perf_counter()
+        raw_tweets = await self.execute_script(UI.tweets_data_script, UI.tweet_container, UI.tweet_selectors(), mark)
+        tweets_data = self.bot.tweets_from_raw(raw_tweets, self.bot.current_datetime())
+
+        # One round trip extracts every tweet, its time is spread evenly over them
+        elapsed = time.perf_counter() - start
+        for _ in tweets_data:
+            self.metrics.observe('tweet_extraction_seconds', elapsed / len(tweets_data), method='batch')
+        return tweets_data
+
+    @timed()
+    @operation('fetch_tweets')
+    async def fetch_multiple_tweets_data(self, batch=True):
+        """
+        Fetch data from the tweets loaded on the webpage and append it to the bot's tweets row buffer,
+        see BotFunctions.fetch_multiple_tweets_data.
+
+        Parameters:
+            batch (bool): If True, use the single round trip extraction. Default is True.
+
+        Returns:
+            None
+
+        Raises:
+            SelectorTimeout: If no tweet is found.
+            RateLimited, LoggedOut: If no tweet is found because of the page state.
+        """
+        await self.pace()
+        if batch:
+            try:
+                tweets_data = await self.fetch_tweets_data_batch()
+            except BotError:
+                raise
+            except WebDriverException as e:
+                self.bot.failures.record('fetch_tweets_batch', e)
+                print('Batch extraction failed, falling back to per element extraction.')
+            else:
+                self.bot.store_rows('tweets', tweets_data)
+                return
+
+        tweets = await self.load_tweets()
+        with self.bot.batch_timestamp():
+            for tweet in tweets:
+                tweet_details = await self.call(self.bot.fetch_single_tweet_details, tweet)
+                if tweet_details is not None:
+                    self.bot.store_rows('tweets', [tweet_details])
+
+    async def click_on_explore_tabs(self, tab_name):
+        """
+        Open the explore section, then the tab of the given name, see BotFunctions.click_on_explore_tabs.
+
+        Parameters:
+            tab_name (str): The name of the tab to click on.
+
+        Returns:
+            None
+
+        Raises:
+            SelectorTimeout: If the explore section or the specified tab is not found.
+        """
+        await self.act('explore_btn', action='click')
+        explore_tabs = await self.locate('explore_tabs')
+        await self.act(f'explore_tab_{tab_name}', action='click', context=explore_tabs)
+
+    @timed()
+    async def explore_tab_step(self, tab_name, state):
+        """
+        Extract the new trends of the open explore tab, then scroll down one viewport, see
+        BotFunctions.explore_tab_step.
+
+        Parameters:
+            tab_name (str): The name of the open explore tab.
+            state (dict): Scrolling state of the tab, created by BotFunctions.new_explore_state.
+
+        Returns:
+            bool: True if the tab may have more trends.
+
+        Raises:
+            SelectorTimeout: If no trend is found on the first pass.
+            RateLimited, LoggedOut: If the trends are missing because of the page state.
+        """
+        await self.pace()
+        if state['passes'] == 0:
+            await self.locate('trends')
+        start = time.perf_counter()
+        result = await self.execute_script(UI.explore_step_script, UI.trends, UI.single_trend_data,
+                                           UI.extracted_marker)
+        return self.bot.store_explore_step(tab_name, state, result, time.perf_counter() - start)
+
+    @timed()
+    @operation('explore_tab')
+    async def explore_tab_data(self, tab_name):
+        """
+        Scroll through an explore tab and append its trends to the tab's row buffer, see
+        BotFunctions.explore_tab_data.
+
+        Parameters:
+            tab_name (str): The name of the explore tab to extract data from.
+
+        Returns:
+            None
+
+        Raises:
+            SelectorTimeout: If the explore tab or its trends are not found.
+            RateLimited, LoggedOut: If the trends are missing because of the page state.
+        """
+        await self.click_on_explore_tabs(tab_name)
+        state = self.bot.new_explore_state()
+        while await self.explore_tab_step(tab_name, state):
+            await self.wait_for_new_content(UI.new_trends, 0)
+
+    @timed()
+    async def data_from_explore_tabs(self, tab_names=('trending', 'news', 'sports', 'entertainment')):
+        """
+        Extract data from the explore tabs one after another, see BotFunctions.data_from_explore_tabs.
+
+        Parameters:
+            tab_names (tuple): Names of the explore tabs. Defaults to all four tabs.
+
+        Returns:
+            None
+
+        Raises:
+            RateLimited, LoggedOut: If a tab shows a rate limit or the session is logged out. Any other error
+                of a tab is counted by explore_tab_data's retry policy and that tab is skipped.
+        """
+        for tab_name in tab_names:
+            try:
+                await self.explore_tab_data(tab_name)
+            except (RateLimited, LoggedOut):
+                raise
+            except (BotError, WebDriverException) as e:
+                print(f"Error occurred on tab {tab_name}: {e}")
+
+
+async def run_on_all(async_bots, job, *args, **kwargs):
+    """
+    Run a job once on every session concurrently and wait for all of them.
+
+    Parameters:
+        async_bots (list): The AsyncBot sessions.
+        job (str or callable): Name of an AsyncBot coroutine method, or a coroutine function called with the
+            AsyncBot as first argument.
+        *args, **kwargs: Passed to the job.
+
+    Returns:
+        dict: Username mapped to the job's return value, or to the error it raised, see errors.classify.
+    """
+    async def run(async_bot):
+        if isinstance(job, str):
+            return await getattr(async_bot, job)(*args, **kwargs)
+        return await job(async_bot, *args, **kwargs)
+
+    results = await asyncio.gather(*(run(async_bot) for async_bot in async_bots), return_exceptions=True)
+    return {async_bot.bot.username: classify(result) if isinstance(result, (BotError, WebDriverException)) else result
+            for async_bot, result in zip(async_bots, results)}
@@ -0,0 +1,126 @@
+"""
+Benchmark the tweet index of analytics.py against scanning the tweets DataFrame.
+
+Synthetic tweets draw their words, #hashtags and @mentions from Zipf distributions, so a few terms are
+in many tweets and most terms in few. The index is built in --batch sized batches, as the scraper feeds
+it. Reports the tokenization throughput of the compiled regex against pandas str.findall, the build
+time and memory of the index, and the time of term, AND, co-occurrence and top queries against the
+same queries as DataFrame scans, whose results they must match.
+
+Usage:
+    python benchmarks/bench_analytics.py [--tweets 1000000] [--batch 10000] [--vocabulary 50000]
+                                         [--hashtags 5000] [--mentions 5000] [--seed 0]
+"""
+import argparse
+from collections import Counter
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import TOKEN_PATTERN, TweetIndex, tokenize  # noqa: E402
+
+
+def make_frame(args):
+    random = np.random.default_rng(args.seed)
+    words = random.zipf(1.3, size=(args.tweets, 12)) % args.vocabulary
+    hashtags = random.zipf(1.5, size=(args.tweets, 2)) % args.hashtags
+    mentions = random.zipf(1.5, size=(args.tweets, 1)) % args.mentions
+    has_hashtags = random.random(args.tweets) < 0.6
+    has_mention = random.random(args.tweets) < 0.3
+    texts = []
+    for i in range(args.tweets):
+        parts = [f'word{w}' for w in words[i]]
+        if has_hashtags[i]:
+            parts += [f'#Tag{h}' for h in hashtags[i]]
+        if has_mention[i]:
+            parts.append(f'@user{mentions[i][0]}')
+        parts.append(f'https://t.co/x{i}')
+        texts.append(' '.join(parts))
+    return pd.DataFrame({'tweet_id': [str(1790000000000000000 - i) for i in range(args.tweets)],
+                         'tweet_text': texts})
+
+
+def timed(function, *args, repeat=1, **kwargs):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args, **kwargs)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def scan_tweets(df, *terms):
+    tokens = df['tweet_text'].str.casefold().str.split()
+    mask = tokens.apply(lambda words: all(term in words for term in terms))
+    return df.loc[mask, 'tweet_id'].tolist()
+
+
+def scan_co_occurring(df, term):
+    tokens = df['tweet_text'].str.casefold().str.split()
+    return Counter(word for words in tokens[tokens.apply(lambda words: term in words)]
+                   for word in set(words) if word.startswith('#') and word != term)
+
+
+def same_top(result, counts, n=10):
+    # Terms tied at the last place may differ, their counts may not
+    return ([count for _, count in result] == [count for _, count in counts.most_common(n)]
+            and all(counts[term] == count for term, count in result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tweets', type=int, default=1000000)
+    parser.add_argument('--batch', type=int, default=10000, help='tweets added to the index at once')
+    parser.add_argument('--vocabulary', type=int, default=50000, help='distinct words')
+    parser.add_argument('--hashtags', type=int, default=5000, help='distinct hashtags')
+    parser.add_argument('--mentions', type=int, default=5000, help='distinct mentions')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = make_frame(args)
+    sample = df['tweet_text'].iloc[:100000]
+    regex_seconds, _ = timed(tokenize, sample)
+    pandas_seconds, _ = timed(lambda: sample.str.casefold().str.findall(TOKEN_PATTERN))
+    print(f'tokenize          regex {len(sample) / regex_seconds:,.0f} tweets/s, '
+          f'pandas str.findall {len(sample) / pandas_seconds:,.0f} tweets/s')
+
+    index = TweetIndex()
+    batch_times = []
+    for offset in range(0, len(df), args.batch):
+        seconds, _ = timed(index.add, df.iloc[offset:offset + args.batch])
+        batch_times.append(seconds)
+    memory = index.memory_usage()
+    print(f'build             {sum(batch_times):.1f} s ({len(df) / sum(batch_times):,.0f} tweets/s), '
+          f'last batch {batch_times[-1] * 1000:.0f} ms, {len(index.terms):,} terms, '
+          f'postings {memory["postings"] / 1e6:.0f} MB, forward index {memory["forward"] / 1e6:.0f} MB')
+    print(f'readd             {timed(index.add, df.iloc[:args.batch])[0] * 1000:.1f} ms, '
+          f'{len(index):,} tweets (duplicates skipped)')
+
+    common, rare = index.top('hashtag', 1)[0][0], '#tag4321'
+    queries = [
+        (f'tweets {common}', lambda: index.tweets(common), lambda: scan_tweets(df, common)),
+        (f'tweets {rare}', lambda: index.tweets(rare), lambda: scan_tweets(df, rare)),
+        (f'tweets {common} @user1', lambda: index.tweets(common, '@user1'),
+         lambda: scan_tweets(df, common, '@user1')),
+        (f'co_occurring {common}', lambda: index.co_occurring(common, n=10),
+         lambda: scan_co_occurring(df, common)),
+        (f'co_occurring {rare}', lambda: index.co_occurring(rare, n=10),
+         lambda: scan_co_occurring(df, rare)),
+        ('top hashtags', lambda: index.top('hashtag', 10), None)
+    ]
+    print(f'{"query":<30}{"index ms":>10}{"scan ms":>10}{"results":>10}  same')
+    for name, query, scan in queries:
+        seconds, result = timed(query, repeat=5)
+        if scan is None:
+            print(f'{name:<30}{seconds * 1000:>10.2f}{"-":>10}{len(result):>10}')
+            continue
+        scan_seconds, expected = timed(scan)
+        same = same_top(result, expected) if isinstance(expected, Counter) else result == expected
+        print(f'{name:<30}{seconds * 1000:>10.2f}{scan_seconds * 1000:>10.0f}{len(result):>10}  {same}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Scale the number of browser sessions driven by one process, against FakeDriver sessions (see fake_driver.py).
+
+Every session harvests the tweets of its timeline, then scrolls through the 'trending' explore tab, whose
+trends render --render-delay seconds after every scroll. Modes:
+
+    sequential  BotFunctions sessions run one after another on a single thread
+    threads     BotFunctions sessions run on one thread each, as bot_pool.BotPool does
+    asyncio     async_bot.AsyncBot sessions multiplexed on one event loop, with a thread each for their round trips
+    asyncio_pool  the same, sharing a pool of --pool-threads threads for their round trips
+
+Each mode reports its wall time, the records per second of all sessions together, its speedup over
+sequential and whether every session stored the same records as a sequential run (fetch datetimes aside).
+
+Usage:
+    python benchmarks/bench_async_sessions.py [--sessions 1 4 16 32] [--modes sequential threads asyncio]
+                                              [--tweets 100] [--trends 200] [--latency 0.002]
+                                              [--render-delay 0.02] [--pool-threads 8] [--json results.json]
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_bot import AsyncBot, run_on_all  # noqa: E402
+from fake_driver import FakeDriver  # noqa: E402
+from twitterbot import BotFunctions  # noqa: E402
+
+WAITS = {'element': 1, 'scroll': 5, 'idle': 0.05}
+
+
+def new_bot(args, index):
+    driver = FakeDriver(tweets=args.tweets, trends=args.trends, latency=args.latency, render_delay=args.render_delay,
+                        seed=index)
+    return BotFunctions(driver, f'session{index}', wait_timeouts=WAITS)
+
+
+def scrape(bot):
+    bot.fetch_multiple_tweets_data()
+    bot.explore_tab_data('trending')
+
+
+async def scrape_async(async_bot):
+    await async_bot.fetch_multiple_tweets_data()
+    await async_bot.explore_tab_data('trending')
+
+
+def sequential(bots):
+    for bot in bots:
+        scrape(bot)
+
+
+def threads(bots):
+    with ThreadPoolExecutor(max_workers=len(bots)) as executor:
+        for future in [executor.submit(scrape, bot) for bot in bots]:
+            future.result()
+
+
+def asyncio_sessions(bots, executor=None):
+    async def main():
+        async_bots = [AsyncBot(bot, executor=executor) for bot in bots]
+        try:
+            results = await run_on_all(async_bots, scrape_async)
+        finally:
+            for async_bot in async_bots:
+                await async_bot.quit()
+        for result in results.values():
+            if isinstance(result, BaseException):
+                raise result
+    asyncio.run(main())
+
+
+def asyncio_pool(bots, pool_threads):
+    with ThreadPoolExecutor(max_workers=pool_threads) as executor:
+        asyncio_sessions(bots, executor)
+
+
+MODES = {
+    'sequential': lambda bots, args: sequential(bots),
+    'threads': lambda bots, args: threads(bots),
+    'asyncio': lambda bots, args: asyncio_sessions(bots),
+    'asyncio_pool': lambda bots, args: asyncio_pool(bots, args.pool_threads)
+}
+
+
+def records(bot):
+    """
+    The rows stored by a session, without their fetch datetimes.
+    """
+    data = {'tweets': bot.tweets_rows.to_dataframe()}
+    data.update({tab_name: rows.to_dataframe() for tab_name, rows in bot.trending_rows.items()})
+    return {name: df.drop(columns='fetch_datetime').astype(str).to_dict('records') for name, df in data.items()}
+
+
+def count(bot):
+    return len(bot.tweets_rows) + sum(len(rows) for rows in bot.trending_rows.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', nargs='+', type=int, default=[1, 4, 16, 32])
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES),
+                        help='the speedup is only reported when sequential is run too')
+    parser.add_argument('--tweets', type=int, default=100, help='tweets on the timeline of every session')
+    parser.add_argument('--trends', type=int, default=200, help='trends of the explore tab of every session')
+    parser.add_argument('--latency', type=float, default=0.002, help='simulated seconds per WebDriver round trip')
+    parser.add_argument('--render-delay', type=float, default=0.02,
+                        help='seconds before the trends brought by a scroll are rendered')
+    parser.add_argument('--pool-threads', type=int, default=8, help='threads shared by the asyncio_pool sessions')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    reference = new_bot(args, 0)
+    scrape(reference)
+    expected = records(reference)
+
+    print(f'{"sessions":>9}{"mode":>14}{"seconds":>10}{"records/s":>12}{"speedup":>9}{"same records":>14}')
+    results = []
+    for sessions in args.sessions:
+        # Sequential first, it is the baseline of the speedups
+        modes = sorted(args.modes, key=lambda mode: mode != 'sequential')
+        baseline = None
+        for mode in modes:
+            bots = [new_bot(args, index) for index in range(sessions)]
+            start = time.perf_counter()
+            MODES[mode](bots, args)
+            elapsed = time.perf_counter() - start
+            if mode == 'sequential':
+                baseline = elapsed
+            result = {
+                'sessions': sessions,
+                'mode': mode,
+                'seconds': elapsed,
+                'records': sum(count(bot) for bot in bots),
+                'records_per_second': sum(count(bot) for bot in bots) / elapsed,
+                'speedup': baseline / elapsed if baseline else None,
+                'same_records': all(records(bot) == expected for bot in bots)
+            }
+            results.append(result)
+            speedup = '-' if result['speedup'] is None else f'{result["speedup"]:.1f}x'
+            print(f'{sessions:>9}{mode:>14}{elapsed:>10.2f}{result["records_per_second"]:>12.0f}{speedup:>9}'
+                  f'{str(result["same_records"]):>14}')
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
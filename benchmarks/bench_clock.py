@@ -0,0 +1,46 @@
+"""
+Per-row cost of the fetch datetime: the former strftime/strptime/astimezone/strftime round trip,
+the cached UTCClock, and a batch_timestamp shared by a whole extraction pass.
+
+Usage:
+    python benchmarks/bench_clock.py [--calls 200000]
+"""
+import argparse
+from datetime import datetime, timezone
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twitterbot import UTCClock  # noqa: E402
+
+
+def round_trip_datetime():
+    current_datetime = time.strftime('%H:%M:%S %d-%m-%Y %z')
+    datetime_object = datetime.strptime(current_datetime, '%H:%M:%S %d-%m-%Y %z')
+    datetime_utc = datetime_object.astimezone(timezone.utc)
+    return datetime_utc.strftime('%H:%M:%S %d-%m-%Y %z')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    clock = UTCClock()
+    batch_datetime = clock.now()
+    methods = {
+        'round trip': round_trip_datetime,
+        'cached clock': clock.now,
+        'batch': lambda: batch_datetime
+    }
+    assert round_trip_datetime()[-5:] == clock.now()[-5:] == '+0000'
+    for name, method in methods.items():
+        elapsed = min(timeit.repeat(method, number=args.calls, repeat=3))
+        print(f'{name:<14}{elapsed / args.calls * 1e9:>10.0f} ns per row')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Compare browser startup and page load time of the TwitterBot launch profiles.
+
+Usage:
+    python benchmarks/bench_launch_profiles.py [--profiles default fast] [--url https://twitter.com/explore] [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twitterbot import LAUNCH_PROFILES, TwitterBot  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', default=list(LAUNCH_PROFILES))
+    parser.add_argument('--url', default='https://twitter.com/explore')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"profile":<12}{"startup (s)":>14}{"page load (s)":>16}')
+    for profile in args.profiles:
+        startups, loads = [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            driver = TwitterBot.create_driver(**LAUNCH_PROFILES[profile])
+            startups.append(time.perf_counter() - start)
+            try:
+                start = time.perf_counter()
+                driver.get(args.url)
+                loads.append(time.perf_counter() - start)
+            finally:
+                driver.quit()
+        print(f'{profile:<12}{statistics.median(startups):>14.2f}{statistics.median(loads):>16.2f}')
+
+
+if __name__ == '__main__':
+    main()
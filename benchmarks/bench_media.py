@@ -0,0 +1,164 @@
+"""
+Benchmark and check MediaDownloader (media.py) against a local HTTP server serving synthetic images.
+
+The server answers every request after --server-latency seconds. It is reached under two host names,
+127.0.0.1 and localhost, and records how many requests of each host it serves at once. Synthetic tweets
+link --tweets * --media-per-tweet images. Some URLs are shared between tweets, and some distinct URLs
+serve the same bytes. The first request of every --flaky-every-th URL fails with a 503, and one URL is
+missing (404).
+
+Reports how long writing the rows took the scrape loop, how long the background downloads took, and
+the largest number of concurrent requests per host. Then checks that:
+- every file is stored once under its content hash,
+- every tweet is linked to the hashes of its images,
+- the missing URL is recorded as a failure.
+
+Usage:
+    python benchmarks/bench_media.py [--tweets 500] [--media-per-tweet 2] [--distinct-urls 400]
+                                     [--distinct-images 150] [--workers 8] [--per-host 4]
+                                     [--server-latency 0.02] [--flaky-every 10]
+"""
+import argparse
+from collections import Counter
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media import MediaDownloader  # noqa: E402
+
+HOSTS = ('127.0.0.1', 'localhost')
+
+
+def image_bytes(image):
+    # A few kilobytes that differ between images
+    return (f'synthetic image {image}\n'.encode() * 200)
+
+
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, args):
+        super().__init__(('127.0.0.1', 0), MediaHandler)
+        self.args = args
+        self.lock = threading.Lock()
+        self.active = Counter()
+        self.max_active = Counter()
+        self.requests = Counter()
+        self.failed_once = set()
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        host = self.headers.get('Host', '').split(':')[0]
+        with server.lock:
+            server.active[host] += 1
+            server.max_active[host] = max(server.max_active[host], server.active[host])
+            server.requests[host] += 1
+        try:
+            time.sleep(server.args.server_latency)
+            name = self.path.rsplit('/', 1)[-1].split('.')[0]
+            if not name.isdigit():
+                self.send_error(404)
+                return
+            url = int(name)
+            with server.lock:
+                flaky = url % server.args.flaky_every == 0 and url not in server.failed_once
+                server.failed_once.add(url)
+            if flaky:
+                self.send_error(503)
+                return
+            body = image_bytes(url % server.args.distinct_images)
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active[host] -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def media_url(port, url):
+    return f'http://{HOSTS[url % len(HOSTS)]}:{port}/media/{url}.jpg'
+
+
+def tweet_rows(args, port):
+    rows = []
+    for index in range(args.tweets):
+        links = [media_url(port, (index * args.media_per_tweet + position) % args.distinct_urls)
+                 for position in range(args.media_per_tweet)]
+        rows.append({'tweet_id': str(1790000000000000000 - index), 'media_links': links})
+    rows.append({'tweet_id': '1', 'media_links': [f'http://{HOSTS[0]}:{port}/media/missing.jpg']})
+    rows.append({'tweet_id': 'NA', 'media_links': [media_url(port, 0)]})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tweets', type=int, default=500)
+    parser.add_argument('--media-per-tweet', type=int, default=2)
+    parser.add_argument('--distinct-urls', type=int, default=400)
+    parser.add_argument('--distinct-images', type=int, default=150)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--per-host', type=int, default=4)
+    parser.add_argument('--server-latency', type=float, default=0.02)
+    parser.add_argument('--flaky-every', type=int, default=10)
+    args = parser.parse_args()
+
+    server = MediaServer(args)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    rows = tweet_rows(args, port)
+
+    with tempfile.TemporaryDirectory() as directory:
+        downloader = MediaDownloader(directory, workers=args.workers, per_host=args.per_host, backoff=0.01)
+        start = time.perf_counter()
+        # Rows arrive in scrape batches of 20
+        write_seconds = 0.0
+        for offset in range(0, len(rows), 20):
+            write_start = time.perf_counter()
+            downloader.write(rows[offset:offset + 20])
+            write_seconds += time.perf_counter() - write_start
+        downloader.flush()
+        elapsed = time.perf_counter() - start
+        stats = downloader.stats()
+
+        files = [name for _, _, names in os.walk(directory) for name in names if name.endswith('.jpg')]
+        linked_ok = True
+        for row in rows[:args.tweets]:
+            media = downloader.media_of(row['tweet_id'])
+            expected = [hashlib.sha256(image_bytes(int(url.rsplit('/', 1)[-1].split('.')[0]) % args.distinct_images))
+                        .hexdigest() for url in row['media_links']]
+            linked_ok &= [item['sha256'] for item in media] == expected
+            linked_ok &= all(os.path.exists(item['path']) for item in media)
+        failures = downloader.index.failures()
+        downloader.close()
+
+    server.shutdown()
+    requested_images = len({url % args.distinct_urls % args.distinct_images
+                            for url in range(args.tweets * args.media_per_tweet)})
+    print(f'media links              {sum(len(row["media_links"]) for row in rows)}')
+    print(f'scrape loop write time   {write_seconds * 1000:.1f} ms ({write_seconds / len(rows) * 1e6:.0f} us/row)')
+    print(f'background downloads     {elapsed:.2f} s, {stats["downloaded"] + stats["duplicate"]} URLs '
+          f'({(stats["downloaded"] + stats["duplicate"]) / elapsed:.0f} URLs/s)')
+    print(f'stats                    {stats}')
+    print(f'requests per host        {dict(server.requests)}')
+    print(f'max concurrent per host  {dict(server.max_active)} (limit {args.per_host})')
+    print(f'files stored once        {len(files) == requested_images} ({len(files)} files, '
+          f'{requested_images} distinct images)')
+    print(f'tweets linked to hashes  {linked_ok}')
+    print(f'missing URL recorded     {[failure["url"].rsplit("/", 1)[-1] for failure in failures] == ["missing.jpg"]}')
+
+
+if __name__ == '__main__':
+    main()
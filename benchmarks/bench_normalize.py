@@ -0,0 +1,109 @@
+"""
+Compare per-row parsing of stats and datetimes against the vectorized normalization in normalize.py.
+
+Every column is timed on its own, parsed per row with Series.apply and by normalize.py, and reported
+with its memory before and after, so the gain of each conversion can be checked separately. The
+parsed counts must match. The totals compare per_row against normalize_tweets on the whole frame.
+
+Usage:
+    python benchmarks/bench_normalize.py [--rows 100000] [--seed 0]
+"""
+import argparse
+from datetime import datetime
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalize import DATETIME_FORMAT, normalize_tweets, parse_counts, parse_datetimes  # noqa: E402
+from twitterbot import TWEET_COLUMNS  # noqa: E402
+
+SUFFIXES = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+
+def parse_count(value):
+    value = str(value).strip().replace(',', '').upper()
+    if value == '':
+        return 0
+    try:
+        if value[-1] in SUFFIXES:
+            return round(float(value[:-1]) * SUFFIXES[value[-1]])
+        return int(value)
+    except ValueError:
+        return None
+
+
+def parse_datetime(value):
+    try:
+        return datetime.strptime(value, DATETIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def per_row(df):
+    df = df.copy()
+    for column in ('reply', 'retweet', 'like', 'view'):
+        df[column] = df[column].apply(parse_count)
+    for column in ('tweet_datetime', 'fetch_datetime'):
+        df[column] = df[column].apply(parse_datetime)
+    return df
+
+
+def make_frame(rows, random):
+    counts = ['', '7', '42', '1,234', '1.2K', '56K', '3.4M', '1B', 'NA']
+    data = {column: [] for column in TWEET_COLUMNS}
+    for i in range(rows):
+        data['display_name'].append(f'User {i % 500}')
+        data['username'].append(f'@user{i % 500}')
+        data['tweet_text'].append(f'Tweet number {i}')
+        for column in ('reply', 'retweet', 'like', 'view'):
+            data[column].append(random.choice(counts))
+        data['media_links'].append([])
+        data['tweet_datetime'].append(f'{i % 24:02d}:15:00 {1 + i % 28:02d}-03-2024 +0000')
+        data['fetch_datetime'].append(f'{i % 24:02d}:30:00 {1 + i % 28:02d}-03-2024 +0530')
+        data['tweet_id'].append(str(1760000000000000000 + i))
+    return pd.DataFrame(data)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def megabytes(series):
+    return series.memory_usage(deep=True) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, random.Random(args.seed))
+    print(f'{"column":<16}{"per-row s":>10}{"vectorized s":>14}{"raw MB":>9}{"parsed MB":>11}')
+    columns = [(column, parse_count, parse_counts) for column in ('reply', 'retweet', 'like', 'view')]
+    columns += [(column, parse_datetime, parse_datetimes) for column in ('tweet_datetime', 'fetch_datetime')]
+    columns += [(column, None, lambda series: series.astype('category')) for column in ('display_name', 'username')]
+    columns += [(column, None, lambda series: series.astype('string')) for column in ('tweet_text', 'tweet_id')]
+    for column, row_parser, vectorized in columns:
+        row_seconds = f'{timed(df[column].apply, row_parser)[0]:>10.3f}' if row_parser else f'{"-":>10}'
+        seconds, result = timed(vectorized, df[column])
+        if vectorized is parse_counts:
+            expected = df[column].apply(parse_count)
+            assert result.astype('float64').fillna(-1).tolist() == expected.astype('float64').fillna(-1).tolist()
+        print(f'{column:<16}{row_seconds}{seconds:>14.3f}{megabytes(df[column]):>9.1f}{megabytes(result):>11.1f}')
+
+    print(f'raw frame: {df.memory_usage(deep=True).sum() / 1e6:.1f} MB')
+    for name, method in (('per-row', per_row), ('vectorized', normalize_tweets)):
+        elapsed, result = timed(method, df)
+        print(f'{name:<12}{elapsed:>8.2f} s{result.memory_usage(deep=True).sum() / 1e6:>10.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare per-row pd.concat against RowBuffer when collecting tweet rows.
+
+pd.concat copies every row collected so far on each call, so its per-row cost grows with the session.
+RowBuffer should stay flat from 1k to 100k rows.
+
+Usage:
+    python benchmarks/bench_row_buffer.py [--sizes 1000 10000 100000] [--concat-limit 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from row_buffer import RowBuffer  # noqa: E402
+from twitterbot import TWEET_COLUMNS  # noqa: E402
+
+
+def make_row(i):
+    return {'display_name': f'User {i % 100}', 'username': f'@user{i % 100}', 'tweet_text': f'Tweet number {i}',
+            'reply': str(i % 50), 'retweet': str(i % 70), 'like': f'{i % 9}.{i % 10}K', 'view': f'{i % 5}M',
+            'media_links': [], 'tweet_datetime': '12:00:00 01-03-2024 +0000',
+            'fetch_datetime': '12:30:00 01-03-2024 +0000'}
+
+
+def with_concat(size):
+    df = pd.DataFrame()
+    for i in range(size):
+        df = pd.concat((df, pd.DataFrame([make_row(i)])))
+    return df
+
+
+def with_row_buffer(size):
+    rows = RowBuffer(TWEET_COLUMNS)
+    for i in range(size):
+        rows.append(make_row(i))
+    return rows.to_dataframe()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--concat-limit', type=int, default=10000,
+                        help='Skip pd.concat above this size, it is quadratic.')
+    args = parser.parse_args()
+
+    print(f'{"rows":>8}{"method":>12}{"total (s)":>12}{"per row (us)":>15}')
+    for size in args.sizes:
+        for name, method in (('concat', with_concat), ('row buffer', with_row_buffer)):
+            if method is with_concat and size > args.concat_limit:
+                continue
+            start = time.perf_counter()
+            df = method(size)
+            elapsed = time.perf_counter() - start
+            assert len(df) == size
+            print(f'{size:>8}{name:>12}{elapsed:>12.3f}{elapsed / size * 1e6:>15.2f}')
+
+
+if __name__ == '__main__':
+    main()
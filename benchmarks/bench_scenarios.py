@@ -0,0 +1,155 @@
+"""
+Offline benchmark scenarios of BotFunctions against FakeDriver, a simulated WebDriver (see fake_driver.py).
+
+Scenarios:
+    fetch_tweets            fetch_multiple_tweets_data() with batch extraction, on a timeline of <size> tweets
+    fetch_tweets_element    fetch_multiple_tweets_data(batch=False), one lookup per tweet field
+    explore_tab             explore_tab_data('trending') scrolling through <size> trends
+    generate_csv            generate_csv('tweets') of <size> buffered tweets
+
+Each scenario is run --runs times per size and reported with its throughput, the percentiles of the run
+durations, the WebDriver round trips per item and the percentiles of the per-item extraction time.
+
+Usage:
+    python benchmarks/bench_scenarios.py [--scenarios fetch_tweets explore_tab] [--sizes 100 1000 10000 50000]
+                                         [--runs 5] [--latency 0.001] [--jitter 0.0005] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_driver import FakeDriver  # noqa: E402
+from twitterbot import BotFunctions  # noqa: E402
+
+FAST_WAITS = {'element': 0, 'scroll': 0, 'idle': 0}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    rank = q * (len(values) - 1)
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def new_bot(args, tweets=0, trends=0):
+    driver = FakeDriver(tweets=tweets, trends=trends, latency=args.latency, jitter=args.jitter)
+    return BotFunctions(driver, 'benchmark', wait_timeouts=FAST_WAITS)
+
+
+def fetch_tweets(args, size, batch=True):
+    bot = new_bot(args, tweets=size)
+    start = time.perf_counter()
+    bot.fetch_multiple_tweets_data(batch=batch)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(bot.tweets_rows), bot.metrics, 'tweet_extraction_seconds'
+
+
+def fetch_tweets_element(args, size):
+    return fetch_tweets(args, size, batch=False)
+
+
+def explore_tab(args, size):
+    bot = new_bot(args, trends=size)
+    start = time.perf_counter()
+    bot.explore_tab_data('trending')
+    elapsed = time.perf_counter() - start
+    return elapsed, len(bot.trending_rows['trending']), bot.metrics, 'trend_extraction_seconds'
+
+
+def generate_csv(args, size):
+    bot = new_bot(args)
+    rows = FakeDriver(tweets=size, latency=0).tweets_data()
+    fetch_datetime = bot.current_datetime()
+    bot.store_rows('tweets', [
+        {**row, 'reply': row['stats'][0], 'retweet': row['stats'][1], 'like': row['stats'][2],
+         'view': row['stats'][3], 'fetch_datetime': fetch_datetime}
+        for row in rows])
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        bot.generate_csv('tweets', os.path.join(directory, 'tweets'))
+        elapsed = time.perf_counter() - start
+    return elapsed, size, bot.metrics, None
+
+
+SCENARIOS = {
+    'fetch_tweets': fetch_tweets,
+    'fetch_tweets_element': fetch_tweets_element,
+    'explore_tab': explore_tab,
+    'generate_csv': generate_csv
+}
+
+
+def run_scenario(name, args, size):
+    durations, round_trips, item_histograms = [], [], []
+    items = 0
+    for _ in range(args.runs):
+        elapsed, items, metrics, item_metric = SCENARIOS[name](args, size)
+        durations.append(elapsed)
+        round_trips.append(sum(value for (metric, labels), value in metrics.counters.items()
+                               if metric == 'webdriver_commands'))
+        item_histograms.extend(histogram for (metric, labels), histogram in metrics.histograms.items()
+                               if metric == item_metric)
+    median = statistics.median(durations)
+    result = {
+        'scenario': name,
+        'size': size,
+        'items': items,
+        'runs': args.runs,
+        'median_seconds': median,
+        'items_per_second': items / median if median else None,
+        'p50_seconds': percentile(durations, 0.5),
+        'p95_seconds': percentile(durations, 0.95),
+        'max_seconds': max(durations),
+        'round_trips_per_item': statistics.median(round_trips) / items if items else None,
+        'item_p50_ms': None,
+        'item_p95_ms': None
+    }
+    if item_histograms:
+        # Every run records its own histogram, merge the quantile estimates
+        result['item_p50_ms'] = statistics.median(h.quantile(0.5) for h in item_histograms) * 1000
+        result['item_p95_ms'] = statistics.median(h.quantile(0.95) for h in item_histograms) * 1000
+    return result
+
+
+def format_value(value, digits):
+    return '-' if value is None else f'{value:.{digits}f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000, 10000])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.001, help='simulated seconds per WebDriver round trip')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra seconds per round trip, at most')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    print(f'{"scenario":<22}{"size":>7}{"items/s":>11}{"p50 (s)":>10}{"p95 (s)":>10}'
+          f'{"trips/item":>12}{"item p50 (ms)":>15}{"item p95 (ms)":>15}')
+    results = []
+    for name in args.scenarios:
+        for size in args.sizes:
+            result = run_scenario(name, args, size)
+            results.append(result)
+            print(f'{name:<22}{size:>7}{format_value(result["items_per_second"], 0):>11}'
+                  f'{format_value(result["p50_seconds"], 3):>10}{format_value(result["p95_seconds"], 3):>10}'
+                  f'{format_value(result["round_trips_per_item"], 3):>12}{format_value(result["item_p50_ms"], 3):>15}'
+                  f'{format_value(result["item_p95_ms"], 3):>15}')
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Simulate the sustained scrape throughput of one account under a Twitter-like rate limit.
+
+A simulated server allows --limit requests per --window seconds per account and answers every request
+past it with a rate limit page, locking the account out for --lockout seconds. Scroll jobs are run by a
+scheduler.Scheduler on a SimulatedClock, once with a fixed pace (the former fixed sleeps) and once with
+the adaptive AccountLimiter. The successful steps per hour are compared with the lockouts (requests past
+the limit, each locking the account out) and the rate limit pages hit, which also count the requests
+made while locked out. The adaptive pacing must not get more lockouts than the fixed one.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--hours 6] [--limit 100] [--window 900] [--lockout 900]
+"""
+import argparse
+from collections import deque
+import functools
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from errors import RateLimited  # noqa: E402
+from scheduler import AccountLimiter, Scheduler, SimulatedClock  # noqa: E402
+
+
+class SimulatedServer:
+    def __init__(self, clock, limit, window, lockout):
+        self.clock = clock
+        self.limit = limit
+        self.window = window
+        self.lockout = lockout
+        self.requests = {}
+        self.locked_until = {}
+        self.served = 0
+        self.lockouts = 0
+
+    def request(self, account):
+        now = self.clock()
+        if self.locked_until.get(account, 0) > now:
+            raise RateLimited(account)
+        recent = self.requests.setdefault(account, deque())
+        while recent and recent[0] <= now - self.window:
+            recent.popleft()
+        if len(recent) >= self.limit:
+            self.locked_until[account] = now + self.lockout
+            self.lockouts += 1
+            raise RateLimited(account)
+        recent.append(now)
+        self.served += 1
+
+
+class SimulatedBot:
+    """
+    Stands in for BotFunctions: paces every step and reports rate limits like check_page_state does.
+    """
+    def __init__(self, username, server, step_time):
+        self.username = username
+        self.server = server
+        self.step_time = step_time
+        self.limiter = None
+
+    def scroll(self, steps):
+        for _ in range(steps):
+            self.limiter.acquire()
+            self.server.clock.sleep(self.step_time)
+            try:
+                self.server.request(self.username)
+            except RateLimited:
+                self.limiter.on_rate_limited()
+                raise
+        return steps
+
+
+def simulate(limiter_factory, args):
+    clock = SimulatedClock()
+    server = SimulatedServer(clock, args.limit, args.window, args.lockout)
+    bot = SimulatedBot('account', server, args.step_time)
+    scheduler = Scheduler({'account': bot}, limiter_factory=limiter_factory, clock=clock, sleep=clock.sleep,
+                          max_attempts=1000)
+    while clock() < args.hours * 3600:
+        scheduler.submit(SimulatedBot.scroll, args.steps)
+        scheduler.run_next()
+    stats = scheduler.stats()['account']
+    return server.served / args.hours, server.lockouts, stats['rate_limits'], stats['rate']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=float, default=6)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--window', type=float, default=900)
+    parser.add_argument('--lockout', type=float, default=900)
+    parser.add_argument('--steps', type=int, default=20, help='scroll steps per job')
+    parser.add_argument('--step-time', type=float, default=0.5, help='seconds a step takes besides pacing')
+    parser.add_argument('--fixed-interval', type=float, default=5, help='seconds between steps of the fixed pace')
+    args = parser.parse_args()
+
+    strategies = {
+        'fixed': functools.partial(AccountLimiter, rate=1 / args.fixed_interval, capacity=1, increase=0, decrease=1,
+                                   cooldown=args.lockout, max_cooldown=args.lockout),
+        'adaptive': AccountLimiter
+    }
+    print(f'{"pacing":<10}{"steps/hour":>12}{"lockouts":>10}{"rate limits":>13}{"final rate (/s)":>17}')
+    lockouts = {}
+    for name, limiter_factory in strategies.items():
+        throughput, lockouts[name], rate_limits, rate = simulate(limiter_factory, args)
+        print(f'{name:<10}{throughput:>12.1f}{lockouts[name]:>10}{rate_limits:>13}{rate:>17.3f}')
+    assert lockouts['adaptive'] <= lockouts['fixed'], 'the adaptive pacing got more lockouts than the fixed one'
+
+
+if __name__ == '__main__':
+    main()
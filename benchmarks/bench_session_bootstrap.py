@@ -0,0 +1,61 @@
+"""
+Measure time-to-first-scrape of a cold start (full login) and of warm starts (saved cookies).
+
+Each run launches a fresh browser, starts a session with BotFunctions.start_session and extracts the
+home timeline once with fetch_tweets_data_batch. The first run deletes the saved cookies of the account,
+so it logs in; the following runs reuse the cookies it saved.
+
+Usage:
+    TWITTER_PASSWORD=... python benchmarks/bench_session_bootstrap.py <username> [--profile fast] [--warm-runs 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_manager import CookieStore  # noqa: E402
+from twitterbot import LAUNCH_PROFILES, TwitterBot  # noqa: E402
+
+
+def time_to_first_scrape(username, profile, password):
+    start = time.perf_counter()
+    bot = TwitterBot(username, profile=profile)
+    launched = time.perf_counter()
+    try:
+        session = bot.start_session(password=password)
+        tweets = bot.fetch_tweets_data_batch()
+        end = time.perf_counter()
+    finally:
+        bot.driver.quit()
+    return {'mode': session['mode'], 'cookies': session['cookies'], 'launch': launched - start,
+            'session': session['seconds'], 'first_scrape': end - start, 'tweets': len(tweets)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('username')
+    parser.add_argument('--profile', choices=list(LAUNCH_PROFILES), default='default')
+    parser.add_argument('--warm-runs', type=int, default=3)
+    args = parser.parse_args()
+    password = os.environ.get('TWITTER_PASSWORD')
+
+    results = []
+    CookieStore().delete(args.username)
+    for _ in range(1 + args.warm_runs):
+        results.append(time_to_first_scrape(args.username, args.profile, password))
+
+    print(f'{"run":<6}{"mode":<7}{"cookies":<12}{"launch (s)":>12}{"session (s)":>13}{"first scrape (s)":>18}{"tweets":>8}')
+    for index, result in enumerate(results):
+        print(f'{index:<6}{result["mode"]:<7}{str(result["cookies"]):<12}{result["launch"]:>12.2f}'
+              f'{result["session"]:>13.2f}{result["first_scrape"]:>18.2f}{result["tweets"]:>8}')
+    for mode in ('cold', 'warm'):
+        times = [result['first_scrape'] for result in results if result['mode'] == mode]
+        if times:
+            print(f'median {mode} time-to-first-scrape: {statistics.median(times):.2f}s')
+
+
+if __name__ == '__main__':
+    main()
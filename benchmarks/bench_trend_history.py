@@ -0,0 +1,123 @@
+"""
+Benchmark TrendHistory (trend_history.py) over simulated weeks of explore tab snapshots.
+
+Every --interval minutes, each of the four tabs shows the --trends best scoring trends of a pool of
+--pool trends whose scores random walk, so trends enter, exit and change ranks. Snapshots are added
+in time order and every past day is compacted at midnight, as a scheduled scraper would.
+
+Reports the add_snapshot latency at the start and at the end of the history (it should not grow
+with the history), the compaction time, and the time of queries:
+- the series of one trend over the last day and over the whole history,
+- the entered and exited trends of the last week,
+- the latest state,
+compared with reading every file of the history and filtering in pandas.
+
+Usage:
+    python benchmarks/bench_trend_history.py [--days 14] [--interval 5] [--trends 30] [--pool 300] [--seed 0]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+import glob
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trend_history import TrendHistory, normalize_key  # noqa: E402
+
+TABS = ('trending', 'news', 'sports', 'entertainment')
+
+
+def snapshots(args):
+    """
+    Yields:
+        tuple: Snapshot time and the trend rows of every tab, as scraped by BotFunctions.
+    """
+    random = np.random.default_rng(args.seed)
+    scores = {tab: random.normal(size=args.pool) for tab in TABS}
+    posts = {tab: random.integers(1_000, 500_000, size=args.pool) for tab in TABS}
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    for step in range(args.days * 24 * 60 // args.interval):
+        trends = {}
+        for tab in TABS:
+            scores[tab] += random.normal(scale=0.05, size=args.pool)
+            posts[tab] += random.integers(0, 2_000, size=args.pool)
+            top = np.argsort(-scores[tab])[:args.trends]
+            rows = []
+            for rank, index in enumerate(top, start=1):
+                row = {'trending_in': f'{tab.title()} · Trending', 'tag_or_text': f'#Trend{index}',
+                       'posts': f'{posts[tab][index] / 1000:.1f}K posts'.split()[0], 'fetch_datetime': 'NA'}
+                if tab == 'trending':
+                    row['rank'] = str(rank)
+                rows.append(row)
+            trends[tab] = rows
+        yield start + timedelta(minutes=step * args.interval), trends
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def full_scan(directory, tag_or_text, tab):
+    files = glob.glob(os.path.join(directory, 'snapshots', '*', '*.parquet'))
+    df = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+    return df[(df['tab'] == tab) & (df['key'] == normalize_key(tag_or_text))].sort_values('snapshot_time')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--interval', type=int, default=5, help='minutes between snapshots')
+    parser.add_argument('--trends', type=int, default=30, help='trends shown by every tab')
+    parser.add_argument('--pool', type=int, default=300, help='trends competing for every tab')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = TrendHistory(directory)
+        add_times, compact_times = [], []
+        last_day = None
+        for snapshot_time, trends in snapshots(args):
+            if last_day is not None and snapshot_time.date() != last_day:
+                compact_times.append(timed(history.compact, snapshot_time)[0])
+            last_day = snapshot_time.date()
+            add_times.append(timed(history.add_snapshot, trends, snapshot_time)[0])
+        end = snapshot_time + timedelta(minutes=args.interval)
+
+        rows = len(history.snapshots(columns=['tab']))
+        files = len(glob.glob(os.path.join(directory, '*', '*', '*.parquet')))
+        size = sum(os.path.getsize(path) for path in glob.glob(os.path.join(directory, '**', '*.parquet'),
+                                                                 recursive=True))
+        first = history.latest('trending')['tag_or_text'].iloc[0]
+
+        print(f'snapshots        {len(add_times)} ({rows} trend records, {files} files, {size / 1e6:.1f} MB)')
+        window = max(len(add_times) // 10, 1)
+        print(f'add_snapshot     first {window}: p50 {statistics.median(add_times[:window]) * 1000:.1f} ms, '
+              f'last {window}: p50 {statistics.median(add_times[-window:]) * 1000:.1f} ms')
+        if compact_times:
+            print(f'compact per day  p50 {statistics.median(compact_times) * 1000:.0f} ms')
+
+        queries = {
+            'series, last day': lambda: history.series(first, since=end - timedelta(days=1)),
+            'series, all': lambda: history.series(first),
+            'entered/exited, last week': lambda: history.diffs(since=end - timedelta(days=7),
+                                                               changes=['entered', 'exited']),
+            'latest': lambda: TrendHistory(directory).latest()
+        }
+        for name, query in queries.items():
+            seconds, result = timed(query)
+            print(f'{name:<27}{seconds * 1000:>9.1f} ms  {len(result)} rows')
+        seconds, result = timed(full_scan, directory, first, 'trending')
+        print(f'{"series, full scan":<27}{seconds * 1000:>9.1f} ms  {len(result)} rows')
+
+
+if __name__ == '__main__':
+    main()
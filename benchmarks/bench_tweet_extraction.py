@@ -0,0 +1,79 @@
+"""
+Compare per-element and batch tweet extraction against the saved timeline fixture.
+
+Every WebDriver command goes through driver.execute, so wrapping it counts the round trips
+each extraction mode costs. Needs a local Chrome installation.
+
+Usage:
+    python benchmarks/bench_tweet_extraction.py [--runs 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+from selenium import webdriver
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twitterbot import BotFunctions  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'timeline.html')
+
+
+def count_round_trips(driver):
+    """
+    Wrap driver.execute so every WebDriver command increments a counter.
+
+    Returns:
+        dict: Mutable counter, read and reset by the caller.
+    """
+    counter = {'round_trips': 0}
+    execute = driver.execute
+
+    def counted_execute(*args, **kwargs):
+        counter['round_trips'] += 1
+        return execute(*args, **kwargs)
+
+    driver.execute = counted_execute
+    return counter
+
+
+def run(bot, counter, batch, runs):
+    timings = []
+    round_trips = 0
+    rows = 0
+    for _ in range(runs):
+        bot.reset_data()
+        counter['round_trips'] = 0
+        start = time.perf_counter()
+        bot.fetch_multiple_tweets_data(batch=batch)
+        timings.append(time.perf_counter() - start)
+        round_trips = counter['round_trips']
+        rows = len(bot.tweets_df)
+    return rows, round_trips, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    driver = webdriver.Chrome(options=options)
+    try:
+        driver.get('file://' + FIXTURE)
+        counter = count_round_trips(driver)
+        bot = BotFunctions(driver, 'benchmark')
+
+        print(f'{"mode":<12}{"tweets":>8}{"round trips":>14}{"best (s)":>12}')
+        for name, batch in (('per-element', False), ('batch', True)):
+            rows, round_trips, best = run(bot, counter, batch, args.runs)
+            print(f'{name:<12}{rows:>8}{round_trips:>14}{best:>12.3f}')
+    finally:
+        driver.quit()
+
+
+if __name__ == '__main__':
+    main()
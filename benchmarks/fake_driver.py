@@ -0,0 +1,425 @@
+"""
+A pure-Python stand-in for a Selenium WebDriver showing synthetic Twitter pages, with simulated latency.
+
+FakeDriver serves a home timeline of `tweets` tweets and explore tabs of `trends` trends. Like a
+RemoteWebDriver, every command, including the ones sent by FakeElements, goes through
+FakeDriver.execute, which sleeps `latency` seconds (plus up to `jitter`) to simulate a round trip to the
+browser. The instrumentation and round trip counting of BotFunctions work on it unchanged.
+
+Elements are resolved from the selectors of UI.registry and the tweet XPaths of UI. Scripts are
+recognized by the UI script constants, e.g. UI.tweets_data_script returns the tweets as plain values
+in one round trip, as the real script does. The explore timeline is virtualized like Twitter's: only
+the trends within a few viewports of the scroll position are rendered. By default rendering is instant, so
+UI.content_growth_script resolves immediately; the benchmarks measure the bot's own overhead and its
+round trips, not Twitter's load times. With render_delay, the trends brought by a scroll only show up
+that long after it, for UI.content_growth_script, which blocks until then, and for UI.node_count_script.
+
+Search pages (UI.search_url) serve the same tweets, filtered by the 'max_id:' and 'since_id:' operators of
+the query, and show the "No results" placeholder of UI.no_results_script when none is left. post adds
+newer tweets at the top of the timeline, for the crawls refreshing a search.
+"""
+from datetime import datetime, timedelta, timezone
+import random
+import re
+import time
+from urllib.parse import parse_qs, urlparse
+
+from selenium.common.exceptions import NoSuchElementException
+
+from twitterbot import UI
+
+NEWEST_TWEET_ID = 1790000000000000000
+
+TREND_CATEGORIES = {
+    'trending': 'Trending in Benchmark',
+    'news': 'News · Trending',
+    'sports': 'Sports · Trending',
+    'entertainment': 'Entertainment · Trending'
+}
+
+
+class FakeElement:
+    """
+    A node of the synthetic page.
+    """
+    def __init__(self, driver, kind, index=None, text='', attributes=None, y=0):
+        self.parent = driver
+        self.kind = kind
+        self.index = index
+        self.element_text = text
+        self.attributes = attributes or {}
+        self.y = y
+
+    def find_element(self, by='id', value=None):
+        return self.parent.execute('findChildElement', {'context': self, 'using': by, 'value': value})['value']
+
+    def find_elements(self, by='id', value=None):
+        return self.parent.execute('findChildElements', {'context': self, 'using': by, 'value': value})['value']
+
+    @property
+    def text(self):
+        return self.parent.execute('getElementText', {'element': self})['value']
+
+    def get_attribute(self, name):
+        return self.parent.execute('getElementAttribute', {'element': self, 'name': name})['value']
+
+    @property
+    def location(self):
+        return self.parent.execute('getElementRect', {'element': self})['value']
+
+    def click(self):
+        self.parent.execute('clickElement', {'element': self})
+
+    def send_keys(self, *keys):
+        self.parent.execute('sendKeysToElement', {'element': self, 'text': ''.join(keys)})
+
+    def __repr__(self):
+        return f'FakeElement({self.kind!r}, {self.index!r})'
+
+
+class FakeDriver:
+    """
+    Simulated WebDriver serving a synthetic home timeline and explore tabs.
+    """
+    def __init__(self, tweets=100, trends=100, latency=0.001, jitter=0.0, viewport=900, trend_height=80,
+                 media_every=3, seed=0, render_delay=0.0):
+        """
+        Initializes FakeDriver object.
+
+        Parameters:
+            tweets (int): Number of tweets rendered on the home timeline. Default is 100.
+            trends (int): Number of trends of every explore tab. Default is 100.
+            latency (float): Simulated duration of every round trip, in seconds. Default is 0.001.
+            jitter (float): Random extra duration of every round trip, up to this many seconds. Default is 0.
+            viewport (int): Height of the window, in pixels. Default is 900.
+            trend_height (int): Height of a trend, in pixels. Default is 80.
+            media_every (int): Every n-th tweet has an image. Default is 3.
+            seed (int): Seed of the jitter. Default is 0.
+            render_delay (float): Seconds after an explore scroll before the waits see the new trends. Default is 0.
+        """
+        self.tweet_count = tweets
+        self.first_tweet = 0
+        self.max_id = None
+        self.since_id = None
+        self.trend_count = trends
+        self.latency = latency
+        self.jitter = jitter
+        self.viewport = viewport
+        self.trend_height = trend_height
+        self.media_every = media_every
+        self.random = random.Random(seed)
+        self.render_delay = render_delay
+        self.rendered_at = 0.0
+
+        self.current_url = 'https://twitter.com/home'
+        self.tab = None
+        self.scroll_y = 0
+        self.marked = set()
+        self.cookies = []
+        self.script_timeout = None
+        self.round_trips = 0
+        self.current_window_handle = 'main'
+
+        # Logical element of every selector of the registry, e.g. (By.XPATH, UI.tweet_text) -> 'tweet_text'
+        self.selectors = {}
+        for name, candidates in UI.registry.candidates.items():
+            for selector in candidates:
+                self.selectors[selector] = name
+        for name, xpath in UI.tweet_selectors().items():
+            self.selectors.setdefault(('xpath', xpath), name)
+        self.base_time = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+    # WebDriver API
+
+    def execute(self, command, params=None):
+        """
+        Run a command after the simulated round trip latency.
+
+        Parameters:
+            command (str): WebDriver command name, e.g. 'findElements' or 'executeScript'.
+            params (dict): Command parameters.
+
+        Returns:
+            dict: The response, with the result under 'value'.
+        """
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        self.round_trips += 1
+        return {'value': getattr(self, 'command_' + command)(**(params or {}))}
+
+    def get(self, url):
+        self.execute('get', {'url': url})
+
+    def refresh(self):
+        self.execute('refresh')
+
+    def find_element(self, by='id', value=None):
+        return self.execute('findElement', {'using': by, 'value': value})['value']
+
+    def find_elements(self, by='id', value=None):
+        return self.execute('findElements', {'using': by, 'value': value})['value']
+
+    def execute_script(self, script, *args):
+        return self.execute('executeScript', {'script': script, 'args': args})['value']
+
+    def execute_async_script(self, script, *args):
+        return self.execute('executeAsyncScript', {'script': script, 'args': args})['value']
+
+    def set_script_timeout(self, time_to_wait):
+        self.execute('setTimeouts', {'script': time_to_wait})
+
+    def get_cookies(self):
+        return self.execute('getAllCookies')['value']
+
+    def add_cookie(self, cookie):
+        self.execute('addCookie', {'cookie': cookie})
+
+    def delete_all_cookies(self):
+        self.execute('deleteAllCookies')
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute('executeCdpCommand', {'cmd': cmd, 'params': cmd_args})['value']
+
+    def quit(self):
+        pass
+
+    # Commands
+
+    def command_get(self, url):
+        self.current_url = url
+        self.scroll_y = 0
+        self.marked = set()
+        match = re.search(r'/explore/tabs/(\w+)', url)
+        self.tab = match.group(1) if match else None
+        query = parse_qs(urlparse(url).query).get('q', [''])[0]
+        match = re.search(r'max_id:(\d+)', query)
+        self.max_id = int(match.group(1)) if match else None
+        match = re.search(r'since_id:(\d+)', query)
+        self.since_id = int(match.group(1)) if match else None
+
+    def command_refresh(self):
+        self.command_get(self.current_url)
+
+    def command_findElement(self, using, value):
+        return self.first(self.resolve(None, using, value), value)
+
+    def command_findElements(self, using, value):
+        return self.resolve(None, using, value)
+
+    def command_findChildElement(self, context, using, value):
+        return self.first(self.resolve(context, using, value), value)
+
+    def command_findChildElements(self, context, using, value):
+        return self.resolve(context, using, value)
+
+    def command_getElementText(self, element):
+        return element.element_text
+
+    def command_getElementAttribute(self, element, name):
+        return element.attributes.get(name)
+
+    def command_getElementRect(self, element):
+        return {'x': 0, 'y': element.y}
+
+    def command_clickElement(self, element):
+        if element.kind == 'explore_btn':
+            self.command_get('https://twitter.com/explore')
+        elif element.kind.startswith('explore_tab_'):
+            self.command_get(UI.explore_tab_urls[element.kind[len('explore_tab_'):]])
+
+    def command_sendKeysToElement(self, element, text):
+        pass
+
+    def command_setTimeouts(self, script):
+        self.script_timeout = script
+
+    def command_getAllCookies(self):
+        return list(self.cookies)
+
+    def command_addCookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def command_deleteAllCookies(self):
+        self.cookies = []
+
+    def command_executeCdpCommand(self, cmd, params):
+        if cmd == 'Network.setCookies':
+            self.cookies.extend(params['cookies'])
+        return {}
+
+    def command_executeScript(self, script, args):
+        if script == UI.tweets_data_script:
+            return self.tweets_data(mark=args[2], limit=args[3] if len(args) > 3 else None)
+        if script == UI.explore_step_script:
+            return self.explore_step()
+        if script == UI.node_count_script:
+            return {'count': self.node_count(args[0]), 'resources': 0}
+        if script == UI.page_state_script:
+            return 'ok'
+        if script == UI.no_results_script:
+            return self.tab is None and not self.tweet_indexes()
+        if script == 'return window.scrollY;':
+            return self.scroll_y
+        match = re.match(r'return window\.scrollTo\(0,\s*([\d.]+)\);', script)
+        if match:
+            self.scroll_y = min(float(match.group(1)), self.max_scroll())
+            return None
+        if script.startswith('window.scrollBy(0, window.innerHeight);'):
+            self.scroll_y = min(self.scroll_y + self.viewport, self.max_scroll())
+            return len(self.tweet_indexes())
+        if script == 'return 1;':
+            return 1
+        if script == 'window.location.href = arguments[0];':
+            self.command_get(args[0])
+            return None
+        raise ValueError(f'FakeDriver does not know the script: {script[:80]!r}')
+
+    def command_executeAsyncScript(self, script, args):
+        if script == UI.content_growth_script:
+            # The script holds the connection until the new trends are rendered, or its timeout
+            pending = min(self.rendered_at - time.monotonic(), args[2] / 1000)
+            if pending > 0:
+                time.sleep(pending)
+            count = self.node_count(args[0])
+            previous = args[1]
+            reason = 'grown' if previous is None or count > previous else 'idle'
+            return {'count': count, 'reason': reason, 'elapsed': 0}
+        raise ValueError(f'FakeDriver does not know the async script: {script[:80]!r}')
+
+    # Synthetic page
+
+    def post(self, count):
+        """
+        Add newer tweets at the top of the timeline.
+
+        Parameters:
+            count (int): Number of tweets.
+
+        Returns:
+            None
+        """
+        self.first_tweet -= count
+
+    def tweet_indexes(self):
+        # Index 0 is the newest tweet of the initial timeline, tweets posted later have negative indexes
+        indexes = range(self.first_tweet, self.tweet_count)
+        if self.max_id is not None:
+            indexes = [index for index in indexes if NEWEST_TWEET_ID - index <= self.max_id]
+        if self.since_id is not None:
+            indexes = [index for index in indexes if NEWEST_TWEET_ID - index > self.since_id]
+        return indexes
+
+    def first(self, elements, value):
+        if not elements:
+            raise NoSuchElementException(f'FakeDriver found no element for {value!r}')
+        return elements[0]
+
+    def max_scroll(self):
+        if self.tab:
+            return max(self.trend_count * self.trend_height - self.viewport, 0)
+        return 0
+
+    def resolve(self, context, using, value):
+        name = self.selectors.get((using, value))
+        if name is None:
+            return []
+        if context is None:
+            return self.page_elements(name)
+        return self.child_elements(context, name)
+
+    def page_elements(self, name):
+        if name == 'tweet_container':
+            return [self.tweet(index) for index in self.tweet_indexes()] if self.tab is None else []
+        if name in ('explore_btn', 'explore_tabs'):
+            return [FakeElement(self, name)]
+        if name == 'trend_window' and self.tab:
+            return [FakeElement(self, name)]
+        if name == 'trends' and self.tab:
+            return self.rendered_trends()
+        return []
+
+    def child_elements(self, context, name):
+        kind = context.kind
+        if kind == 'explore_tabs' and name.startswith('explore_tab_'):
+            return [FakeElement(self, name)]
+        if kind == 'trend_window' and name == 'trends':
+            return self.rendered_trends()
+        if kind == 'trend' and name == 'single_trend_data':
+            return [FakeElement(self, 'trend_data', context.index, text) for text in self.trend_texts(context.index)]
+        if kind == 'tweet':
+            data = self.tweet_data(context.index)
+            if name == 'tweet_by_container':
+                return [FakeElement(self, 'tweet_by', context.index)]
+            if name == 'tweet_text':
+                return [FakeElement(self, 'text', context.index, data['tweet_text'])]
+            if name == 'tweet_media':
+                return [FakeElement(self, 'media', context.index, attributes={'src': src}) for src in data['media_links']]
+            if name == 'tweet_stats':
+                return [FakeElement(self, 'stat', context.index, stat) for stat in data['stats']]
+        if kind == 'tweet_by':
+            data = self.tweet_data(context.index)
+            if name == 'tweet_by_display_name':
+                return [FakeElement(self, 'display_name', context.index, data['display_name'])]
+            if name == 'tweet_by_username':
+                return [FakeElement(self, 'username', context.index, data['username'])]
+            if name == 'tweet_datetime':
+                return [FakeElement(self, 'time', context.index, attributes={'datetime': data['tweet_datetime']})]
+            if name == 'tweet_status_link':
+                href = f'https://twitter.com/{data["username"][1:]}/status/{data["tweet_id"]}'
+                return [FakeElement(self, 'link', context.index, attributes={'href': href})]
+        return []
+
+    def tweet(self, index):
+        return FakeElement(self, 'tweet', index)
+
+    def tweet_data(self, index):
+        posted = self.base_time - timedelta(minutes=index)
+        return {
+            'tweet_id': str(NEWEST_TWEET_ID - index),
+            'display_name': f'Benchmark User {index % 97}',
+            'username': f'@bench_user_{index % 97}',
+            'tweet_datetime': posted.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'tweet_text': f'Synthetic tweet number {index} about #topic{index % 13} and benchmarks',
+            'media_links': ([f'https://pbs.twimg.com/media/bench{index}.jpg'] if index % self.media_every == 0 else []),
+            'stats': [str(index % 50), f'{index % 9}.{index % 10}K', f'{index % 30}K', f'{index % 7}.{index % 10}M']
+        }
+
+    def tweets_data(self, mark=None, limit=None):
+        indexes = self.tweet_indexes()
+        if mark:
+            indexes = [index for index in indexes if index not in self.marked]
+        if limit is not None:
+            indexes = indexes[:limit]
+        if mark:
+            self.marked.update(indexes)
+        return [self.tweet_data(index) for index in indexes]
+
+    def rendered_trends(self):
+        top = self.scroll_y - self.viewport
+        bottom = self.scroll_y + 2 * self.viewport
+        first = max(int(top // self.trend_height), 0)
+        last = min(int(bottom // self.trend_height) + 1, self.trend_count)
+        return [FakeElement(self, 'trend', index, y=index * self.trend_height) for index in range(first, last)]
+
+    def node_count(self, xpath):
+        if xpath == UI.new_trends:
+            if time.monotonic() < self.rendered_at:
+                return 0
+            return len([trend for trend in self.rendered_trends() if trend.index not in self.marked])
+        return len(self.rendered_trends()) if self.tab else len(self.tweet_indexes())
+
+    def explore_step(self):
+        trends = [trend.index for trend in self.rendered_trends() if trend.index not in self.marked]
+        self.marked.update(trends)
+        before = self.scroll_y
+        self.scroll_y = min(self.scroll_y + self.viewport, self.max_scroll())
+        if self.scroll_y != before:
+            self.rendered_at = time.monotonic() + self.render_delay
+        return {'trends': [self.trend_texts(index) for index in trends], 'at_end': self.scroll_y == before}
+
+    def trend_texts(self, index):
+        category = TREND_CATEGORIES.get(self.tab, 'Trending')
+        if self.tab == 'trending':
+            category = f'{index + 1} · {category}'
+        return [category, f'#BenchTrend{index}', f'{(index * 37) % 900 + 1}K posts']
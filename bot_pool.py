@@ -0,0 +1,283 @@
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+from errors import BotError
+from row_buffer import RowBuffer
+from twitterbot import BotFunctions, TWEET_COLUMNS
+
+
+class BotSession:
+    """
+    A WebDriver session bound to one account, owned by a BotPool.
+    """
+    def __init__(self, username, driver_factory, url):
+        """
+        Initializes BotSession object.
+
+        Parameters:
+            username (str): Account whose cookies are loaded into the session.
+            driver_factory (callable): Returns a new WebDriver instance.
+            url (str): Page opened before the cookies are added.
+        """
+        self.username = username
+        self.driver_factory = driver_factory
+        self.url = url
+        self.bot = None
+        self.jobs_done = 0
+        self.restarts = 0
+
+    def start(self):
+        """
+        Start a new driver, open the website and load the account's cookies.
+
+        Returns:
+            None
+        """
+        self.bot = BotFunctions(self.driver_factory(), self.username)
+        self.bot.open_website(self.url)
+        if self.bot.load_cookies():
+            self.bot.refresh_page()
+        else:
+            print(f'No cookies found for {self.username}, session is not logged in.')
+
+    def is_healthy(self):
+        """
+        Check that the driver is still responding.
+
+        Returns:
+            bool: True if the driver executed a trivial script, False otherwise.
+        """
+        if self.bot is None:
+            return False
+        try:
+            return self.bot.driver.execute_script('return 1;') == 1
+        except WebDriverException:
+            return False
+
+    def stop(self):
+        """
+        Quit the driver, ignoring errors from a driver that already crashed.
+
+        Returns:
+            None
+        """
+        if self.bot is not None:
+            try:
+                self.bot.driver.quit()
+            except WebDriverException as e:
+                print(e)
+            self.bot = None
+
+    def recycle(self):
+        """
+        Replace the driver with a fresh one, or start the first one.
+
+        Returns:
+            None
+        """
+        if self.bot is not None:
+            self.restarts += 1
+        self.stop()
+        self.start()
+
+
+class BotPool:
+    """
+    A pool of WebDriver sessions, one per account, running scrape jobs concurrently.
+
+    Each session is reused between jobs. Before a job runs, the session is health checked and
+    recycled if its driver stopped responding; a job that fails with a WebDriverException is retried,
+    on a recycled session if the driver no longer responds. Bot errors (errors.BotError), such as a
+    selector timeout, are raised without a retry. Rows collected by every successful job are merged into the pool's row buffers,
+    the partial rows of a failed job are dropped.
+
+    Example:
+        pool = BotPool(['account1', 'account2'], driver_factory=webdriver.Edge, max_workers=2)
+        pool.run_on_all('harvest_timeline', max_tweets=200)
+        pool.run_on_all('data_from_explore_tabs')
+        pool.tweets_df.to_csv('tweets.csv', index=False)
+        pool.close()
+    """
+    def __init__(self, usernames, driver_factory, max_workers=None, url='https://twitter.com/?lang=en', retries=1):
+        """
+        Initializes BotPool object.
+
+        Parameters:
+            usernames (list): Accounts to start one session for. Their cookies are read from the bots' cookie store,
+                see session_manager.CookieStore.
+            driver_factory (callable): Returns a new WebDriver instance.
+            max_workers (int): Optional. Maximum number of jobs running at once. Defaults to the number of accounts.
+            url (str): Page opened before the cookies are added. Defaults to 'https://twitter.com/?lang=en'.
+            retries (int): Number of times a job crashed by a WebDriverException is retried. Default is 1.
+        """
+        self.sessions = {username: BotSession(username, driver_factory, url) for username in usernames}
+        self.max_workers = max_workers or len(self.sessions)
+        self.retries = retries
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.idle_sessions = {username: queue.Queue(maxsize=1) for username in self.sessions}
+        self.any_idle = queue.Queue()
+        for username in self.sessions:
+            self.release(username)
+
+        self.lock = threading.Lock()
+        self.tweets_rows = RowBuffer(TWEET_COLUMNS + ['account'])
+        self.trending_rows = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def acquire(self, username=None):
+        """
+        Take an idle session, waiting until one is available.
+
+        Parameters:
+            username (str): Optional. Take this account's session instead of any idle one.
+
+        Returns:
+            BotSession: The acquired session.
+        """
+        while True:
+            name = username if username is not None else self.any_idle.get()
+            try:
+                self.idle_sessions[name].get(block=username is not None)
+                return self.sessions[name]
+            except queue.Empty:
+                # The session was taken directly by name after being announced as idle
+                continue
+
+    def release(self, username):
+        """
+        Return a session to the idle queues.
+
+        Parameters:
+            username (str): Account of the session.
+
+        Returns:
+            None
+        """
+        self.idle_sessions[username].put(username)
+        self.any_idle.put(username)
+
+    def submit(self, job, *args, username=None, **kwargs):
+        """
+        Schedule a job on an idle session.
+
+        Parameters:
+            job (str or callable): Name of a BotFunctions method, e.g. 'harvest_timeline', or a callable
+                taking the BotFunctions instance as its first argument.
+            username (str): Optional. Run the job on this account's session.
+            *args, **kwargs: Passed to the job.
+
+        Returns:
+            Future: Resolves to the job's return value.
+        """
+        return self.executor.submit(self.run_job, job, username, args, kwargs)
+
+    def run_on_all(self, job, *args, **kwargs):
+        """
+        Run a job once on every account and wait for all of them.
+
+        Returns:
+            dict: Username mapped to the job's return value.
+        """
+        futures = {username: self.submit(job, *args, username=username, **kwargs) for username in self.sessions}
+        return {username: future.result() for username, future in futures.items()}
+
+    def run_job(self, job, username, args, kwargs):
+        session = self.acquire(username)
+        try:
+            for attempt in range(self.retries + 1):
+                if not session.is_healthy():
+                    session.recycle()
+                try:
+                    if isinstance(job, str):
+                        result = getattr(session.bot, job)(*args, **kwargs)
+                    else:
+                        result = job(session.bot, *args, **kwargs)
+                    session.jobs_done += 1
+                    self.merge(session)
+                    return result
+                except BotError:
+                    # A missing or stale element is the job's failure, not a crashed browser
+                    raise
+                except WebDriverException as e:
+                    print(f'Session {session.username} failed: {e}')
+                    if attempt == self.retries:
+                        raise
+        finally:
+            # Rows left by a failed job must not be merged with the next job of the session
+            self.clear_rows(session)
+            self.release(session.username)
+
+    def merge(self, session):
+        """
+        Move the rows collected by a session into the pool's row buffers.
+
+        Parameters:
+            session (BotSession): Session whose bot has just finished a job.
+
+        Returns:
+            None
+        """
+        bot = session.bot
+        tweets_df = bot.tweets_rows.to_dataframe()
+        trending = {tab_name: rows.to_dataframe() for tab_name, rows in bot.trending_rows.items()}
+        with self.lock:
+            if len(tweets_df):
+                self.tweets_rows.append_dataframe(tweets_df.assign(account=session.username))
+            for tab_name, df in trending.items():
+                if tab_name not in self.trending_rows:
+                    self.trending_rows[tab_name] = RowBuffer(bot.trending_rows[tab_name].columns + ['account'])
+                if len(df):
+                    self.trending_rows[tab_name].append_dataframe(df.assign(account=session.username))
+        self.clear_rows(session)
+
+    @staticmethod
+    def clear_rows(session):
+        """
+        Empty the row buffers of a session's bot.
+
+        Parameters:
+            session (BotSession): The session, whose bot may already be gone after a crash.
+
+        Returns:
+            None
+        """
+        if session.bot is None:
+            return
+        session.bot.tweets_rows.clear()
+        for rows in session.bot.trending_rows.values():
+            rows.clear()
+
+    @property
+    def tweets_df(self):
+        """
+        DataFrame of the tweets collected by every session, with an 'account' column.
+        """
+        with self.lock:
+            return self.tweets_rows.to_dataframe()
+
+    @property
+    def trending_df(self):
+        """
+        Dictionary of tab name mapped to a DataFrame of the trends collected by every session.
+        """
+        with self.lock:
+            return {tab_name: rows.to_dataframe() for tab_name, rows in self.trending_rows.items()}
+
+    def close(self):
+        """
+        Wait for the running jobs and quit every driver.
+
+        Returns:
+            None
+        """
+        self.executor.shutdown(wait=True)
+        for session in self.sessions.values():
+            session.stop()
@@ -0,0 +1,174 @@
+"""
+Resumable checkpoints of long search and profile crawls, see BotFunctions.scrape_search.
+
+A checkpoint keeps the oldest and newest tweet reached by a crawl and the number of tweets collected, in a
+small JSON file per crawl. Twitter IDs grow with time, so an interrupted crawl resumes with a 'max_id:'
+search operator just below the oldest tweet reached, instead of re-scrolling from the top through tweets
+it already has. The search never returns those tweets again, so their IDs need not be kept.
+
+Once a crawl reached the end of its results it is done, and every later run is a refresh: a pass over the
+tweets posted since, with a 'since_id:' operator at the newest tweet collected before the pass. A refresh
+is newest first too, so an interrupted refresh resumes below the oldest tweet it reached, above the same
+since_id, and the gap between the two passes is never skipped.
+"""
+from datetime import datetime, timezone
+import json
+import os
+import re
+
+
+class Checkpoint:
+    """
+    Progress of one crawl, saved as JSON.
+    """
+    def __init__(self, key, path):
+        """
+        Initializes Checkpoint object.
+
+        Parameters:
+            key (str): Identifies the crawl, e.g. 'search:python since:2024-01-01'.
+            path (str): Path of the JSON file.
+        """
+        self.key = key
+        self.path = path
+        self.oldest_id = None
+        self.oldest_time = None
+        self.newest_id = None
+        self.newest_time = None
+        self.count = 0
+        self.done = False
+        self.refreshing = False
+        self.refresh_since_id = None
+        self.refresh_oldest_id = None
+        self.updated = None
+
+    @classmethod
+    def load(cls, key, directory='checkpoints'):
+        """
+        Load the checkpoint of a crawl, or create an empty one.
+
+        Parameters:
+            key (str): Identifies the crawl.
+            directory (str): Directory of the checkpoint files. Defaults to 'checkpoints'.
+
+        Returns:
+            Checkpoint: The saved progress, empty if the crawl never ran.
+        """
+        path = os.path.join(directory, re.sub(r'[^\w.@-]+', '_', key).strip('_')[:150] + '.json')
+        checkpoint = cls(key, path)
+        if os.path.exists(path):
+            with open(path) as file:
+                data = json.load(file)
+            for name in ('oldest_id', 'oldest_time', 'newest_id', 'newest_time', 'count', 'done', 'refreshing',
+                         'refresh_since_id', 'refresh_oldest_id', 'updated'):
+                setattr(checkpoint, name, data.get(name, getattr(checkpoint, name)))
+        return checkpoint
+
+    def update(self, tweets):
+        """
+        Record newly collected tweets.
+
+        Parameters:
+            tweets (list): Tweet dictionaries, as returned by BotFunctions.fetch_tweets_data_batch.
+
+        Returns:
+            None
+        """
+        for tweet_details in tweets:
+            self.count += 1
+            tweet_id = tweet_details.get('tweet_id', 'NA')
+            if tweet_id in ('NA', None):
+                continue
+            if self.oldest_id is None or int(tweet_id) < int(self.oldest_id):
+                self.oldest_id = tweet_id
+                self.oldest_time = tweet_details.get('tweet_datetime')
+            if self.newest_id is None or int(tweet_id) > int(self.newest_id):
+                self.newest_id = tweet_id
+                self.newest_time = tweet_details.get('tweet_datetime')
+            if self.refreshing and (self.refresh_oldest_id is None or int(tweet_id) < int(self.refresh_oldest_id)):
+                self.refresh_oldest_id = tweet_id
+
+    def start_refresh(self):
+        """
+        Start a refresh of a done crawl, collecting the tweets newer than the newest one collected so far.
+
+        Does nothing if a refresh is already in progress, so an interrupted refresh is resumed.
+
+        Returns:
+            None
+        """
+        if not self.refreshing:
+            self.refreshing = True
+            self.refresh_since_id = self.newest_id
+            self.refresh_oldest_id = None
+
+    def finish(self):
+        """
+        Mark the crawl, or its refresh, as having reached the end of its results.
+
+        Returns:
+            None
+        """
+        self.done = True
+        self.refreshing = False
+        self.refresh_since_id = None
+        self.refresh_oldest_id = None
+
+    def resume_query(self, query):
+        """
+        Search query continuing the crawl below the oldest tweet reached, or the refresh in progress.
+
+        Parameters:
+            query (str): Search query of the crawl.
+
+        Returns:
+            str: The query with since_id and max_id operators, or the query itself if no tweet was reached yet.
+        """
+        if self.refreshing:
+            if self.refresh_since_id is not None:
+                query = f'{query} since_id:{self.refresh_since_id}'
+            oldest_id = self.refresh_oldest_id
+        else:
+            oldest_id = self.oldest_id
+        if oldest_id is None:
+            return query
+        return f'{query} max_id:{int(oldest_id) - 1}'
+
+    def save(self):
+        """
+        Write the checkpoint, replacing the file atomically.
+
+        Returns:
+            None
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.updated = datetime.now(timezone.utc).isoformat()
+        data = {
+            'key': self.key,
+            'oldest_id': self.oldest_id,
+            'oldest_time': self.oldest_time,
+            'newest_id': self.newest_id,
+            'newest_time': self.newest_time,
+            'count': self.count,
+            'done': self.done,
+            'refreshing': self.refreshing,
+            'refresh_since_id': self.refresh_since_id,
+            'refresh_oldest_id': self.refresh_oldest_id,
+            'updated': self.updated
+        }
+        with open(self.path + '.tmp', 'w') as file:
+            json.dump(data, file)
+        os.replace(self.path + '.tmp', self.path)
+
+    def reset(self):
+        """
+        Forget the progress and delete the file, to crawl again from the top.
+
+        Returns:
+            None
+        """
+        self.__init__(self.key, self.path)
+        if os.path.exists(self.path):
+            os.remove(self.path)
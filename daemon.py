@@ -0,0 +1,634 @@
+"""
+Long running scraper: warm browser sessions running scheduled jobs from a JSON config file.
+
+Every account gets one browser session, started once through BotFunctions.start_session (cookies first,
+login only when they are rejected) and kept open between jobs. Each session has its own worker thread
+and job queue. A crashed session is restarted on its own, with a backoff, while the other sessions keep
+running. Jobs run every 'every' minutes. The interval is randomized by +/- 'jitter' of itself, so
+jobs do not fire in lockstep. A job that is still queued or running when it is due again is skipped
+rather than stacked. Rows are written to sinks (see sinks.py) after every job, and explore tab rows
+can also be recorded into a TrendHistory (see trend_history.py). scrape_search and scrape_profile jobs
+crawl their search to its end over as many runs as their max_tweets or max_seconds need, then every run
+collects the tweets posted since the previous one, see BotFunctions.crawl. A local HTTP endpoint serves the
+state of the sessions, queue depth and throughput as JSON at /status.
+
+    python daemon.py daemon.json
+
+Example config:
+
+    {
+        "accounts": [
+            {"username": "account1", "password_env": "ACCOUNT1_PASSWORD"},
+            {"username": "account2@example.com", "handle": "account2"}
+        ],
+        "launch_profile": "fast",
+        "jobs": [
+            {"name": "explore", "job": "data_from_explore_tabs", "every": 15},
+            {"name": "nasa", "job": "scrape_profile", "args": ["nasa"], "kwargs": {"max_tweets": 200},
+             "every": 60, "account": "account1"},
+            {"name": "python", "job": "scrape_search", "args": ["#python"], "every": 30, "jitter": 0.2}
+        ],
+        "output": {"directory": "data", "format": "jsonl", "trend_history": "history"},
+        "status": {"host": "127.0.0.1", "port": 8765}
+    }
+
+The password of an account is read from its 'password' key, or from the environment variable named
+by 'password_env', which defaults to TWITTER_PASSWORD_<USERNAME> (upper case, other characters than
+letters and digits replaced by '_'). It is only needed when no valid cookies are saved. An account
+logging in with an email address needs its 'handle', the username entered if Twitter asks to verify the
+login. Without it, such a login fails with LoggedOut and the session is restarted later.
+"""
+import argparse
+from collections import deque
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import queue
+import random
+import re
+import signal
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from bot_pool import BotSession
+from errors import LoggedOut
+from scheduler import AccountLimiter
+from sinks import CsvSink, JsonlSink, ParquetSink
+from trend_history import TrendHistory
+from twitterbot import LAUNCH_PROFILES, BotFunctions, TwitterBot
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonlSink, 'parquet': ParquetSink}
+
+# Seconds the throughput of the status endpoint is averaged over.
+THROUGHPUT_WINDOW = 300
+
+
+def password_env(username):
+    """
+    Returns:
+        str: Name of the environment variable the password of an account is read from by default.
+    """
+    return 'TWITTER_PASSWORD_' + re.sub(r'[^A-Z0-9]', '_', username.upper())
+
+
+def load_config(path):
+    """
+    Read and check a daemon config file.
+
+    Parameters:
+        path (str): Path of the JSON config file.
+
+    Returns:
+        dict: The config.
+
+    Raises:
+        ValueError: If the config has no accounts, a job names an unknown method or account, or an output
+            format is not supported.
+    """
+    with open(path) as file:
+        config = json.load(file)
+    check_config(config)
+    return config
+
+
+def check_config(config):
+    usernames = [account['username'] for account in config.get('accounts', [])]
+    if not usernames:
+        raise ValueError('The config has no accounts.')
+    names = set()
+    for job in config.get('jobs', []):
+        if job['name'] in names:
+            raise ValueError(f'Job name {job["name"]!r} is used twice.')
+        names.add(job['name'])
+        if job['job'].startswith('_') or not callable(getattr(BotFunctions, job['job'], None)):
+            raise ValueError(f'Job {job["name"]!r}: BotFunctions has no method {job["job"]!r}.')
+        if job.get('account') is not None and job['account'] not in usernames:
+            raise ValueError(f'Job {job["name"]!r}: unknown account {job["account"]!r}.')
+        if job['every'] <= 0:
+            raise ValueError(f'Job {job["name"]!r}: "every" must be positive.')
+    output_format = config.get('output', {}).get('format', 'jsonl')
+    if output_format not in SINKS:
+        raise ValueError(f'Unknown output format {output_format!r}, expected one of {sorted(SINKS)}.')
+
+
+class ScheduledJob:
+    """
+    A job of the config, run every 'every' minutes.
+    """
+    def __init__(self, name, job, every, args=(), kwargs=None, account=None, jitter=0.1, cost=1):
+        """
+        Initializes ScheduledJob object.
+
+        Parameters:
+            name (str): Name of the job in the status.
+            job (str): Name of the BotFunctions method run, e.g. 'data_from_explore_tabs'.
+            every (float): Minutes between runs.
+            args (list), kwargs (dict): Passed to the method.
+            account (str): Optional. Run the job on this account only. Defaults to the least busy session.
+            jitter (float): Fraction of the interval each run is moved by at random, at most. Default is 0.1.
+            cost (float): Tokens taken from the account's limiter before the job starts. Default is 1.
+        """
+        self.name = name
+        self.job = job
+        self.interval = every * 60
+        self.args = tuple(args)
+        self.kwargs = kwargs or {}
+        self.account = account
+        self.jitter = jitter
+        self.cost = cost
+
+        self.next_run = None
+        self.active = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.records = 0
+        self.last_started = None
+        self.last_seconds = None
+        self.last_error = None
+
+    def schedule(self, now, rng, first=False):
+        """
+        Set the time of the next run.
+
+        Parameters:
+            now (float): Current time.
+            rng (random.Random): Source of the jitter.
+            first (bool): If True, the first run is spread over the jitter instead of waiting a full interval.
+
+        Returns:
+            None
+        """
+        if first:
+            self.next_run = now + rng.uniform(0, self.jitter * self.interval)
+        else:
+            self.next_run = now + self.interval * (1 + rng.uniform(-self.jitter, self.jitter))
+
+    def status(self, now):
+        return {
+            'job': self.job,
+            'account': self.account,
+            'active': self.active,
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'records': self.records,
+            'last_seconds': self.last_seconds,
+            'last_error': self.last_error,
+            'next_run_in': None if self.next_run is None else max(self.next_run - now, 0.0)
+        }
+
+
+class DaemonSession(BotSession):
+    """
+    A warm session of the daemon: a logged in bot, its job queue and its worker thread.
+    """
+    def __init__(self, username, driver_factory, url, password=None, wait_timeouts=None, limiter=None,
+                 handle=None):
+        """
+        Initializes DaemonSession object.
+
+        Parameters:
+            username (str): Account of the session.
+            driver_factory (callable): Returns a new WebDriver instance.
+            url (str): Unused, the session starts through BotFunctions.start_session.
+            password (callable): Optional. Returns the password of the account, or None if it has none, called only
+                if a login is needed.
+            wait_timeouts (dict): Optional. Wait timeouts of the bot, see DEFAULT_WAIT_TIMEOUTS.
+            limiter (AccountLimiter): Optional. Pacing of the account, kept across restarts.
+            handle (str): Optional. Username of the account, see BotFunctions.handle.
+        """
+        super().__init__(username, driver_factory, url)
+        self.password = password
+        self.handle = handle
+        self.wait_timeouts = wait_timeouts
+        self.limiter = limiter if limiter is not None else AccountLimiter()
+        self.queue = queue.Queue()
+        self.thread = None
+        self.state = 'stopped'
+        self.current = None
+        self.jobs_failed = 0
+        self.start_failures = 0
+        self.last_error = None
+        self.bootstrap = None
+
+    def start(self):
+        """
+        Start a new driver and a logged in session on it.
+
+        Returns:
+            None
+
+        Raises:
+            RateLimited, LoggedOut, SelectorTimeout, WebDriverException: If the session could not be started,
+                the driver is quit.
+        """
+        self.bot = BotFunctions(self.driver_factory(), self.username, wait_timeouts=self.wait_timeouts)
+        self.bot.limiter = self.limiter
+        self.bot.handle = self.handle
+        try:
+            self.bootstrap = self.bot.start_session(self.password)
+        except Exception:
+            self.stop()
+            raise
+
+    def status(self):
+        return {
+            'state': self.state,
+            'current_job': self.current,
+            'queue_depth': self.queue.qsize(),
+            'jobs_done': self.jobs_done,
+            'jobs_failed': self.jobs_failed,
+            'restarts': self.restarts,
+            'start_failures': self.start_failures,
+            'last_error': self.last_error,
+            'bootstrap': self.bootstrap,
+            'limiter': self.limiter.stats()
+        }
+
+
+class Daemon:
+    """
+    Runs the scheduled jobs of a config on warm sessions until stopped.
+
+    Example:
+        daemon = Daemon(load_config('daemon.json'))
+        daemon.run()
+    """
+    def __init__(self, config, driver_factory=None, session_factory=DaemonSession, restart_backoff=5.0,
+                 max_restart_backoff=300.0, seed=None):
+        """
+        Initializes Daemon object.
+
+        Parameters:
+            config (dict): See the module docstring and load_config.
+            driver_factory (callable): Optional. Returns a new WebDriver instance. Defaults to
+                TwitterBot.create_driver with the config's 'launch_profile' (default 'fast').
+            session_factory (callable): Creates the sessions, called like DaemonSession. Defaults to DaemonSession.
+            restart_backoff (float): Seconds before a session that failed to start is started again, doubled for
+                every failure in a row. Default is 5.
+            max_restart_backoff (float): Upper bound of the restart backoff, in seconds. Default is 300.
+            seed (int): Optional. Seed of the jitter.
+
+        Raises:
+            ValueError: If the config is invalid, see load_config.
+        """
+        check_config(config)
+        self.config = config
+        if driver_factory is None:
+            driver_factory = functools.partial(TwitterBot.create_driver,
+                                               **LAUNCH_PROFILES[config.get('launch_profile', 'fast')])
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.rng = random.Random(seed)
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+
+        self.sessions = {}
+        for account in config['accounts']:
+            username = account['username']
+            self.sessions[username] = session_factory(
+                username, driver_factory, account.get('url', 'https://twitter.com/?lang=en'),
+                password=functools.partial(self.password, account),
+                wait_timeouts=config.get('wait_timeouts'),
+                limiter=AccountLimiter(**config.get('limiter', {})),
+                handle=account.get('handle')
+            )
+        self.jobs = {job['name']: ScheduledJob(**job) for job in config.get('jobs', [])}
+
+        output = config.get('output', {})
+        self.output_directory = output.get('directory', 'data')
+        self.sink_class = SINKS[output.get('format', 'jsonl')]
+        self.sink_options = output.get('sink_options', {})
+        self.sinks = {}
+        self.history = None
+        if output.get('trend_history'):
+            self.history = TrendHistory(output['trend_history'])
+
+        self.started = None
+        self.completed = deque()
+        self.records = 0
+        self.status_server = None
+
+    @staticmethod
+    def password(account):
+        """
+        Read the password of an account from the config or the environment.
+
+        Parameters:
+            account (dict): Account entry of the config.
+
+        Returns:
+            str: The password, or None if none is set.
+        """
+        if account.get('password') is not None:
+            return account['password']
+        return os.environ.get(account.get('password_env') or password_env(account['username']))
+
+    def run(self, max_seconds=None):
+        """
+        Start the sessions, the status endpoint and the schedule, and run until stop is called.
+
+        Parameters:
+            max_seconds (float): Optional. Stop after this many seconds.
+
+        Returns:
+            None
+        """
+        self.started = time.monotonic()
+        status = self.config.get('status', {})
+        if status.get('port') is not None:
+            self.serve_status(status.get('host', '127.0.0.1'), status['port'])
+        for session in self.sessions.values():
+            session.thread = threading.Thread(target=self.work, args=(session,), name=f'session-{session.username}',
+                                              daemon=True)
+            session.thread.start()
+        now = time.monotonic()
+        for scheduled in self.jobs.values():
+            scheduled.schedule(now, self.rng, first=True)
+        try:
+            while not self.stopping.is_set():
+                now = time.monotonic()
+                if max_seconds is not None and now - self.started >= max_seconds:
+                    break
+                for scheduled in self.jobs.values():
+                    if scheduled.next_run <= now:
+                        self.dispatch(scheduled, now)
+                wake = min([scheduled.next_run for scheduled in self.jobs.values()], default=now + 1)
+                self.stopping.wait(min(max(wake - time.monotonic(), 0.0), 1.0))
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """
+        Ask run to return once the running jobs are done. Safe to call from a signal handler.
+
+        Returns:
+            None
+        """
+        self.stopping.set()
+
+    def dispatch(self, scheduled, now):
+        """
+        Queue a due job on a session, unless its previous run is still queued or running.
+
+        Parameters:
+            scheduled (ScheduledJob): The due job.
+            now (float): Current time.
+
+        Returns:
+            bool: True if the job was queued, False if it was skipped.
+        """
+        scheduled.schedule(now, self.rng)
+        if scheduled.active:
+            scheduled.skipped += 1
+            return False
+        scheduled.active = True
+        self.pick_session(scheduled).queue.put(scheduled)
+        return True
+
+    def pick_session(self, scheduled):
+        """
+        Returns:
+            DaemonSession: The session of the job's account, or the least busy session, preferring running ones.
+        """
+        if scheduled.account is not None:
+            return self.sessions[scheduled.account]
+        return min(self.sessions.values(), key=lambda session: (session.state != 'ready',
+                                                                session.queue.qsize() + (session.current is not None)))
+
+    def work(self, session):
+        """
+        Worker thread of a session: run its queued jobs until the daemon stops.
+
+        Returns:
+            None
+        """
+        # Warm the session before its first job is due
+        self.ensure_started(session)
+        while True:
+            scheduled = session.queue.get()
+            try:
+                if scheduled is None:
+                    return
+                if self.ensure_started(session):
+                    self.run_job(session, scheduled)
+            finally:
+                if scheduled is not None:
+                    scheduled.active = False
+
+    def ensure_started(self, session):
+        """
+        Start the session if it is not running or stopped responding, retrying with a backoff.
+
+        Parameters:
+            session (DaemonSession): The session.
+
+        Returns:
+            bool: True once the session is ready, False if the daemon stopped first.
+        """
+        while not self.stopping.is_set():
+            if session.state == 'ready' and session.is_healthy():
+                return True
+            session.state = 'starting'
+            try:
+                session.recycle()
+            except Exception as e:
+                session.start_failures += 1
+                session.last_error = f'{type(e).__name__}: {e}'
+                session.state = 'failed'
+                delay = min(self.restart_backoff * 2 ** (session.start_failures - 1), self.max_restart_backoff)
+                print(f'Session {session.username} failed to start, retrying in {delay:.0f}s: {session.last_error}')
+                self.stopping.wait(delay)
+            else:
+                session.start_failures = 0
+                session.state = 'ready'
+        return False
+
+    def run_job(self, session, scheduled):
+        """
+        Run a job on a ready session and write the rows it collected.
+
+        A session that no longer responds after a failed job, or whose login was lost, is restarted
+        before its next job. Rate limits pause the account through its limiter, see AccountLimiter.
+
+        Returns:
+            None
+        """
+        session.current = scheduled.name
+        scheduled.runs += 1
+        start = time.monotonic()
+        scheduled.last_started = start
+        records = 0
+        try:
+            session.limiter.acquire(scheduled.cost)
+            getattr(session.bot, scheduled.job)(*scheduled.args, **scheduled.kwargs)
+        except Exception as e:
+            scheduled.failures += 1
+            session.jobs_failed += 1
+            scheduled.last_error = session.last_error = f'{type(e).__name__}: {e}'
+            print(f'Job {scheduled.name} failed on {session.username}: {scheduled.last_error}')
+            if isinstance(e, LoggedOut) or (isinstance(e, WebDriverException) and not session.is_healthy()):
+                session.state = 'crashed'
+        else:
+            session.jobs_done += 1
+            session.limiter.on_success()
+            scheduled.last_error = None
+        finally:
+            if session.bot is not None:
+                records = self.drain(session, scheduled)
+            scheduled.last_seconds = time.monotonic() - start
+            session.current = None
+        with self.lock:
+            self.records += records
+            self.completed.append((time.monotonic(), records))
+
+    def drain(self, session, scheduled):
+        """
+        Move the rows collected by a job into the sinks, and the explore tabs into the trend history.
+
+        The tweets seen by the bot are forgotten too, so a warm session does not grow them without bound.
+        Crawls do not need them, their searches resume below or above the tweets already collected.
+
+        Parameters:
+            session (DaemonSession): Session whose bot has just finished the job.
+            scheduled (ScheduledJob): The job.
+
+        Returns:
+            int: Number of rows written.
+        """
+        bot = session.bot
+        data = {'tweets': bot.tweets_rows}
+        data.update(bot.trending_rows)
+        records = 0
+        with self.lock:
+            for data_of, rows in data.items():
+                if not len(rows):
+                    continue
+                df = rows.to_dataframe().assign(account=session.username, job=scheduled.name)
+                self.sink(data_of).write(df.to_dict('records'))
+                records += len(df)
+            if self.history is not None and any(len(rows) for rows in bot.trending_rows.values()):
+                self.history.record(bot)
+        scheduled.records += records
+        bot.tweets_rows.clear()
+        for rows in bot.trending_rows.values():
+            rows.clear()
+        bot.seen_tweets.clear()
+        return records
+
+    def sink(self, data_of):
+        if data_of not in self.sinks:
+            self.sinks[data_of] = self.sink_class(os.path.join(self.output_directory, data_of), **self.sink_options)
+        return self.sinks[data_of]
+
+    def status(self):
+        """
+        State of the daemon, as served by the status endpoint.
+
+        Returns:
+            dict: 'uptime_seconds', 'queue_depth' (jobs waiting for a session), 'running' (jobs running),
+                'records', the 'records_per_minute' and 'jobs_per_minute' of the last THROUGHPUT_WINDOW seconds,
+                and the 'sessions' and 'jobs' mapped to their state.
+        """
+        now = time.monotonic()
+        with self.lock:
+            while self.completed and self.completed[0][0] < now - THROUGHPUT_WINDOW:
+                self.completed.popleft()
+            uptime = now - self.started if self.started is not None else 0.0
+            minutes = min(uptime, THROUGHPUT_WINDOW) / 60
+            recent = sum(records for _, records in self.completed)
+            return {
+                'uptime_seconds': uptime,
+                'queue_depth': sum(session.queue.qsize() for session in self.sessions.values()),
+                'running': sum(session.current is not None for session in self.sessions.values()),
+                'records': self.records,
+                'records_per_minute': recent / minutes if minutes else 0.0,
+                'jobs_per_minute': len(self.completed) / minutes if minutes else 0.0,
+                'sessions': {username: session.status() for username, session in self.sessions.items()},
+                'jobs': {name: scheduled.status(now) for name, scheduled in self.jobs.items()}
+            }
+
+    def serve_status(self, host, port):
+        """
+        Serve the status as JSON at http://host:port/status, on a background thread.
+
+        Returns:
+            tuple: The (host, port) the endpoint listens on. Port 0 picks a free port.
+        """
+        self.status_server = StatusServer((host, port), self)
+        threading.Thread(target=self.status_server.serve_forever, name='status', daemon=True).start()
+        return self.status_server.server_address
+
+    def shutdown(self):
+        """
+        Wait for the running jobs, quit every driver, close the sinks and the status endpoint.
+
+        Queued jobs that did not start are dropped.
+
+        Returns:
+            None
+        """
+        self.stopping.set()
+        for session in self.sessions.values():
+            while True:
+                try:
+                    session.queue.get_nowait().active = False
+                except queue.Empty:
+                    break
+            session.queue.put(None)
+        for session in self.sessions.values():
+            if session.thread is not None:
+                session.thread.join()
+            session.stop()
+            session.state = 'stopped'
+        for sink in self.sinks.values():
+            sink.close()
+        self.sinks = {}
+        if self.status_server is not None:
+            self.status_server.shutdown()
+            self.status_server.server_close()
+            self.status_server = None
+
+
+class StatusServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, daemon):
+        super().__init__(address, StatusHandler)
+        self.daemon = daemon
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0].rstrip('/') != '/status':
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.daemon.status(), default=str).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('config', help='path of the JSON config file')
+    parser.add_argument('--max-seconds', type=float, help='stop after this many seconds')
+    args = parser.parse_args()
+
+    daemon = Daemon(load_config(args.config))
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: daemon.stop())
+    daemon.run(max_seconds=args.max_seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Typed errors raised by the bot, and the retry policy applied to its operations.
+
+SelectorTimeout and StaleElement also subclass the matching Selenium exceptions, so code catching
+TimeoutException or StaleElementReferenceException keeps working.
+"""
+import asyncio
+from collections import Counter
+import random
+import threading
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+
+
+class BotError(Exception):
+    """
+    Base class of the errors raised by the bot.
+    """
+
+
+class SelectorTimeout(BotError, TimeoutException):
+    """
+    No candidate selector of an element matched within the wait time.
+    """
+    def __init__(self, name, wait_time=None):
+        if wait_time is None:
+            super().__init__(f'No element found for {name!r}.')
+        else:
+            super().__init__(f'No element found for {name!r} within {wait_time} seconds.')
+        self.name = name
+        self.wait_time = wait_time
+
+
+class StaleElement(BotError, StaleElementReferenceException):
+    """
+    An element was removed from the page while it was being read, e.g. by the virtualized timeline.
+    """
+
+
+class RateLimited(BotError):
+    """
+    Twitter shows a rate limit or "Something went wrong" page.
+    """
+
+
+class LoggedOut(BotError):
+    """
+    The session is not logged in anymore.
+    """
+
+
+def classify(error):
+    """
+    Convert a Selenium exception into the matching BotError.
+
+    Parameters:
+        error (Exception): The raised exception.
+
+    Returns:
+        Exception: A BotError when the exception has a typed equivalent, the exception itself otherwise.
+    """
+    if isinstance(error, BotError):
+        return error
+    if isinstance(error, StaleElementReferenceException):
+        return StaleElement(error.msg)
+    if isinstance(error, TimeoutException):
+        return SelectorTimeout(error.msg or 'unknown')
+    return error
+
+
+class RetryPolicy:
+    """
+    How many times an operation is attempted, and how long to back off between attempts.
+    """
+    def __init__(self, attempts=1, backoff=1.0, factor=2.0, max_backoff=60.0, jitter=0.1,
+                 retry_on=(StaleElement,)):
+        """
+        Initializes RetryPolicy object.
+
+        Parameters:
+            attempts (int): Total number of attempts, 1 means no retry. Default is 1.
+            backoff (float): Seconds to wait before the first retry. Default is 1.
+            factor (float): Multiplier of the backoff after every retry. Default is 2.
+            max_backoff (float): Upper bound of the backoff, in seconds. Default is 60.
+            jitter (float): Random fraction added to every backoff, to spread out retries. Default is 0.1.
+            retry_on (tuple): Error classes that are retried, every other error is raised at once.
+                Defaults to (StaleElement,).
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.factor = factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_on = retry_on
+
+    def delay(self, attempt):
+        """
+        Backoff before the given retry.
+
+        Parameters:
+            attempt (int): Number of the failed attempt, starting at 1.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        delay = min(self.backoff * self.factor ** (attempt - 1), self.max_backoff)
+        return delay * (1 + random.uniform(0, self.jitter))
+
+    def run(self, operation, *args, on_failure=None, sleep=time.sleep, **kwargs):
+        """
+        Call an operation, retrying it on the retry_on errors.
+
+        Parameters:
+            operation (callable): The operation.
+            on_failure (callable): Optional. Called with every failure, before retrying or raising.
+            sleep (callable): Used to wait between attempts. Defaults to time.sleep.
+            *args, **kwargs: Passed to the operation.
+
+        Returns:
+            The return value of the operation.
+
+        Raises:
+            The classified error of the last attempt.
+        """
+        attempt = 1
+        while True:
+            try:
+                return operation(*args, **kwargs)
+            except (BotError, WebDriverException) as e:
+                error = classify(e)
+                if on_failure is not None:
+                    on_failure(error)
+                if attempt >= self.attempts or not isinstance(error, self.retry_on):
+                    if error is e:
+                        raise
+                    raise error from e
+                sleep(self.delay(attempt))
+                attempt += 1
+
+    async def run_async(self, operation, *args, on_failure=None, sleep=asyncio.sleep, **kwargs):
+        """
+        Await a coroutine function, retrying it on the retry_on errors, like run.
+
+        Parameters:
+            operation (callable): Coroutine function of the operation.
+            on_failure (callable): Optional. Called with every failure, before retrying or raising.
+            sleep (callable): Coroutine function used to wait between attempts. Defaults to asyncio.sleep.
+            *args, **kwargs: Passed to the operation.
+
+        Returns:
+            The return value of the operation.
+
+        Raises:
+            The classified error of the last attempt.
+        """
+        attempt = 1
+        while True:
+            try:
+                return await operation(*args, **kwargs)
+            except (BotError, WebDriverException) as e:
+                error = classify(e)
+                if on_failure is not None:
+                    on_failure(error)
+                if attempt >= self.attempts or not isinstance(error, self.retry_on):
+                    if error is e:
+                        raise
+                    raise error from e
+                await sleep(self.delay(attempt))
+                attempt += 1
+
+
+# Retry policy per bot operation. Rate limits and logged out sessions are never retried here,
+# a session that hit one has to back off or log in again.
+DEFAULT_RETRY_POLICIES = {
+    'login': RetryPolicy(attempts=1),
+    'fetch_tweets': RetryPolicy(attempts=3, backoff=0.5, retry_on=(StaleElement,)),
+    'harvest_timeline': RetryPolicy(attempts=2, backoff=2.0, retry_on=(StaleElement, SelectorTimeout)),
+    'explore_tab': RetryPolicy(attempts=2, backoff=2.0, retry_on=(StaleElement, SelectorTimeout)),
+}
+
+
+class FailureCounters:
+    """
+    Thread safe counts of failures per error class and per operation.
+    """
+    def __init__(self):
+        self.by_class = Counter()
+        self.by_operation = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, operation, error):
+        """
+        Count a failure.
+
+        Parameters:
+            operation (str): Name of the failed operation.
+            error (Exception): The error.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.by_class[type(error).__name__] += 1
+            self.by_operation[operation] += 1
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: 'by_class' and 'by_operation' failure counts.
+        """
+        with self.lock:
+            return {'by_class': dict(self.by_class), 'by_operation': dict(self.by_operation)}
@@ -0,0 +1,340 @@
+"""
+Timing instrumentation of a bot session: spans, WebDriver round trip counts and histograms.
+
+Every bot has a Metrics instance (BotFunctions.metrics). Its main BotFunctions methods run inside spans,
+see the timed decorator. Every WebDriver command is counted and timed by instrument_driver, and
+extraction time is recorded per tweet and per trend. The collected data can be exported as JSON or in
+the Prometheus text format:
+
+    bot.metrics.to_json()
+    bot.metrics.to_prometheus()
+
+A single run can also be profiled with cProfile, or with pyinstrument when it is installed:
+
+    with bot.metrics.profile('harvest.prof'):
+        bot.harvest_timeline(max_tweets=500)
+"""
+from contextlib import contextmanager
+import cProfile
+import functools
+import inspect
+import json
+import threading
+import time
+
+# Upper bounds of the histogram buckets, in seconds.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """
+    Count, sum and bucketed distribution of observed values.
+    """
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the buckets, as Prometheus' histogram_quantile does.
+
+        Parameters:
+            q (float): Quantile between 0 and 1, e.g. 0.95.
+
+        Returns:
+            float: The estimate, or None if nothing was observed.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': {str(bound): count for bound, count in zip(self.buckets + ('+Inf',), self.counts)}
+        }
+
+
+class Metrics:
+    """
+    Thread safe counters and histograms of one bot session.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initializes Metrics object.
+
+        Parameters:
+            buckets (tuple): Upper bounds of the histogram buckets, in seconds. Defaults to DEFAULT_BUCKETS.
+        """
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        """
+        Increment a counter.
+
+        Parameters:
+            name (str): Counter name, e.g. 'webdriver_commands'.
+            value (float): Increment. Default is 1.
+            **labels: Label values of the counter, e.g. command='findElements'.
+
+        Returns:
+            None
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """
+        Record a value, usually a duration in seconds, in a histogram.
+
+        Parameters:
+            name (str): Histogram name, e.g. 'tweet_extraction_seconds'.
+            value (float): The value.
+            **labels: Label values of the histogram.
+
+        Returns:
+            None
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, name):
+        """
+        Time a block of code into the 'span_seconds' histogram, and count its errors in 'span_errors'.
+
+        Parameters:
+            name (str): Span name, e.g. 'login'.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.count('span_errors', span=name, error=type(e).__name__)
+            raise
+        finally:
+            self.observe('span_seconds', time.perf_counter() - start, span=name)
+
+    def reset(self):
+        """
+        Drop every counter and histogram.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: 'counters' and 'histograms', each a list of dicts with 'name', 'labels' and their values.
+        """
+        with self.lock:
+            return {
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                'histograms': [{'name': name, 'labels': dict(labels), **histogram.as_dict()}
+                               for (name, labels), histogram in sorted(self.histograms.items())]
+            }
+
+    def to_json(self, path=None):
+        """
+        Export the metrics as JSON.
+
+        Parameters:
+            path (str): Optional. File the JSON is written to.
+
+        Returns:
+            str: The JSON document.
+        """
+        document = json.dumps(self.as_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as file:
+                file.write(document)
+        return document
+
+    def to_prometheus(self, prefix='twitterbot', **extra_labels):
+        """
+        Export the metrics in the Prometheus text exposition format.
+
+        Parameters:
+            prefix (str): Prefix of every metric name. Defaults to 'twitterbot'.
+            **extra_labels: Labels added to every sample, e.g. account='user1'.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f'{prefix}_{name}_total'
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{format_labels({**extra_labels, **dict(labels)})} {value}')
+        for (name, labels), histogram in histograms:
+            metric = f'{prefix}_{name}'
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} histogram')
+            labels = {**extra_labels, **dict(labels)}
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{format_labels({**labels, "le": bound})} {cumulative}')
+            lines.append(f'{metric}_sum{format_labels(labels)} {histogram.sum}')
+            lines.append(f'{metric}_count{format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    @contextmanager
+    def profile(self, path=None, engine='cprofile'):
+        """
+        Profile the code run inside the block.
+
+        Parameters:
+            path (str): Optional. File the profile is written to: cProfile stats, or an HTML report for pyinstrument.
+                If not given, a summary is printed.
+            engine (str): 'cprofile' or 'pyinstrument'. Defaults to 'cprofile'.
+
+        Raises:
+            ImportError: If engine is 'pyinstrument' and pyinstrument is not installed.
+        """
+        if engine == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ImportError("pyinstrument is required for engine='pyinstrument': pip install pyinstrument")
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield profiler
+            finally:
+                profiler.stop()
+                if path is None:
+                    print(profiler.output_text())
+                else:
+                    with open(path, 'w') as file:
+                        file.write(profiler.output_html())
+            return
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            if path is None:
+                profiler.print_stats('cumulative')
+            else:
+                profiler.dump_stats(path)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{str(value)}"' for name, value in labels.items())
+    return '{' + pairs + '}'
+
+
+def timed(name=None):
+    """
+    Decorator running a BotFunctions method inside a span of the bot's metrics.
+
+    Coroutine methods, e.g. of async_bot.AsyncBot, are timed from their first step until they return.
+
+    Parameters:
+        name (str): Optional. Span name. Defaults to the method name.
+    """
+    def decorator(method):
+        span_name = name or method.__name__
+
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                with self.metrics.span(span_name):
+                    return await method(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.span(span_name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_driver(driver, metrics):
+    """
+    Count and time every WebDriver round trip of a driver.
+
+    Every WebDriver command, including the ones sent by WebElements, goes through driver.execute, which
+    is wrapped to record the 'webdriver_commands' counter and the 'webdriver_command_seconds' histogram,
+    labelled by command. Instrumenting a driver twice has no effect.
+
+    Parameters:
+        driver: WebDriver instance, or any driver exposing execute(command, params).
+        metrics (Metrics): Where the round trips are recorded.
+
+    Returns:
+        The driver.
+    """
+    execute = getattr(driver, 'execute', None)
+    if execute is None or getattr(execute, 'instrumented', False):
+        return driver
+
+    @functools.wraps(execute)
+    def instrumented_execute(command, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return execute(command, *args, **kwargs)
+        finally:
+            metrics.count('webdriver_commands', command=command)
+            metrics.observe('webdriver_command_seconds', time.perf_counter() - start, command=command)
+
+    instrumented_execute.instrumented = True
+    driver.execute = instrumented_execute
+    return driver
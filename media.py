@@ -0,0 +1,444 @@
+"""
+Content-addressed download of the media of scraped tweets, in background threads.
+
+MediaDownloader implements the sink interface (write/close), so it can be attached to a bot. Writing rows
+only queues their media URLs, so the scrape loop never waits for a download:
+
+    downloader = MediaDownloader('media')
+    bot.attach_sink(downloader, 'tweets')
+    bot.harvest_timeline(max_tweets=500)
+    bot.close_sinks()  # waits for the queued downloads
+
+Worker threads share one pooled urllib3 client. Each host gets at most per_host downloads at once, and
+failed requests are retried with backoff. Every file is stored under the SHA-256 of its content, as
+<directory>/<ab>/<cd>/<sha256><extension>. The same image posted by many tweets is kept once, and a URL
+already downloaded is not fetched again. An SQLite index in <directory>/index.sqlite maps every tweet to
+the hashes of its media:
+
+    downloader.media_of('1790000000000000000')
+"""
+from collections import Counter
+from datetime import datetime, timezone
+import hashlib
+import mimetypes
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import urllib3
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS media (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    content_type TEXT,
+    first_url TEXT,
+    downloaded TEXT
+);
+
+CREATE TABLE IF NOT EXISTS media_urls (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tweet_media (
+    tweet_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (tweet_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tweet_media_sha256 ON tweet_media (sha256);
+
+CREATE TABLE IF NOT EXISTS media_failures (
+    url TEXT PRIMARY KEY,
+    error TEXT,
+    failed TEXT
+);
+'''
+
+# Responses retried on top of connection errors.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class MediaIndex:
+    """
+    SQLite index of the downloaded files, the URLs they were downloaded from and the tweets showing them.
+    """
+    def __init__(self, path):
+        """
+        Initializes MediaIndex object.
+
+        Parameters:
+            path (str): Path of the SQLite database file.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def hash_of(self, url):
+        """
+        Returns:
+            str: SHA-256 of the file downloaded from the URL, or None if it was never downloaded.
+        """
+        with self.lock:
+            row = self.connection.execute('SELECT sha256 FROM media_urls WHERE url = ?', (url,)).fetchone()
+        return row['sha256'] if row else None
+
+    def add(self, url, sha256, path, size, content_type):
+        """
+        Record a downloaded file and the URL it came from.
+
+        Returns:
+            bool: True if the content is new, False if the same file was already downloaded from another URL.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                'INSERT OR IGNORE INTO media (sha256, path, size, content_type, first_url, downloaded) '
+                'VALUES (?, ?, ?, ?, ?, ?)', (sha256, path, size, content_type, url, now))
+            self.connection.execute('INSERT OR REPLACE INTO media_urls (url, sha256) VALUES (?, ?)', (url, sha256))
+            self.connection.execute('DELETE FROM media_failures WHERE url = ?', (url,))
+            return cursor.rowcount == 1
+
+    def link(self, links):
+        """
+        Record the media of tweets.
+
+        Parameters:
+            links (list): (tweet_id, position, url, sha256) tuples.
+
+        Returns:
+            None
+        """
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO tweet_media (tweet_id, position, url, sha256) VALUES (?, ?, ?, ?)', links)
+
+    def fail(self, url, error):
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO media_failures (url, error, failed) VALUES (?, ?, ?)',
+                                    (url, str(error), datetime.now(timezone.utc).isoformat()))
+
+    def media_of(self, tweet_id):
+        """
+        Returns:
+            list: Media of a tweet in display order, as dictionaries with url, sha256, path, size and content_type.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT tweet_media.url, media.sha256, media.path, media.size, media.content_type '
+                'FROM tweet_media JOIN media ON media.sha256 = tweet_media.sha256 '
+                'WHERE tweet_media.tweet_id = ? ORDER BY tweet_media.position', (str(tweet_id),)).fetchall()
+        return [dict(row) for row in rows]
+
+    def tweets_with(self, sha256):
+        """
+        Returns:
+            list: IDs of the tweets showing the file with this hash.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT DISTINCT tweet_id FROM tweet_media WHERE sha256 = ? ORDER BY tweet_id', (sha256,)).fetchall()
+        return [row['tweet_id'] for row in rows]
+
+    def failures(self):
+        """
+        Returns:
+            list: URLs whose last download failed, as dictionaries with url, error and failed (ISO datetime).
+        """
+        with self.lock:
+            rows = self.connection.execute('SELECT url, error, failed FROM media_failures ORDER BY failed').fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class MediaDownloader:
+    """
+    A background queue downloading the media of tweet rows into a content-addressed directory.
+    """
+    def __init__(self, directory='media', workers=8, per_host=4, retries=3, backoff=0.5, timeout=30.0,
+                 max_queue=0, pool=None, metrics=None):
+        """
+        Initializes MediaDownloader object and starts its worker threads.
+
+        Parameters:
+            directory (str): Directory of the files and of index.sqlite. Defaults to 'media'.
+            workers (int): Number of download threads. Default is 8.
+            per_host (int): Maximum number of downloads from one host at once. Default is 4.
+            retries (int): Retries of a failed request, on connection errors and RETRY_STATUSES. Default is 3.
+            backoff (float): Backoff factor between retries, in seconds, doubled after every retry. Default is 0.5.
+            timeout (float): Connect and read timeout of a request, in seconds. Default is 30.
+            max_queue (int): Maximum number of queued downloads, 0 for no limit. When the queue is full, new URLs
+                are dropped and counted instead of blocking the scrape. Default is 0.
+            pool (urllib3.PoolManager): Optional. HTTP client shared by the workers. Defaults to a PoolManager
+                keeping per_host connections per host.
+            metrics (Metrics): Optional. Where download durations and outcomes are recorded, see instrumentation.py.
+        """
+        self.directory = directory
+        self.per_host = per_host
+        self.timeout = urllib3.Timeout(connect=timeout, read=timeout)
+        self.retries = urllib3.Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                                     allowed_methods=['GET'], raise_on_status=True)
+        self.pool = pool if pool is not None else urllib3.PoolManager(num_pools=64, maxsize=per_host, block=True)
+        self.metrics = metrics
+        os.makedirs(directory, exist_ok=True)
+        self.index = MediaIndex(os.path.join(directory, 'index.sqlite'))
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        # URL being downloaded mapped to the (tweet_id, position) of every tweet waiting for it
+        self.pending = {}
+        self.host_slots = {}
+        self.counts = Counter()
+        self.closed = False
+        self.threads = [threading.Thread(target=self.work, name=f'media-{number}', daemon=True)
+                        for number in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def write(self, records):
+        """
+        Queue the media of tweet rows. Never blocks on the network.
+
+        Parameters:
+            records (list or DataFrame): Tweet rows, as produced by BotFunctions. Rows without a tweet ID or
+                without a media_links list are skipped.
+
+        Returns:
+            None
+        """
+        if hasattr(records, 'to_dict'):
+            records = records.to_dict('records')
+        for record in records:
+            tweet_id = record.get('tweet_id', 'NA')
+            media_links = record.get('media_links')
+            if tweet_id in ('NA', None) or not isinstance(media_links, list):
+                continue
+            for position, url in enumerate(media_links):
+                if url:
+                    self.submit(str(tweet_id), position, url)
+
+    def submit(self, tweet_id, position, url):
+        """
+        Queue the download of one media URL of a tweet.
+
+        A URL already downloaded is only linked to the tweet, and a URL already queued is downloaded once for
+        every tweet waiting for it.
+
+        Parameters:
+            tweet_id (str): ID of the tweet.
+            position (int): Position of the media in the tweet.
+            url (str): URL of the media.
+
+        Returns:
+            None
+        """
+        sha256 = self.index.hash_of(url)
+        if sha256 is not None:
+            self.index.link([(tweet_id, position, url, sha256)])
+            self.count('cached')
+            return
+        with self.lock:
+            coalesced = url in self.pending
+            self.pending.setdefault(url, []).append((tweet_id, position))
+        if coalesced:
+            self.count('coalesced')
+            return
+        try:
+            self.queue.put_nowait(url)
+        except queue.Full:
+            with self.lock:
+                self.pending.pop(url, None)
+            self.count('dropped')
+            return
+        self.count('queued')
+
+    def work(self):
+        while True:
+            url = self.queue.get()
+            try:
+                if url is None:
+                    return
+                self.download(url)
+            finally:
+                self.queue.task_done()
+
+    def slot(self, host):
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_slots[host]
+
+    def download(self, url):
+        """
+        Download a queued URL, store it under its hash and link it to the tweets waiting for it.
+
+        Failures are recorded in the index, see MediaIndex.failures, and never raised.
+
+        Parameters:
+            url (str): URL of the media.
+
+        Returns:
+            str: SHA-256 of the file, or None if the download failed.
+        """
+        start = time.perf_counter()
+        sha256 = None
+        try:
+            with self.slot(urlsplit(url).netloc):
+                sha256, path, size, content_type = self.fetch(url)
+            new = self.index.add(url, sha256, path, size, content_type)
+            self.count('downloaded' if new else 'duplicate')
+            self.count('bytes', size)
+        except (urllib3.exceptions.HTTPError, OSError) as e:
+            self.index.fail(url, e)
+            self.count('failed')
+        finally:
+            with self.lock:
+                waiting = self.pending.pop(url, [])
+            if sha256 is not None:
+                self.index.link([(tweet_id, position, url, sha256) for tweet_id, position in waiting])
+            if self.metrics is not None:
+                self.metrics.observe('media_download_seconds', time.perf_counter() - start,
+                                     outcome='ok' if sha256 else 'failed')
+        return sha256
+
+    def fetch(self, url):
+        """
+        Stream a URL into a temporary file while hashing it, then move the file to its content address.
+
+        Parameters:
+            url (str): URL of the media.
+
+        Returns:
+            tuple: sha256, path relative to the directory, size in bytes and content type.
+
+        Raises:
+            urllib3.exceptions.HTTPError: If the request still fails after the retries.
+            OSError: If the file cannot be written.
+        """
+        response = self.pool.request('GET', url, preload_content=False, retries=self.retries, timeout=self.timeout)
+        try:
+            if response.status >= 400:
+                raise urllib3.exceptions.HTTPError(f'{url} returned HTTP {response.status}')
+            content_type = (response.headers.get('Content-Type') or '').split(';')[0].strip() or None
+            digest = hashlib.sha256()
+            size = 0
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.part')
+            try:
+                with os.fdopen(handle, 'wb') as file:
+                    for chunk in response.stream(64 * 1024):
+                        digest.update(chunk)
+                        file.write(chunk)
+                        size += len(chunk)
+                sha256 = digest.hexdigest()
+                path = os.path.join(sha256[:2], sha256[2:4], sha256 + self.extension(url, content_type))
+                target = os.path.join(self.directory, path)
+                if os.path.exists(target):
+                    os.remove(temporary)
+                else:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(temporary, target)
+            except BaseException:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                raise
+        finally:
+            response.release_conn()
+        return sha256, path, size, content_type
+
+    @staticmethod
+    def extension(url, content_type):
+        """
+        File extension of a media, from its content type, else from its URL or its format query parameter.
+
+        Returns:
+            str: The extension with its dot, e.g. '.jpg', or '.bin' if unknown.
+        """
+        extension = mimetypes.guess_extension(content_type) if content_type else None
+        if extension is None:
+            parts = urlsplit(url)
+            extension = os.path.splitext(parts.path)[1] or None
+            for parameter in parts.query.split('&'):
+                if parameter.startswith('format='):
+                    extension = '.' + parameter[len('format='):]
+        return {'.jpe': '.jpg', '.jpeg': '.jpg'}.get(extension, extension or '.bin')
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counts[name] += value
+        if self.metrics is not None and name != 'bytes':
+            self.metrics.count('media_downloads', value, outcome=name)
+
+    def media_of(self, tweet_id):
+        """
+        Media of a tweet downloaded so far, see MediaIndex.media_of. Paths are made relative to the current
+        directory.
+
+        Parameters:
+            tweet_id (str): ID of the tweet.
+
+        Returns:
+            list: Dictionaries with url, sha256, path, size and content_type.
+        """
+        media = self.index.media_of(tweet_id)
+        for item in media:
+            item['path'] = os.path.join(self.directory, item['path'])
+        return media
+
+    def stats(self):
+        """
+        Returns:
+            dict: Number of URLs 'queued', 'downloaded', already stored under another URL ('duplicate'), 'cached'
+                from an earlier download, 'coalesced' with a queued download, 'failed' and 'dropped', the
+                'bytes' downloaded and the 'backlog' of queued downloads.
+        """
+        with self.lock:
+            stats = {name: self.counts[name] for name in ('queued', 'downloaded', 'duplicate', 'cached', 'coalesced',
+                                                          'failed', 'dropped', 'bytes')}
+        stats['backlog'] = self.queue.unfinished_tasks
+        return stats
+
+    def flush(self):
+        """
+        Wait until every queued download is finished.
+
+        Returns:
+            None
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Finish the queued downloads, stop the workers and close the index.
+
+        Returns:
+            None
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.index.close()
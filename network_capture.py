@@ -0,0 +1,247 @@
+"""
+Extraction backend reading the JSON responses Twitter's web app fetches, instead of the rendered DOM.
+
+Responses are captured from the Chrome/Edge performance log, so the driver has to be started with
+the 'goog:loggingPrefs' capability (TwitterBot's capture_network launch option). Captured responses can
+be recorded to a JSONL file and replayed offline:
+
+    python network_capture.py replay benchmarks/fixtures/home_timeline_responses.jsonl
+"""
+from datetime import datetime
+import json
+import sys
+
+from selenium.common.exceptions import WebDriverException
+
+from errors import FailureCounters, classify
+
+# Responses parsed for tweets and trends: GraphQL timelines (home, profile, search, explore) and the legacy guide.
+CAPTURED_URL_PATTERNS = ('/graphql/', '/i/api/2/guide.json')
+
+DATETIME_FORMAT = '%H:%M:%S %d-%m-%Y %z'
+
+
+class NetworkCapture:
+    """
+    Collects the JSON bodies of the API responses received by the browser.
+    """
+    def __init__(self, driver, url_patterns=CAPTURED_URL_PATTERNS, record_to=None, failures=None):
+        """
+        Initializes NetworkCapture object.
+
+        Parameters:
+            driver: WebDriver started with performance logging enabled.
+            url_patterns (tuple): Substrings of the response URLs to capture. Defaults to CAPTURED_URL_PATTERNS.
+            record_to (str): Optional. Path of a JSONL file every captured response is appended to.
+            failures (FailureCounters): Optional. Where responses that could not be read are counted, under
+                'network_capture'. Defaults to a new FailureCounters instance.
+        """
+        self.driver = driver
+        self.url_patterns = url_patterns
+        self.record_to = record_to
+        self.failures = failures if failures is not None else FailureCounters()
+        self.pending = {}
+
+    def poll(self):
+        """
+        Read the performance log entries received since the last poll and fetch the matching response bodies.
+
+        A response whose body is no longer available or is not JSON is skipped and counted in self.failures.
+
+        Returns:
+            list: (url, payload) tuples, payload being the decoded JSON body.
+
+        Raises:
+            WebDriverException: If the performance log cannot be read.
+        """
+        responses = []
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.responseReceived':
+                url = params['response']['url']
+                if any(pattern in url for pattern in self.url_patterns):
+                    self.pending[params['requestId']] = url
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self.pending:
+                url = self.pending.pop(params['requestId'])
+                try:
+                    body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+                    responses.append((url, json.loads(body['body'])))
+                except (WebDriverException, KeyError, ValueError) as e:
+                    self.failures.record('network_capture', classify(e))
+
+        if self.record_to is not None and responses:
+            with open(self.record_to, 'a', encoding='utf-8') as record:
+                for url, payload in responses:
+                    record.write(json.dumps({'url': url, 'payload': payload}) + '\n')
+        return responses
+
+
+def replay_responses(path):
+    """
+    Read responses recorded by NetworkCapture.
+
+    Parameters:
+        path (str): Path of the JSONL recording.
+
+    Returns:
+        list: (url, payload) tuples, as returned by NetworkCapture.poll.
+    """
+    with open(path, encoding='utf-8') as record:
+        return [(line['url'], line['payload']) for line in map(json.loads, record) if line]
+
+
+def iter_objects(node, typename):
+    """
+    Walk a decoded JSON response and yield every object of the given __typename, without descending into it.
+    """
+    if isinstance(node, dict):
+        if node.get('__typename') == typename:
+            yield node
+            return
+        for value in node.values():
+            yield from iter_objects(value, typename)
+    elif isinstance(node, list):
+        for value in node:
+            yield from iter_objects(value, typename)
+
+
+def count_text(value):
+    """
+    Returns:
+        str: A count of the API as a string, like the stats rendered in the DOM, or 'NA' if missing.
+    """
+    return 'NA' if value is None else str(int(value))
+
+
+def tweet_record(tweet, fetch_datetime):
+    """
+    Convert a GraphQL Tweet object into a tweet row with the same keys as BotFunctions.fetch_single_tweet_details.
+
+    Stats are exact counts instead of the abbreviated '1.2K' rendered in the DOM, but strings like them, so rows
+    of both sources can be mixed in one DataFrame. normalize.normalize_tweets turns both into integers.
+
+    Parameters:
+        tweet (dict): Object with __typename 'Tweet'.
+        fetch_datetime (str): Fetch datetime stored in the row.
+
+    Returns:
+        dict: The tweet row.
+    """
+    legacy = tweet['legacy']
+    # Retweets are rendered as the original tweet
+    retweeted = legacy.get('retweeted_status_result', {}).get('result')
+    if retweeted is not None:
+        retweeted = retweeted.get('tweet', retweeted)
+        if 'legacy' in retweeted:
+            return tweet_record(retweeted, fetch_datetime)
+
+    user = tweet['core']['user_results']['result']
+    user_names = {**user.get('legacy', {}), **user.get('core', {})}
+    note = tweet.get('note_tweet', {}).get('note_tweet_results', {}).get('result', {})
+    created_at = datetime.strptime(legacy['created_at'], '%a %b %d %H:%M:%S %z %Y')
+
+    return {
+        'display_name': user_names.get('name', 'NA'),
+        'username': '@' + user_names['screen_name'] if 'screen_name' in user_names else 'NA',
+        'tweet_text': note.get('text', legacy.get('full_text', 'NA')),
+        'reply': count_text(legacy.get('reply_count')),
+        'retweet': count_text(legacy.get('retweet_count')),
+        'like': count_text(legacy.get('favorite_count')),
+        'view': count_text(tweet.get('views', {}).get('count')),
+        'media_links': [media['media_url_https'] for media in legacy.get('extended_entities', {}).get('media', [])],
+        'tweet_datetime': created_at.strftime(DATETIME_FORMAT),
+        'fetch_datetime': fetch_datetime,
+        'tweet_id': tweet.get('rest_id', legacy.get('id_str', 'NA'))
+    }
+
+
+def parse_tweets(payload, fetch_datetime, failures=None):
+    """
+    Extract every tweet of a timeline response.
+
+    Parameters:
+        payload (dict): Decoded JSON body of a GraphQL timeline response.
+        fetch_datetime (str): Fetch datetime stored in the rows.
+        failures (FailureCounters): Optional. Where the tweet objects that could not be read are counted, under
+            'parse_tweets'.
+
+    Returns:
+        list: Tweet rows, see tweet_record. Unexpected tweet objects are skipped.
+    """
+    records = []
+    for tweet in iter_objects(payload, 'Tweet'):
+        try:
+            records.append(tweet_record(tweet, fetch_datetime))
+        except (KeyError, TypeError, ValueError) as e:
+            if failures is not None:
+                failures.record('parse_tweets', classify(e))
+    return records
+
+
+def parse_trends(payload, tab_name, fetch_datetime):
+    """
+    Extract every trend of an explore response, with the same keys as the rows of BotFunctions.explore_tab_data.
+
+    Both GraphQL 'TimelineTrend' objects and the legacy guide.json 'trend' objects are supported.
+
+    Parameters:
+        payload (dict): Decoded JSON body of an explore response.
+        tab_name (str): Explore tab the response was loaded for. Only 'trending' rows have a rank.
+        fetch_datetime (str): Fetch datetime stored in the rows.
+
+    Returns:
+        list: Trend rows.
+    """
+    raw_trends = []
+    for trend in iter_objects(payload, 'TimelineTrend'):
+        metadata = trend.get('trend_metadata', {})
+        raw_trends.append((trend.get('name'), metadata.get('domain_context'), metadata.get('meta_description')))
+
+    def legacy_trends(node):
+        if isinstance(node, dict):
+            if isinstance(node.get('trend'), dict) and 'name' in node['trend']:
+                metadata = node['trend'].get('trendMetadata', {})
+                raw_trends.append((node['trend']['name'], metadata.get('domainContext'), metadata.get('metaDescription')))
+                return
+            for value in node.values():
+                legacy_trends(value)
+        elif isinstance(node, list):
+            for value in node:
+                legacy_trends(value)
+    legacy_trends(payload)
+
+    records = []
+    for rank, (name, domain_context, meta_description) in enumerate(raw_trends, start=1):
+        record = {
+            'trending_in': domain_context or 'Unknown',
+            'tag_or_text': name or 'NA',
+            'posts': meta_description.split()[0] if meta_description else 'NA',
+            'fetch_datetime': fetch_datetime
+        }
+        if tab_name == 'trending':
+            record = {'rank': str(rank), **record}
+        records.append(record)
+    return records
+
+
+def main(argv):
+    if len(argv) != 3 or argv[1] != 'replay':
+        print(__doc__)
+        return 1
+    fetch_datetime = datetime.now().astimezone().strftime(DATETIME_FORMAT)
+    failures = FailureCounters()
+    for url, payload in replay_responses(argv[2]):
+        tweets = parse_tweets(payload, fetch_datetime, failures)
+        trends = parse_trends(payload, 'trending', fetch_datetime)
+        print(f'{url}: {len(tweets)} tweets, {len(trends)} trends')
+        for record in tweets + trends:
+            print('   ', record)
+    skipped = failures.as_dict()['by_operation'].get('parse_tweets', 0)
+    if skipped:
+        print(f'{skipped} unexpected tweet objects skipped')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,123 @@
+"""
+Vectorized normalization of scraped DataFrames.
+
+Stats are scraped as abbreviated strings ('1.2K', '3M', '') and datetimes as '%H:%M:%S %d-%m-%Y %z'
+strings. These functions convert whole columns at once into nullable int64 counts, tz-aware UTC
+datetimes and category/string text columns, which are faster to aggregate and use less memory.
+"""
+import re
+
+import pandas as pd
+
+DATETIME_FORMAT = '%H:%M:%S %d-%m-%Y %z'
+
+COUNT_SUFFIXES = {'': 1, 'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+# An abbreviated count without its thousands separators, or the empty string of a zero count
+COUNT_PATTERN = re.compile(r'^(?:(\d+(?:\.\d+)?)([KMB]?))?$')
+
+
+def parse_count(value):
+    """
+    Convert one abbreviated count like '1.2K', '3M' or '1,234' into an integer, see parse_counts.
+
+    Parameters:
+        value (str or int): The count.
+
+    Returns:
+        int: The count, or None if it is missing or unparsable.
+    """
+    if isinstance(value, int):
+        return value
+    if not isinstance(value, str):
+        return None if pd.isna(value) else round(value)
+    match = COUNT_PATTERN.match(value.strip().replace(',', '').upper())
+    if match is None:
+        return None
+    number, suffix = match.groups()
+    if number is None:
+        return 0
+    return round(float(number) * COUNT_SUFFIXES[suffix])
+
+
+def parse_counts(series):
+    """
+    Convert abbreviated count strings like '1.2K', '3M' or '1,234' into integers.
+
+    An empty string, which Twitter renders for a zero count, becomes 0. Missing or unparsable
+    values ('NA') become <NA>. Counts repeat a lot, so only the distinct values are parsed, and
+    mapped back to the rows with their factorized codes.
+
+    Parameters:
+        series (Series): Counts as strings or numbers.
+
+    Returns:
+        Series: Counts with the nullable 'Int64' dtype.
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = pd.array([parse_count(value) for value in uniques], dtype='Int64')
+    return pd.Series(parsed.take(codes, allow_fill=True), index=series.index, name=series.name)
+
+
+def parse_datetimes(series, datetime_format=DATETIME_FORMAT):
+    """
+    Convert datetime strings into tz-aware UTC datetimes.
+
+    Parameters:
+        series (Series): Datetime strings. Unparsable values ('NA') become NaT.
+        datetime_format (str): Format of the strings. Defaults to the bot's '%H:%M:%S %d-%m-%Y %z'.
+
+    Returns:
+        Series: Datetimes with the 'datetime64[ns, UTC]' dtype.
+    """
+    return pd.to_datetime(series, format=datetime_format, errors='coerce', utc=True)
+
+
+def normalize_tweets(df):
+    """
+    Normalize a tweets DataFrame, see BotFunctions.tweets_df.
+
+    Parameters:
+        df (DataFrame): Tweets with the TWEET_COLUMNS columns.
+
+    Returns:
+        DataFrame: A normalized copy.
+    """
+    df = df.copy()
+    for column in ('reply', 'retweet', 'like', 'view'):
+        if column in df:
+            df[column] = parse_counts(df[column])
+    for column in ('tweet_datetime', 'fetch_datetime'):
+        if column in df:
+            df[column] = parse_datetimes(df[column])
+    for column in ('display_name', 'username'):
+        if column in df:
+            df[column] = df[column].astype('category')
+    for column in ('tweet_text', 'tweet_id'):
+        if column in df:
+            df[column] = df[column].astype('string')
+    return df
+
+
+def normalize_trends(df):
+    """
+    Normalize a trends DataFrame, see BotFunctions.trending_df.
+
+    Parameters:
+        df (DataFrame): Trends of one explore tab.
+
+    Returns:
+        DataFrame: A normalized copy.
+    """
+    df = df.copy()
+    if 'rank' in df:
+        df['rank'] = pd.to_numeric(df['rank'], errors='coerce').astype('Int64')
+    if 'posts' in df:
+        df['posts'] = parse_counts(df['posts'])
+    if 'fetch_datetime' in df:
+        df['fetch_datetime'] = parse_datetimes(df['fetch_datetime'])
+    if 'trending_in' in df:
+        df['trending_in'] = df['trending_in'].astype('category')
+    if 'tag_or_text' in df:
+        df['tag_or_text'] = df['tag_or_text'].astype('string')
+    return df
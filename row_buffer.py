@@ -0,0 +1,127 @@
+import pandas as pd
+
+
+class RowBuffer:
+    """
+    An append-only, column oriented buffer for scraped rows.
+
+    Rows are appended to one Python list per column, which costs O(1) per row instead of copying
+    the whole DataFrame as pd.concat does. Every chunk_size rows the pending lists are converted
+    into a DataFrame chunk, and the chunks are concatenated only once, when to_dataframe is called.
+    """
+    def __init__(self, columns, chunk_size=10000, on_flush=None, keep_flushed=True):
+        """
+        Initializes RowBuffer object.
+
+        Parameters:
+            columns (list): Column names, in output order. Keys missing from a row are stored as 'NA'.
+            chunk_size (int): Number of pending rows converted into a DataFrame chunk at once. Default is 10000.
+            on_flush (callable): Optional. Called with every flushed DataFrame chunk, e.g. to write it to disk.
+            keep_flushed (bool): If False, flushed chunks are dropped after on_flush is called, which keeps
+                memory bounded by chunk_size for long sessions. Default is True.
+        """
+        self.columns = list(columns)
+        self.chunk_size = chunk_size
+        self.on_flush = on_flush
+        self.keep_flushed = keep_flushed
+        self._pending = {column: [] for column in self.columns}
+        self._pending_rows = 0
+        self._chunks = []
+        self._total_rows = 0
+
+    def __len__(self):
+        return self._total_rows
+
+    def append(self, row):
+        """
+        Append a single row.
+
+        Parameters:
+            row (dict): Column name mapped to value.
+
+        Returns:
+            None
+        """
+        for column in self.columns:
+            self._pending[column].append(row.get(column, 'NA'))
+        self._pending_rows += 1
+        self._total_rows += 1
+        if self._pending_rows >= self.chunk_size:
+            self.flush()
+
+    def extend(self, rows):
+        """
+        Append multiple rows.
+
+        Parameters:
+            rows (iterable): An iterable of dictionaries.
+
+        Returns:
+            None
+        """
+        for row in rows:
+            self.append(row)
+
+    def append_dataframe(self, df):
+        """
+        Append an already built DataFrame as a chunk.
+
+        Parameters:
+            df (DataFrame): Rows to append. Columns not known to the buffer are dropped.
+
+        Returns:
+            None
+        """
+        self.flush()
+        chunk = df.reindex(columns=self.columns, fill_value='NA').reset_index(drop=True)
+        self._total_rows += len(chunk)
+        self._store_chunk(chunk)
+
+    def flush(self):
+        """
+        Convert the pending rows into a DataFrame chunk.
+
+        Returns:
+            None
+        """
+        if not self._pending_rows:
+            return
+        chunk = pd.DataFrame(self._pending, columns=self.columns)
+        self._pending = {column: [] for column in self.columns}
+        self._pending_rows = 0
+        self._store_chunk(chunk)
+
+    def _store_chunk(self, chunk):
+        if self.on_flush is not None:
+            self.on_flush(chunk)
+        if self.keep_flushed or self.on_flush is None:
+            self._chunks.append(chunk)
+
+    def to_dataframe(self):
+        """
+        Materialize the buffered rows into a single DataFrame.
+
+        The chunks are concatenated once and replaced by the result, so calling this repeatedly
+        without appending in between is cheap.
+
+        Returns:
+            DataFrame: All the rows held in memory.
+        """
+        self.flush()
+        if not self._chunks:
+            return pd.DataFrame(columns=self.columns)
+        if len(self._chunks) > 1:
+            self._chunks = [pd.concat(self._chunks, ignore_index=True)]
+        return self._chunks[0]
+
+    def clear(self):
+        """
+        Drop every buffered row.
+
+        Returns:
+            None
+        """
+        self._pending = {column: [] for column in self.columns}
+        self._pending_rows = 0
+        self._chunks = []
+        self._total_rows = 0
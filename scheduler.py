@@ -0,0 +1,424 @@
+"""
+Rate limit aware scheduling of scrape jobs across accounts.
+
+Every account gets an AccountLimiter: a token bucket paced scrape steps are taken from, whose rate
+adapts to how Twitter responds. The rate grows additively while jobs succeed and is cut by a factor
+when a rate limit or "Something went wrong" page is detected, followed by a cooldown that doubles with
+every rate limit in a row. The rate climbs back quickly up to 80% of the rate that was limited, then
+slowly, and stays below 90% of it. Only after an hour without rate limit does the limiter probe above
+it again. The Scheduler keeps a priority queue of jobs (profiles, searches, explore
+tabs, ...) and runs the most urgent job whose account can act now.
+
+The bots take a token before every scroll, explore tab step and tweet extraction, see BotFunctions.pace,
+and report rate limits to their limiter from BotFunctions.check_page_state.
+
+    scheduler = Scheduler({'account1': bot1, 'account2': bot2})
+    scheduler.submit('explore_tab_data', 'trending', priority=0)
+    scheduler.submit('harvest_timeline', max_tweets=500, priority=5)
+    scheduler.run()
+
+Clock and sleep are injectable, so pacing can be simulated without waiting, see SimulatedClock.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from errors import BotError, RateLimited
+
+# Tolerance of token counts, so float rounding in refills never leaves a waiter short of a token.
+EPSILON = 1e-9
+
+
+class SimulatedClock:
+    """
+    A clock whose sleep advances the time instantly, to simulate pacing.
+    """
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(seconds, 0)
+
+
+class TokenBucket:
+    """
+    Tokens refilled at a constant rate up to a capacity, each paced action takes one.
+    """
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        """
+        Initializes TokenBucket object.
+
+        Parameters:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens, i.e. the size of a burst. The bucket starts full.
+            clock (callable): Returns the current time in seconds. Defaults to time.monotonic.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, tokens=1):
+        """
+        Seconds until the given number of tokens is available.
+
+        Parameters:
+            tokens (float): Number of tokens. Default is 1.
+
+        Returns:
+            float: 0 if they are available now.
+        """
+        self.refill()
+        if self.tokens + EPSILON >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def take(self, tokens=1):
+        """
+        Take tokens if they are available.
+
+        Parameters:
+            tokens (float): Number of tokens. Default is 1.
+
+        Returns:
+            bool: True if the tokens were taken.
+        """
+        self.refill()
+        if self.tokens + EPSILON >= tokens:
+            self.tokens = max(self.tokens - tokens, 0.0)
+            return True
+        return False
+
+
+class AccountLimiter:
+    """
+    Pacing of one account: a token bucket with an adaptive rate and cooldowns after rate limits.
+    """
+    def __init__(self, rate=0.5, capacity=5, min_rate=0.02, max_rate=2.0, increase=0.005, decrease=0.5,
+                 cooldown=60.0, max_cooldown=900.0, headroom=0.9, probe_after=3600.0, clock=time.monotonic,
+                 sleep=time.sleep):
+        """
+        Initializes AccountLimiter object.
+
+        Parameters:
+            rate (float): Initial number of paced actions per second. Default is 0.5.
+            capacity (float): Burst size. Default is 5.
+            min_rate (float): Lower bound of the rate. Default is 0.02.
+            max_rate (float): Upper bound of the rate. Default is 2.
+            increase (float): Added to the rate after every successful job, a tenth of it once the rate is above
+                80% of the last rate that was limited. Default is 0.005.
+            decrease (float): Factor the rate is multiplied by on a rate limit. Default is 0.5.
+            cooldown (float): Pause after a rate limit, in seconds, doubled for every rate limit in a row. A new lockout
+                starts with the pause the previous one needed, if longer. Default is 60.
+            max_cooldown (float): Upper bound of the pause, in seconds. Default is 900.
+            headroom (float): Fraction of the last rate that was limited the rate climbs back to, at most.
+                Default is 0.9.
+            probe_after (float): Seconds without rate limit after which the last rate that was limited is raised
+                by a tenth of increase per successful job, to probe for a higher rate. Default is 3600.
+            clock (callable): Returns the current time in seconds. Defaults to time.monotonic.
+            sleep (callable): Used to wait for tokens. Defaults to time.sleep.
+        """
+        self.bucket = TokenBucket(rate, capacity, clock)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.sleep = sleep
+        self.blocked_until = clock()
+        self.headroom = headroom
+        self.probe_after = probe_after
+        self.strikes = 0
+        # Pauses of the current lockout, and the total pause the last lockout needed
+        self.lockout_pause = 0.0
+        self.learned_cooldown = cooldown
+        # Last rate that was limited, None until the first rate limit
+        self.ceiling = None
+        self.limited_at = None
+        self.lock = threading.Lock()
+
+        self.acquired = 0
+        self.waited = 0.0
+        self.rate_limits = 0
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def wait_time(self, tokens=1):
+        """
+        Seconds until the account can take the given number of tokens.
+
+        Parameters:
+            tokens (float): Number of tokens. Default is 1.
+
+        Returns:
+            float: 0 if it can act now.
+        """
+        with self.lock:
+            return max(self.blocked_until - self.clock(), self.bucket.wait_time(tokens), 0.0)
+
+    def acquire(self, tokens=1):
+        """
+        Wait until the tokens are available, and take them.
+
+        Parameters:
+            tokens (float): Number of tokens. Default is 1.
+
+        Returns:
+            float: Seconds waited.
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                wait = max(self.blocked_until - self.clock(), 0.0)
+                if wait == 0 and self.bucket.take(tokens):
+                    self.acquired += 1
+                    self.waited += waited
+                    return waited
+                if wait == 0:
+                    wait = self.bucket.wait_time(tokens)
+            self.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        """
+        Raise the rate additively after a job finished without rate limit.
+
+        The rate stays below headroom times the last rate that was limited. That ceiling is only raised once
+        no rate limit was hit for probe_after seconds.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if self.strikes:
+                self.learned_cooldown = max(self.cooldown, self.lockout_pause)
+            self.strikes = 0
+            self.bucket.refill()
+            rate, limit = self.bucket.rate, self.max_rate
+            if self.ceiling is not None:
+                if self.clock() - self.limited_at >= self.probe_after:
+                    self.ceiling = min(self.max_rate, self.ceiling + self.increase / 10)
+                limit = min(limit, self.ceiling * self.headroom)
+            # Close to the last rate that was limited, climb slowly
+            step = self.increase
+            if self.ceiling is not None and rate + self.increase > self.ceiling * 0.8:
+                step = self.increase / 10
+            self.bucket.rate = max(rate, min(limit, rate + step))
+
+    def on_rate_limited(self):
+        """
+        Cut the rate and pause the account after a rate limit was detected.
+
+        Returns:
+            float: Seconds the account is paused for.
+        """
+        with self.lock:
+            self.rate_limits += 1
+            self.bucket.refill()
+            if self.strikes == 0:
+                # Rate limits hit again before any job succeeded belong to the same lockout, cut the rate once
+                self.ceiling = self.bucket.rate
+                self.bucket.rate = max(self.min_rate, self.bucket.rate * self.decrease)
+                self.lockout_pause = 0.0
+            self.limited_at = self.clock()
+            self.bucket.tokens = 0
+            pause = min(self.learned_cooldown * 2 ** self.strikes, self.max_cooldown)
+            self.lockout_pause += pause
+            self.strikes += 1
+            self.blocked_until = self.clock() + pause
+            return pause
+
+    def stats(self):
+        """
+        Returns:
+            dict: Current 'rate', and the 'acquired', 'waited' (seconds) and 'rate_limits' totals.
+        """
+        with self.lock:
+            return {'rate': self.bucket.rate, 'acquired': self.acquired, 'waited': self.waited,
+                    'rate_limits': self.rate_limits}
+
+
+class ScrapeJob:
+    """
+    A queued scrape job.
+    """
+    def __init__(self, job, args, kwargs, priority, account, cost):
+        """
+        Initializes ScrapeJob object.
+
+        Parameters:
+            job (str or callable): Name of a BotFunctions method, or a callable taking the bot as its first argument.
+            args (tuple), kwargs (dict): Passed to the job.
+            priority (int): Lower runs first.
+            account (str): Account the job must run on, or None for any account.
+            cost (float): Tokens taken before the job starts.
+        """
+        self.job = job
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.account = account
+        self.cost = cost
+        self.attempts = 0
+        self.done = False
+        self.result = None
+        self.error = None
+        self.ran_on = None
+
+    def __repr__(self):
+        name = self.job if isinstance(self.job, str) else getattr(self.job, '__name__', repr(self.job))
+        return f'ScrapeJob({name!r}, priority={self.priority}, account={self.account!r})'
+
+
+class Scheduler:
+    """
+    Priority queue of scrape jobs, run on the accounts whose limiter lets them act soonest.
+    """
+    def __init__(self, bots, limiter_factory=AccountLimiter, clock=time.monotonic, sleep=time.sleep, max_attempts=3):
+        """
+        Initializes Scheduler object.
+
+        Parameters:
+            bots (dict): Account name mapped to its BotFunctions instance. Each bot's limiter is set to the
+                account's AccountLimiter.
+            limiter_factory (callable): Called with clock and sleep keywords to create an account's limiter.
+                Defaults to AccountLimiter.
+            clock (callable): Returns the current time in seconds. Defaults to time.monotonic.
+            sleep (callable): Used to wait until an account can act. Defaults to time.sleep.
+            max_attempts (int): Number of times a rate limited job is run before it fails. Default is 3.
+        """
+        self.bots = bots
+        self.clock = clock
+        self.sleep = sleep
+        self.max_attempts = max_attempts
+        self.limiters = {}
+        for account, bot in bots.items():
+            self.limiters[account] = limiter_factory(clock=clock, sleep=sleep)
+            bot.limiter = self.limiters[account]
+        self.queue = []
+        self.counter = itertools.count()
+        self.finished = []
+
+    def submit(self, job, *args, priority=10, account=None, cost=1, **kwargs):
+        """
+        Queue a scrape job.
+
+        Parameters:
+            job (str or callable): Name of a BotFunctions method, e.g. 'explore_tab_data', or a callable taking
+                the bot as its first argument.
+            priority (int): Lower runs first. Default is 10.
+            account (str): Optional. Run the job on this account only.
+            cost (float): Tokens taken before the job starts. Default is 1.
+            *args, **kwargs: Passed to the job.
+
+        Returns:
+            ScrapeJob: The queued job, holding its result once run.
+        """
+        scrape_job = ScrapeJob(job, args, kwargs, priority, account, cost)
+        self.push(scrape_job)
+        return scrape_job
+
+    def push(self, scrape_job):
+        heapq.heappush(self.queue, (scrape_job.priority, next(self.counter), scrape_job))
+
+    def next_job(self):
+        """
+        Pick the job to run next: the most urgent job one of its accounts can run now.
+
+        Returns:
+            tuple: (ScrapeJob, account, wait), wait being the seconds until the account can act, 0 if it can now.
+                If no account can act now, the job whose account is ready soonest is picked.
+        """
+        best = None
+        for priority, order, scrape_job in sorted(self.queue):
+            accounts = [scrape_job.account] if scrape_job.account is not None else list(self.limiters)
+            for account in accounts:
+                wait = self.limiters[account].wait_time(scrape_job.cost)
+                if wait == 0:
+                    return scrape_job, account, 0.0
+                if best is None or wait < best[2]:
+                    best = (scrape_job, account, wait)
+        return best
+
+    def run_next(self):
+        """
+        Run the next job, waiting until its account can act.
+
+        Returns:
+            ScrapeJob: The job that was run, or None if the queue is empty.
+        """
+        if not self.queue:
+            return None
+        scrape_job, account, wait = self.next_job()
+        self.queue = [entry for entry in self.queue if entry[2] is not scrape_job]
+        heapq.heapify(self.queue)
+        if wait > 0:
+            self.sleep(wait)
+        self.run_job(scrape_job, account)
+        return scrape_job
+
+    def run_job(self, scrape_job, account):
+        bot = self.bots[account]
+        limiter = self.limiters[account]
+        scrape_job.attempts += 1
+        scrape_job.ran_on = account
+        limiter.acquire(scrape_job.cost)
+        try:
+            if isinstance(scrape_job.job, str):
+                scrape_job.result = getattr(bot, scrape_job.job)(*scrape_job.args, **scrape_job.kwargs)
+            else:
+                scrape_job.result = scrape_job.job(bot, *scrape_job.args, **scrape_job.kwargs)
+        except RateLimited as e:
+            # The bot already reported the rate limit to its limiter, see BotFunctions.check_page_state
+            if scrape_job.attempts < self.max_attempts:
+                self.push(scrape_job)
+                return
+            scrape_job.error = e
+        except (BotError, WebDriverException) as e:
+            # Logged out sessions, selectors that timed out and crashed drivers fail the job, not the scheduler
+            scrape_job.error = e
+        else:
+            limiter.on_success()
+        scrape_job.done = True
+        self.finished.append(scrape_job)
+
+    def run(self, max_seconds=None):
+        """
+        Run queued jobs until the queue is empty or max_seconds have passed.
+
+        Parameters:
+            max_seconds (float): Optional. Stop starting new jobs after this many seconds.
+
+        Returns:
+            list: The jobs finished by this call, with their result or error.
+        """
+        start = self.clock()
+        finished = len(self.finished)
+        while self.queue:
+            if max_seconds is not None and self.clock() - start >= max_seconds:
+                break
+            self.run_next()
+        return self.finished[finished:]
+
+    def stats(self):
+        """
+        Returns:
+            dict: Account name mapped to its limiter stats, see AccountLimiter.stats.
+        """
+        return {account: limiter.stats() for account, limiter in self.limiters.items()}
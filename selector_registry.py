@@ -0,0 +1,141 @@
+"""
+Registry of the selectors used to locate Twitter's UI elements, with fallbacks and hit-rate telemetry.
+
+Each logical element (e.g. 'tweet_text', 'login_button') has an ordered list of candidate
+(by, value) selectors. A lookup probes every candidate with a non-blocking find_elements call until
+one matches, and remembers it as the winner, so later lookups in the same session try it first.
+When markup changes and the winner stops matching, the other candidates are probed right away
+instead of waiting out the whole timeout on a broken selector.
+"""
+import threading
+import time
+
+
+class SelectorStats:
+    """
+    Hit, miss and latency counters of one selector.
+    """
+    __slots__ = ('hits', 'misses', 'probes', 'latency')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.probes = 0
+        self.latency = 0.0
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'probes': self.probes,
+            'latency': self.latency,
+            'mean_latency': self.latency / self.probes if self.probes else 0.0
+        }
+
+
+class SelectorRegistry:
+    """
+    Ordered candidate selectors per logical element, with the winning candidate remembered per session.
+    """
+    def __init__(self, candidates, probe_interval=0.25):
+        """
+        Initializes SelectorRegistry object.
+
+        Parameters:
+            candidates (dict): Logical element name mapped to a list of (by, value) selectors, most likely first.
+            probe_interval (float): Seconds between two rounds of probes while waiting. Default is 0.25.
+        """
+        self.candidates = {name: list(selectors) for name, selectors in candidates.items()}
+        self.probe_interval = probe_interval
+        self.winners = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def session(self):
+        """
+        Create a registry with the same candidates but no winners and no counters, for one bot session.
+
+        Returns:
+            SelectorRegistry: The new registry.
+        """
+        return SelectorRegistry(self.candidates, self.probe_interval)
+
+    def ordered(self, name):
+        """
+        Candidates of an element, the session's winner first.
+
+        Parameters:
+            name (str): Logical element name.
+
+        Returns:
+            list: (by, value) selectors.
+        """
+        selectors = self.candidates[name]
+        winner = self.winners.get(name)
+        if winner is None:
+            return selectors
+        return [winner] + [selector for selector in selectors if selector != winner]
+
+    def find(self, context, name, wait_time=0, find_all=False):
+        """
+        Locate an element by its logical name, waiting up to wait_time for any candidate to match.
+
+        Parameters:
+            context: WebDriver or WebElement to search from.
+            name (str): Logical element name.
+            wait_time (float): Maximum time to wait, in seconds. With 0 every candidate is probed once. Default is 0.
+            find_all (bool): If True, return all the elements matched by the winning candidate. Default is False.
+
+        Returns:
+            WebElement or List[WebElement]: The located element(s), or None if no candidate matched in time.
+        """
+        deadline = time.monotonic() + wait_time
+        missed = []
+        while True:
+            for selector in self.ordered(name):
+                start = time.monotonic()
+                elements = context.find_elements(*selector)
+                with self.lock:
+                    stats = self.counters(name, selector)
+                    stats.probes += 1
+                    stats.latency += time.monotonic() - start
+                if elements:
+                    with self.lock:
+                        stats.hits += 1
+                        for missed_selector in missed:
+                            self.counters(name, missed_selector).misses += 1
+                        self.winners[name] = selector
+                    return elements if find_all else elements[0]
+                if selector not in missed:
+                    missed.append(selector)
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(min(self.probe_interval, max(deadline - time.monotonic(), 0)))
+
+        with self.lock:
+            for selector in missed:
+                self.counters(name, selector).misses += 1
+        return None
+
+    def counters(self, name, selector):
+        key = (name, selector)
+        if key not in self.stats:
+            self.stats[key] = SelectorStats()
+        return self.stats[key]
+
+    def report(self):
+        """
+        Counters of every selector probed in this session.
+
+        Returns:
+            dict: Logical element name mapped to a dict of 'by=value' selector strings mapped to their counters,
+                and the current winner under 'winner'.
+        """
+        report = {}
+        with self.lock:
+            for (name, (by, value)), stats in self.stats.items():
+                entry = report.setdefault(name, {'winner': None, 'selectors': {}})
+                entry['selectors'][f'{by}={value}'] = stats.as_dict()
+            for name, (by, value) in self.winners.items():
+                report.setdefault(name, {'winner': None, 'selectors': {}})['winner'] = f'{by}={value}'
+        return report
@@ -0,0 +1,370 @@
+"""
+Session bootstrap that reuses an account's saved cookies to skip the login flow.
+
+Cookies are stored in one pickle file per account, so loading an account only reads that account's
+cookies. The saved cookies are checked for expiry locally, before the browser is touched. Valid cookies
+are injected with a single CDP Network.setCookies call before the first navigation, so the first page
+load is already logged in. This replaces loading the page, adding the cookies one add_cookie round trip
+at a time, and reloading. A probe script then confirms the logged in state. The full login flow only
+runs when the cookies are missing, expired or rejected.
+
+    manager = SessionManager(bot)
+    report = manager.start(password=lambda: input('Enter password: '))
+"""
+import os
+import pickle
+import re
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from errors import LoggedOut, RateLimited, SelectorTimeout
+
+# Cookies without which Twitter treats the session as logged out.
+AUTH_COOKIES = ('auth_token', 'ct0')
+
+# Resolves with 'logged_in', 'logged_out', 'rate_limited' or 'timeout' as soon as the page shows one of them.
+SESSION_PROBE_SCRIPT = '''
+    const timeoutMs = arguments[0];
+    const done = arguments[arguments.length - 1];
+    function state() {
+        if (document.querySelector('a[data-testid="AppTabBar_Home_Link"], [data-testid="SideNav_AccountSwitcher_Button"]')) {
+            return 'logged_in';
+        }
+        if (/^\\/(i\\/flow\\/)?login/.test(location.pathname) || document.querySelector('a[data-testid="loginButton"]')) {
+            return 'logged_out';
+        }
+        const text = document.body ? document.body.innerText : '';
+        if (/Rate limit exceeded|Something went wrong\\. Try reloading/i.test(text)) {
+            return 'rate_limited';
+        }
+        return null;
+    }
+    const found = state();
+    if (found !== null) {
+        done(found);
+        return;
+    }
+    let finished = false;
+    const observer = new MutationObserver(function () {
+        const found = state();
+        if (found !== null) {
+            finish(found);
+        }
+    });
+    const timer = setTimeout(function () { finish('timeout'); }, timeoutMs);
+    function finish(result) {
+        if (finished) {
+            return;
+        }
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        done(result);
+    }
+    observer.observe(document.documentElement, {childList: true, subtree: true});
+'''
+
+
+def cookies_valid(cookies, now=None, required=AUTH_COOKIES, margin=60):
+    """
+    Check locally that the saved cookies still hold an unexpired login.
+
+    Parameters:
+        cookies (list): Cookies as returned by driver.get_cookies().
+        now (float): Optional. Current Unix time. Defaults to time.time().
+        required (tuple): Names of the cookies that must be present. Defaults to AUTH_COOKIES.
+        margin (float): Seconds before its expiry a cookie is already treated as expired. Default is 60.
+
+    Returns:
+        bool: True if every required cookie is present and not about to expire.
+    """
+    if now is None:
+        now = time.time()
+    by_name = {cookie['name']: cookie for cookie in cookies or []}
+    for name in required:
+        cookie = by_name.get(name)
+        if cookie is None:
+            return False
+        expiry = cookie.get('expiry')
+        if expiry is not None and expiry <= now + margin:
+            return False
+    return True
+
+
+def to_cdp_cookie(cookie):
+    """
+    Convert a Selenium cookie dict into a CDP Network.CookieParam.
+
+    Parameters:
+        cookie (dict): Cookie as returned by driver.get_cookies().
+
+    Returns:
+        dict: The cookie in the format expected by Network.setCookies.
+    """
+    domain = cookie.get('domain', '.twitter.com')
+    param = {
+        'name': cookie['name'],
+        'value': cookie['value'],
+        'domain': domain,
+        'path': cookie.get('path', '/'),
+        'secure': cookie.get('secure', False),
+        'httpOnly': cookie.get('httpOnly', False)
+    }
+    if 'expiry' in cookie:
+        param['expires'] = cookie['expiry']
+    if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+        param['sameSite'] = cookie['sameSite']
+    return param
+
+
+def inject_cookies(driver, cookies):
+    """
+    Add cookies to the browser in one CDP call, before any page of their domain is open.
+
+    Parameters:
+        driver: WebDriver instance of a Chromium based browser.
+        cookies (list): Cookies as returned by driver.get_cookies().
+
+    Returns:
+        bool: True if the cookies were set, False if the browser does not support CDP.
+    """
+    try:
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': [to_cdp_cookie(cookie) for cookie in cookies]})
+        return True
+    except (AttributeError, WebDriverException):
+        return False
+
+
+class CookieStore:
+    """
+    Saved cookies, one pickle file per account.
+    """
+    def __init__(self, directory='cookies', legacy_path='cookies.pkl'):
+        """
+        Initializes CookieStore object.
+
+        Parameters:
+            directory (str): Directory of the per account cookie files. Defaults to 'cookies'.
+            legacy_path (str): Optional. Pickle file holding the cookies of every account, as written by earlier
+                versions. An account found only there is moved to its own file on first load. Defaults to 'cookies.pkl'.
+        """
+        self.directory = directory
+        self.legacy_path = legacy_path
+
+    def path(self, username):
+        """
+        Returns:
+            str: Path of the cookie file of the account.
+        """
+        return os.path.join(self.directory, re.sub(r'[^\w.@-]', '_', username) + '.pkl')
+
+    def load(self, username):
+        """
+        Load the saved cookies of an account.
+
+        Parameters:
+            username (str): Account name.
+
+        Returns:
+            list: The cookies, or None if none are saved.
+        """
+        path = self.path(username)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as file:
+                return pickle.load(file)
+        return self.migrate(username)
+
+    def save(self, username, cookies):
+        """
+        Save the cookies of an account, replacing the file atomically.
+
+        Parameters:
+            username (str): Account name.
+            cookies (list): Cookies as returned by driver.get_cookies().
+
+        Returns:
+            None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(username)
+        with open(path + '.tmp', 'wb') as file:
+            pickle.dump(cookies, file)
+        os.replace(path + '.tmp', path)
+
+    def delete(self, username):
+        """
+        Delete the saved cookies of an account.
+
+        Parameters:
+            username (str): Account name.
+
+        Returns:
+            bool: True if cookies were deleted, False if none were saved.
+        """
+        path = self.path(username)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+    def migrate(self, username):
+        """
+        Move the account's cookies from the legacy file holding every account to its own file.
+
+        Parameters:
+            username (str): Account name.
+
+        Returns:
+            list: The cookies, or None if the legacy file has none for the account.
+        """
+        if self.legacy_path is None or not os.path.exists(self.legacy_path) or os.path.getsize(self.legacy_path) == 0:
+            return None
+        with open(self.legacy_path, 'rb') as file:
+            data = pickle.load(file)
+        cookies = data.pop(username, None)
+        if cookies is None:
+            return None
+        self.save(username, cookies)
+        with open(self.legacy_path, 'wb') as file:
+            pickle.dump(data, file)
+        return cookies
+
+
+class SessionManager:
+    """
+    Starts a logged in session for a bot, reusing its saved cookies when they are still valid.
+    """
+    def __init__(self, bot, store=None, home_url='https://twitter.com/home', login_url='https://twitter.com/?lang=en',
+                 probe_timeout=None):
+        """
+        Initializes SessionManager object.
+
+        Parameters:
+            bot (BotFunctions): The bot whose session is started.
+            store (CookieStore): Optional. Where cookies are saved. Defaults to the bot's cookie_store.
+            home_url (str): Page opened with restored cookies. Defaults to 'https://twitter.com/home'.
+            login_url (str): Page the login flow starts from. Defaults to 'https://twitter.com/?lang=en'.
+            probe_timeout (float): Optional. Seconds the probe waits for the page to show its state.
+                Defaults to the bot's 'element' wait timeout.
+        """
+        self.bot = bot
+        self.store = store if store is not None else bot.cookie_store
+        self.home_url = home_url
+        self.login_url = login_url
+        self.probe_timeout = probe_timeout if probe_timeout is not None else bot.wait_timeouts['element']
+        self.history = []
+
+    def probe(self):
+        """
+        Wait until the open page shows whether the session is logged in.
+
+        Returns:
+            str: 'logged_in', 'logged_out', 'rate_limited' or 'timeout'.
+        """
+        driver = self.bot.driver
+        start = time.monotonic()
+        try:
+            driver.set_script_timeout(self.probe_timeout + 5)
+            return driver.execute_async_script(SESSION_PROBE_SCRIPT, int(self.probe_timeout * 1000))
+        finally:
+            self.bot.record_wait('session_probe', self.probe_timeout, time.monotonic() - start)
+
+    def restore(self, cookies):
+        """
+        Add saved cookies to the browser and open the home page, loading it only once when CDP is available.
+
+        Parameters:
+            cookies (list): Cookies as returned by driver.get_cookies().
+
+        Returns:
+            str: How the cookies were added, 'cdp' or 'add_cookie'.
+        """
+        driver = self.bot.driver
+        if inject_cookies(driver, cookies):
+            self.bot.open_website(self.home_url)
+            return 'cdp'
+        # Without CDP, cookies can only be added to the domain of the open page
+        self.bot.open_website(self.home_url)
+        for cookie in cookies:
+            driver.add_cookie(cookie)
+        self.bot.refresh_page()
+        return 'add_cookie'
+
+    def start(self, password=None):
+        """
+        Start a logged in session, warm from saved cookies if possible, cold through the login flow otherwise.
+
+        Only a page showing the session as logged out invalidates the saved cookies. A page that does not show
+        its state in time is reloaded and probed once more, then the start fails with the cookies kept.
+        The cookies of a cold login are saved only once the probe confirms it.
+
+        Parameters:
+            password (str or callable): Optional. Password of the account, or a callable returning it, only called
+                when a login is needed.
+
+        Returns:
+            dict: 'mode' ('warm' or 'cold'), 'cookies' (how they were added, or None), 'rejected' (True if the saved
+                cookies were valid locally but the session was logged out) and 'seconds' (time to a usable session).
+
+        Raises:
+            RateLimited: If the page shows a rate limit.
+            LoggedOut: If a login is needed but no password is given, or the password callable returns None, or the
+                login did not log the session in.
+            SelectorTimeout: If a step of the login form is not found, or the page never shows whether the session
+                is logged in.
+        """
+        username = self.bot.username
+        start = time.monotonic()
+        report = {'mode': 'cold', 'cookies': None, 'rejected': False}
+
+        cookies = self.store.load(username)
+        if cookies and cookies_valid(cookies):
+            report['cookies'] = self.restore(cookies)
+            if self.confirmed_state() == 'logged_in':
+                report['mode'] = 'warm'
+                return self.finish(report, start)
+            report['rejected'] = True
+            self.bot.driver.delete_all_cookies()
+        if cookies is not None:
+            self.store.delete(username)
+
+        if callable(password):
+            password = password()
+        if password is None:
+            raise LoggedOut(f'No valid cookies saved for {username} and no password given.')
+        self.bot.open_website(self.login_url)
+        self.bot.login(password)
+        if self.confirmed_state() != 'logged_in':
+            raise LoggedOut(f'The login of {username} did not log the session in.')
+        self.store.save(username, self.bot.driver.get_cookies())
+        return self.finish(report, start)
+
+    def confirmed_state(self):
+        """
+        Probe the open page, reloading it once if it does not show its state in time.
+
+        Returns:
+            str: 'logged_in' or 'logged_out'.
+
+        Raises:
+            RateLimited: If the page shows a rate limit.
+            SelectorTimeout: If the page still does not show its state after the reload.
+        """
+        state = self.probe()
+        if state == 'timeout':
+            # A slow page says nothing about the cookies, look again before giving up
+            self.bot.refresh_page()
+            state = self.probe()
+        if state == 'rate_limited':
+            if self.bot.limiter is not None:
+                self.bot.limiter.on_rate_limited()
+            raise RateLimited('Twitter is rate limiting this session.')
+        if state == 'timeout':
+            raise SelectorTimeout('session_probe', self.probe_timeout)
+        return state
+
+    def finish(self, report, start):
+        report['seconds'] = time.monotonic() - start
+        self.history.append(report)
+        return report
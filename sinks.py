@@ -0,0 +1,239 @@
+"""
+Streaming sinks the scraped rows are pushed into while scraping, see BotFunctions.attach_sink.
+
+Rows are buffered and appended in batches to a segment file, which is rotated by size or age.
+A segment is written as '<name>.part' and only renamed to its final name once it is complete, so
+files with the final extension are never partial. The text sinks (CSV, JSON lines) fsync every batch
+appended to a '.part' file, so after a crash it holds all the batches flushed before it. A Parquet file
+is only readable once its footer is written, when the segment is finished: after a crash its '.part'
+file is lost, so use rotate_seconds or rotate_bytes to bound how many rows a crash can take.
+"""
+from datetime import datetime, timezone
+import json
+import os
+import time
+
+import pandas as pd
+
+
+class RecordSink:
+    """
+    Base class of the streaming sinks. Subclasses implement open_segment, write_batch and close_segment.
+    """
+    extension = None
+
+    def __init__(self, path_prefix, flush_rows=500, flush_interval=30, rotate_bytes=None, rotate_seconds=None):
+        """
+        Initializes RecordSink object.
+
+        Parameters:
+            path_prefix (str): Path and base name of the segment files, e.g. 'data/tweets'.
+            flush_rows (int): Number of buffered rows written at once. Default is 500.
+            flush_interval (float): Seconds after which buffered rows are written, even below flush_rows. Default is 30.
+            rotate_bytes (int): Optional. Start a new segment once the current one reaches this size.
+            rotate_seconds (float): Optional. Start a new segment once the current one is this old.
+        """
+        self.path_prefix = path_prefix
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.segment_path = None
+        self.segment_started = None
+        self.segment_index = 0
+        self.rows_written = 0
+        self.segments = []
+
+        directory = os.path.dirname(path_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def write(self, records):
+        """
+        Buffer rows, writing them out once flush_rows or flush_interval is reached.
+
+        Parameters:
+            records (list or DataFrame): Rows to write, as dictionaries or a DataFrame.
+
+        Returns:
+            None
+        """
+        if isinstance(records, pd.DataFrame):
+            records = records.to_dict('records')
+        self.buffer.extend(records)
+        if len(self.buffer) >= self.flush_rows or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Append the buffered rows to the current segment, rotating it if it is too big or too old.
+
+        Returns:
+            None
+        """
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        if self.segment_path is None:
+            self.segment_index += 1
+            stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+            self.segment_path = f'{self.path_prefix}-{stamp}-{self.segment_index:04d}.{self.extension}'
+            self.segment_started = time.monotonic()
+            self.open_segment(self.part_path)
+
+        records, self.buffer = self.buffer, []
+        self.write_batch(records)
+        self.rows_written += len(records)
+
+        if ((self.rotate_bytes is not None and os.path.getsize(self.part_path) >= self.rotate_bytes)
+                or (self.rotate_seconds is not None and time.monotonic() - self.segment_started >= self.rotate_seconds)):
+            self.finish_segment()
+
+    @property
+    def part_path(self):
+        return self.segment_path + '.part'
+
+    def finish_segment(self):
+        """
+        Close the current segment and atomically rename it to its final name.
+
+        Returns:
+            None
+        """
+        if self.segment_path is None:
+            return
+        self.close_segment()
+        os.replace(self.part_path, self.segment_path)
+        self.segments.append(self.segment_path)
+        self.segment_path = None
+
+    def close(self):
+        """
+        Write the buffered rows and finish the current segment.
+
+        Returns:
+            None
+        """
+        self.flush()
+        self.finish_segment()
+
+    def open_segment(self, path):
+        raise NotImplementedError
+
+    def write_batch(self, records):
+        raise NotImplementedError
+
+    def close_segment(self):
+        raise NotImplementedError
+
+
+class FileSink(RecordSink):
+    """
+    Base class of the text sinks, appending every batch to an open file and fsyncing it.
+    """
+    def open_segment(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+
+    def write_batch(self, records):
+        self.write_text(records)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close_segment(self):
+        self.file.close()
+
+    def write_text(self, records):
+        raise NotImplementedError
+
+
+class CsvSink(FileSink):
+    """
+    Writes rows to CSV segments, in the same format as BotFunctions.generate_csv.
+    """
+    extension = 'csv'
+
+    def open_segment(self, path):
+        super().open_segment(path)
+        self.header_written = False
+
+    def write_text(self, records):
+        pd.DataFrame(records).to_csv(self.file, header=not self.header_written, index=False)
+        self.header_written = True
+
+
+class JsonlSink(FileSink):
+    """
+    Writes rows to JSON lines segments.
+    """
+    extension = 'jsonl'
+
+    def write_text(self, records):
+        self.file.write(''.join(json.dumps(record, default=str) + '\n' for record in records))
+
+
+class ParquetSink(RecordSink):
+    """
+    Writes rows to Parquet segments, one row group per flushed batch. Requires pyarrow.
+
+    The footer of a segment is only written when it is finished, so an unfinished '.part' segment cannot be
+    read back, see the module docstring.
+    """
+    extension = 'parquet'
+    # Columns holding lists, every other column is stored as strings so that 'NA' placeholders fit the schema
+    list_columns = ('media_links',)
+
+    def __init__(self, *args, **kwargs):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('ParquetSink requires pyarrow, install it with "pip install pyarrow".')
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        super().__init__(*args, **kwargs)
+
+    def open_segment(self, path):
+        self.writer = None
+        self.schema = None
+
+    def write_batch(self, records):
+        table = self.to_table(records)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = self.pq.ParquetWriter(self.part_path, self.schema)
+        self.writer.write_table(table.cast(self.schema))
+
+    def close_segment(self):
+        if self.writer is not None:
+            self.writer.close()
+            with open(self.part_path, 'rb') as file:
+                os.fsync(file.fileno())
+
+    def to_table(self, records):
+        columns = {}
+        for column in dict.fromkeys(key for record in records for key in record):
+            values = [record.get(column) for record in records]
+            if column in self.list_columns:
+                columns[column] = self.pa.array(
+                    [[str(item) for item in value] if isinstance(value, list) else [] for value in values],
+                    type=self.pa.list_(self.pa.string()))
+            else:
+                columns[column] = self.pa.array([None if value is None else str(value) for value in values],
+                                                type=self.pa.string())
+        return self.pa.table(columns)
+
+
+SINKS = {
+    'csv': CsvSink,
+    'jsonl': JsonlSink,
+    'parquet': ParquetSink
+}
@@ -0,0 +1,124 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from bot_pool import BotPool
+from errors import SelectorTimeout
+from fake_driver import FakeDriver
+
+
+class CrashingDriver(FakeDriver):
+    """
+    FakeDriver whose browser can be made to die.
+    """
+    crashed = False
+
+    def execute(self, command, params=None):
+        if self.crashed:
+            raise WebDriverException('browser crashed')
+        return super().execute(command, params)
+
+
+def crash_then_fetch(bot):
+    # The browser dies in the middle of the job
+    bot.driver.crashed = True
+    return bot.fetch_multiple_tweets_data()
+
+
+@pytest.fixture(autouse=True)
+def cookie_directory(tmp_path, monkeypatch):
+    # Sessions look for saved cookies in the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+def fake_factory(drivers):
+    def factory():
+        driver = CrashingDriver(latency=0, tweets=20)
+        drivers.append(driver)
+        return driver
+    return factory
+
+
+def test_run_on_all_merges_rows_of_every_account():
+    with BotPool(['a', 'b'], fake_factory([])) as pool:
+        results = pool.run_on_all('fetch_multiple_tweets_data')
+        tweets = pool.tweets_df
+    assert set(results) == {'a', 'b'}
+    assert tweets['account'].value_counts().to_dict() == {'a': 20, 'b': 20}
+
+
+def test_sessions_are_reused_between_jobs():
+    drivers = []
+    with BotPool(['a'], fake_factory(drivers)) as pool:
+        for _ in range(3):
+            pool.submit('fetch_multiple_tweets_data').result()
+        assert pool.sessions['a'].jobs_done == 3
+    assert len(drivers) == 1
+
+
+def test_crashed_session_is_recycled_and_job_retried():
+    drivers = []
+
+    def job(bot):
+        # Only the first browser dies
+        return crash_then_fetch(bot) if bot.driver is drivers[0] else bot.fetch_multiple_tweets_data()
+
+    with BotPool(['a'], fake_factory(drivers), retries=1) as pool:
+        pool.submit(job).result()
+        tweets = pool.tweets_df
+        assert pool.sessions['a'].restarts == 1
+    assert len(drivers) == 2
+    assert len(tweets) == 20
+
+
+def test_crash_beyond_retries_is_raised():
+    drivers = []
+    with BotPool(['a'], fake_factory(drivers), retries=1) as pool:
+        with pytest.raises(WebDriverException):
+            pool.submit(crash_then_fetch).result()
+    assert len(drivers) == 2
+
+
+def test_unresponsive_session_is_recycled_before_the_next_job():
+    drivers = []
+    with BotPool(['a'], fake_factory(drivers), retries=0) as pool:
+        pool.submit('fetch_multiple_tweets_data').result()
+        drivers[0].crashed = True
+        pool.submit('fetch_multiple_tweets_data').result()
+        assert pool.sessions['a'].restarts == 1
+        assert pool.sessions['a'].jobs_done == 2
+
+
+def test_partial_rows_of_a_failed_job_are_dropped():
+    def failing_job(bot):
+        bot.fetch_multiple_tweets_data()
+        raise ValueError('job failed after collecting rows')
+
+    with BotPool(['a'], fake_factory([])) as pool:
+        with pytest.raises(ValueError):
+            pool.submit(failing_job).result()
+        assert len(pool.sessions['a'].bot.tweets_rows) == 0
+        pool.submit(lambda bot: bot.store_rows('tweets', [dict.fromkeys(bot.tweets_rows.columns, 'x')])).result()
+        tweets = pool.tweets_df
+    assert len(tweets) == 1
+
+
+def test_jobs_run_on_the_requested_account():
+    with BotPool(['a', 'b'], fake_factory([])) as pool:
+        accounts = [pool.submit(lambda bot: bot.username, username='b').result() for _ in range(3)]
+    assert accounts == ['b', 'b', 'b']
+
+
+def test_selector_timeout_does_not_recycle_the_session():
+    drivers = []
+    calls = []
+
+    def job(bot):
+        calls.append(bot)
+        bot.locate('login_button', wait_time=0.01)
+
+    with BotPool(['a'], fake_factory(drivers), retries=1) as pool:
+        with pytest.raises(SelectorTimeout):
+            pool.submit(job).result()
+        assert pool.sessions['a'].restarts == 0
+    assert len(drivers) == 1
+    assert len(calls) == 1
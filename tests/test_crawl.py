@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from checkpoints import Checkpoint
+from errors import RetryPolicy, SelectorTimeout
+from fake_driver import FakeDriver
+from twitterbot import BotFunctions, UI
+
+WAITS = {'element': 0.05, 'scroll': 0.01, 'idle': 0.01}
+POLICIES = {'harvest_timeline': RetryPolicy(attempts=1)}
+
+
+def new_bot(driver):
+    return BotFunctions(driver, 'tester', wait_timeouts=WAITS, retry_policies=POLICIES)
+
+
+class BlankDriver(FakeDriver):
+    """
+    Search results that never load, without the "No results" placeholder.
+    """
+    def tweet_indexes(self):
+        return []
+
+    def command_executeScript(self, script, args):
+        if script == UI.no_results_script:
+            return False
+        return super().command_executeScript(script, args)
+
+
+def test_interrupted_crawl_resumes_below_the_oldest_tweet(tmp_path):
+    driver = FakeDriver(tweets=30, latency=0)
+    assert new_bot(driver).scrape_search('python', max_tweets=10, checkpoint_dir=tmp_path) == 10
+    assert not Checkpoint.load('search:python', tmp_path).done
+
+    bot = new_bot(driver)
+    assert bot.scrape_search('python', checkpoint_dir=tmp_path) == 20
+    assert 'max_id%3A1789999999999999990' in driver.current_url
+    checkpoint = Checkpoint.load('search:python', tmp_path)
+    assert checkpoint.done
+    assert checkpoint.count == 30
+
+
+def test_done_crawl_collects_the_tweets_posted_since(tmp_path):
+    driver = FakeDriver(tweets=20, latency=0)
+    assert new_bot(driver).scrape_search('python', checkpoint_dir=tmp_path) == 20
+
+    driver.post(5)
+    bot = new_bot(driver)
+    assert bot.scrape_search('python', checkpoint_dir=tmp_path) == 5
+    assert 'since_id%3A1790000000000000000' in driver.current_url
+    assert set(bot.tweets_rows.to_dataframe()['tweet_id']) == {str(1790000000000000000 + n) for n in range(1, 6)}
+
+    # Nothing new: the search shows no results, the refresh is done
+    assert new_bot(driver).scrape_search('python', checkpoint_dir=tmp_path) == 0
+    checkpoint = Checkpoint.load('search:python', tmp_path)
+    assert checkpoint.done and not checkpoint.refreshing
+    assert checkpoint.newest_id == '1790000000000000005'
+
+
+def test_interrupted_refresh_does_not_skip_the_gap(tmp_path):
+    driver = FakeDriver(tweets=10, latency=0)
+    new_bot(driver).scrape_search('python', checkpoint_dir=tmp_path)
+
+    driver.post(20)
+    assert new_bot(driver).scrape_search('python', max_tweets=8, checkpoint_dir=tmp_path) == 8
+    assert Checkpoint.load('search:python', tmp_path).refreshing
+
+    driver.post(3)
+    bot = new_bot(driver)
+    assert bot.scrape_search('python', checkpoint_dir=tmp_path) == 12
+    assert 'since_id%3A1790000000000000000' in driver.current_url
+    assert 'max_id%3A1790000000000000012' in driver.current_url
+    # The 3 latest tweets are collected by the next refresh
+    assert new_bot(driver).scrape_search('python', checkpoint_dir=tmp_path) == 3
+    assert Checkpoint.load('search:python', tmp_path).count == 33
+
+
+def test_results_that_do_not_load_keep_the_crawl_open(tmp_path):
+    with pytest.raises(SelectorTimeout):
+        new_bot(BlankDriver(latency=0)).scrape_search('python', checkpoint_dir=tmp_path)
+    assert not Checkpoint.load('search:python', tmp_path).done
+
+
+def test_search_without_results_is_done(tmp_path):
+    assert new_bot(FakeDriver(tweets=0, latency=0)).scrape_search('python', checkpoint_dir=tmp_path) == 0
+    assert Checkpoint.load('search:python', tmp_path).done
+
+
+def test_checkpoint_does_not_grow_with_the_tweets_collected(tmp_path):
+    driver = FakeDriver(tweets=200, latency=0)
+    new_bot(driver).scrape_search('python', checkpoint_dir=tmp_path)
+    checkpoint = Checkpoint.load('search:python', tmp_path)
+    assert checkpoint.count == 200
+    assert os.path.getsize(checkpoint.path) < 1000
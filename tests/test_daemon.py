@@ -0,0 +1,52 @@
+import pytest
+
+from daemon import Daemon, DaemonSession
+from errors import LoggedOut, RetryPolicy
+from fake_driver import FakeDriver
+from twitterbot import BotFunctions
+
+WAITS = {'element': 0.05, 'scroll': 0.01, 'idle': 0.01}
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def new_daemon(driver):
+    config = {
+        'accounts': [{'username': 'tester'}],
+        'jobs': [{'name': 'python', 'job': 'scrape_search', 'args': ['python'], 'every': 30}],
+        'output': {'directory': 'data'}
+    }
+    daemon = Daemon(config, driver_factory=lambda: driver)
+    session = daemon.sessions['tester']
+    session.bot = BotFunctions(driver, 'tester', wait_timeouts=WAITS,
+                               retry_policies={'harvest_timeline': RetryPolicy(attempts=1)})
+    session.state = 'ready'
+    return daemon, session, daemon.jobs['python']
+
+
+def test_scheduled_crawl_collects_new_tweets_on_every_run():
+    driver = FakeDriver(tweets=20, latency=0)
+    daemon, session, scheduled = new_daemon(driver)
+    daemon.run_job(session, scheduled)
+    assert scheduled.records == 20
+    assert not session.bot.seen_tweets
+
+    driver.post(5)
+    daemon.run_job(session, scheduled)
+    assert scheduled.records == 25
+    assert scheduled.failures == 0
+    assert not session.bot.seen_tweets
+
+
+def test_missing_password_raises_logged_out(monkeypatch):
+    logins = []
+    monkeypatch.setattr(BotFunctions, 'login', lambda bot, password, username=None: logins.append(password))
+    session = DaemonSession('tester', lambda: FakeDriver(latency=0), 'https://twitter.com/', password=lambda: None,
+                            wait_timeouts=WAITS)
+    with pytest.raises(LoggedOut):
+        session.start()
+    assert logins == []
+    assert session.bot is None
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import warnings
+
+import pytest
+from selenium.common.exceptions import JavascriptException, WebDriverException
+
+from async_bot import AsyncBot
+from fake_driver import FakeDriver
+from network_capture import NetworkCapture
+import twitterbot
+from twitterbot import UI, BotFunctions
+
+
+class FailingWaitDriver(FakeDriver):
+    error = None
+
+    def execute_async_script(self, script, *args):
+        raise self.error
+
+    def execute_script(self, script, *args):
+        if script == UI.node_count_script:
+            raise self.error
+        return super().execute_script(script, *args)
+
+
+def test_page_state_script_compiles_without_escape_warnings():
+    with open(twitterbot.__file__) as file:
+        source = file.read()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        compile(source, 'twitterbot.py', 'exec')
+
+
+def test_failed_wait_script_falls_back_and_is_counted():
+    driver = FailingWaitDriver(latency=0)
+    driver.error = JavascriptException('script failed')
+    bot = BotFunctions(driver, 'tester', wait_timeouts={'scroll': 0.01})
+    assert bot.wait_for_new_content(UI.tweet_container) is None
+    assert bot.failures.as_dict()['by_operation'] == {'wait_for_content': 1}
+
+
+def test_crashed_driver_during_wait_is_raised():
+    driver = FailingWaitDriver(latency=0)
+    driver.error = WebDriverException('browser crashed')
+    bot = BotFunctions(driver, 'tester', wait_timeouts={'scroll': 0.01})
+    with pytest.raises(WebDriverException):
+        bot.wait_for_new_content(UI.tweet_container)
+
+
+def test_failed_async_poll_falls_back_and_is_counted():
+    driver = FailingWaitDriver(latency=0)
+    driver.error = JavascriptException('script failed')
+    bot = AsyncBot(BotFunctions(driver, 'tester', wait_timeouts={'scroll': 0.01}))
+    assert asyncio.run(bot.wait_for_new_content(UI.tweet_container)) is None
+    assert bot.bot.failures.as_dict()['by_operation'] == {'wait_for_content': 1}
+
+
+def test_crashed_driver_during_async_wait_is_raised():
+    driver = FailingWaitDriver(latency=0)
+    driver.error = WebDriverException('browser crashed')
+    bot = AsyncBot(BotFunctions(driver, 'tester', wait_timeouts={'scroll': 0.01}))
+    with pytest.raises(WebDriverException):
+        asyncio.run(bot.wait_for_new_content(UI.tweet_container))
+
+
+class LogDriver:
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def get_log(self, log_type):
+        entries = []
+        for request_id in self.bodies:
+            url = f'https://x.com/i/api/graphql/{request_id}'
+            entries.append({'method': 'Network.responseReceived',
+                            'params': {'requestId': request_id, 'response': {'url': url}}})
+            entries.append({'method': 'Network.loadingFinished', 'params': {'requestId': request_id}})
+        return [{'message': json.dumps({'message': entry})} for entry in entries]
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        body = self.bodies[cmd_args['requestId']]
+        if body is None:
+            raise WebDriverException('No resource with given identifier found')
+        return {'body': body}
+
+
+def test_unreadable_responses_are_skipped_and_counted():
+    capture = NetworkCapture(LogDriver({'1': '{"data": 1}', '2': None, '3': 'not json'}))
+    responses = capture.poll()
+    assert [payload for _, payload in responses] == [{'data': 1}]
+    assert capture.failures.as_dict() == {'by_class': {'WebDriverException': 1, 'JSONDecodeError': 1},
+                                          'by_operation': {'network_capture': 2}}
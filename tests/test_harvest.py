@@ -0,0 +1,32 @@
+from fake_driver import FakeDriver
+from twitterbot import BotFunctions
+
+WAITS = {'element': 0.2, 'scroll': 0.05, 'idle': 0.01}
+
+
+def new_bot(tweets=100):
+    return BotFunctions(FakeDriver(tweets=tweets, latency=0), 'tester', wait_timeouts=WAITS)
+
+
+def test_max_tweets_only_marks_kept_tweets_as_seen():
+    bot = new_bot()
+    assert bot.harvest_timeline(max_tweets=10) == 10
+    assert len(bot.seen_tweets) == 10
+    assert bot.harvest_timeline(max_tweets=10) == 10
+    assert len(bot.seen_tweets) == 20
+
+
+def test_harvests_resume_until_every_tweet_is_collected():
+    bot = new_bot()
+    total = 0
+    for _ in range(10):
+        total += bot.harvest_timeline(max_tweets=10, max_idle_scrolls=1)
+    assert total == 100
+    assert bot.tweets_rows.to_dataframe()['tweet_id'].is_unique
+    assert bot.harvest_timeline(max_tweets=10, max_idle_scrolls=1) == 0
+
+
+def test_duplicates_within_a_pass_are_kept_once():
+    bot = new_bot(tweets=5)
+    bot.seen_tweets.add(bot.tweet_key(bot.fetch_tweets_data_batch()[0]))
+    assert bot.harvest_timeline(max_idle_scrolls=1) == 4
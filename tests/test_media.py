@@ -0,0 +1,126 @@
+from collections import Counter
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+
+import pytest
+
+from media import MediaDownloader
+
+IMAGE = b'synthetic image\n' * 500
+
+
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), MediaHandler)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        # Path mapped to the number of 503 responses it gives before succeeding
+        self.failures = {}
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests[self.path] += 1
+            failing = server.failures.get(self.path, 0)
+            if failing:
+                server.failures[self.path] = failing - 1
+        if failing:
+            self.send_error(503)
+            return
+        if self.path.startswith('/missing'):
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(IMAGE)))
+        self.end_headers()
+        if self.path.startswith('/truncated'):
+            # The connection is closed before the announced length is sent
+            self.wfile.write(IMAGE[:100])
+            self.close_connection = True
+            return
+        self.wfile.write(IMAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = MediaServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server, path):
+    return f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+
+def stored_files(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory)
+                  for root, _, names in os.walk(directory) for name in names if not name.startswith('index.sqlite'))
+
+
+def test_same_content_is_stored_once_under_its_hash(server, tmp_path):
+    first, second = url(server, '/a.jpg'), url(server, '/b.jpg')
+    with MediaDownloader(str(tmp_path), workers=1, backoff=0) as downloader:
+        downloader.write([{'tweet_id': '1', 'media_links': [first]},
+                          {'tweet_id': '2', 'media_links': [second, first]}])
+        downloader.flush()
+        stats = downloader.stats()
+        media = downloader.media_of('2')
+
+    sha256 = hashlib.sha256(IMAGE).hexdigest()
+    assert stored_files(tmp_path) == [os.path.join(sha256[:2], sha256[2:4], sha256 + '.jpg')]
+    assert stats['downloaded'] == 1 and stats['duplicate'] == 1
+    assert [item['sha256'] for item in media] == [sha256, sha256]
+    assert server.requests['/a.jpg'] == 1
+
+    # A URL downloaded by an earlier run is linked from the index without a request
+    with MediaDownloader(str(tmp_path), workers=1) as downloader:
+        downloader.write([{'tweet_id': '3', 'media_links': [first]}])
+        downloader.flush()
+        assert downloader.stats()['cached'] == 1
+        assert downloader.media_of('3')[0]['sha256'] == sha256
+    assert server.requests['/a.jpg'] == 1
+
+
+def test_partial_download_leaves_no_file(server, tmp_path):
+    with MediaDownloader(str(tmp_path), workers=1, retries=0) as downloader:
+        downloader.write([{'tweet_id': '1', 'media_links': [url(server, '/truncated.jpg')]}])
+        downloader.flush()
+        assert downloader.stats()['failed'] == 1
+        assert [failure['url'] for failure in downloader.index.failures()] == [url(server, '/truncated.jpg')]
+        assert downloader.media_of('1') == []
+    assert stored_files(tmp_path) == []
+
+
+def test_server_errors_are_retried(server, tmp_path):
+    server.failures['/flaky.jpg'] = 2
+    with MediaDownloader(str(tmp_path), workers=1, retries=2, backoff=0) as downloader:
+        downloader.write([{'tweet_id': '1', 'media_links': [url(server, '/flaky.jpg')]}])
+        downloader.flush()
+        assert downloader.stats()['downloaded'] == 1
+        assert downloader.index.failures() == []
+    assert server.requests['/flaky.jpg'] == 3
+
+
+def test_failures_are_recorded_once_the_retries_are_spent(server, tmp_path):
+    server.failures['/flaky.jpg'] = 5
+    with MediaDownloader(str(tmp_path), workers=1, retries=1, backoff=0) as downloader:
+        downloader.write([{'tweet_id': '1', 'media_links': [url(server, '/flaky.jpg'), url(server, '/missing.jpg')]}])
+        downloader.flush()
+        assert downloader.stats()['failed'] == 2
+        assert len(downloader.index.failures()) == 2
+    assert server.requests['/flaky.jpg'] == 2
+    assert server.requests['/missing.jpg'] == 1
+    assert stored_files(tmp_path) == []
@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+import pytest
+
+from errors import BotError, FailureCounters
+from fake_driver import FakeDriver
+from network_capture import parse_trends, parse_tweets, replay_responses
+from normalize import normalize_tweets
+from twitterbot import BotFunctions, TWEET_COLUMNS
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'fixtures', 'home_timeline_responses.jsonl')
+FETCH_DATETIME = '12:00:00 01-05-2024 +0000'
+
+
+def replayed_tweets(failures=None):
+    return [record for url, payload in replay_responses(FIXTURE)
+            for record in parse_tweets(payload, FETCH_DATETIME, failures)]
+
+
+def test_replayed_timeline_gives_tweet_rows():
+    tweets = replayed_tweets()
+    assert [tweet['tweet_id'] for tweet in tweets] == [str(1760000000000000000 + n) for n in range(4)]
+    assert all(list(tweet) == TWEET_COLUMNS for tweet in tweets)
+    first = tweets[0]
+    assert first['username'] == '@user0'
+    assert first['tweet_datetime'] == '12:15:00 01-03-2024 +0000'
+    assert (first['reply'], first['retweet'], first['like'], first['view']) == ('12', '340', '1234', '15342')
+    assert tweets[1]['media_links'] == ['https://pbs.twimg.com/media/fixture1.jpg',
+                                        'https://pbs.twimg.com/media/fixture1b.jpg']
+    # A retweet is rendered as the original tweet
+    assert tweets[3]['tweet_text'] == 'Original tweet that was retweeted #fixture'
+
+
+def test_replayed_explore_gives_trend_rows():
+    trends = [record for url, payload in replay_responses(FIXTURE)
+              for record in parse_trends(payload, 'trending', FETCH_DATETIME)]
+    assert [(trend['rank'], trend['tag_or_text'], trend['posts']) for trend in trends] == [
+        ('1', '#FixtureTrend', '12.3K'), ('2', 'Fixture News', '98.1K'), ('3', 'Matchday', '3,456')]
+
+
+def test_network_and_dom_rows_mix_in_one_frame():
+    bot = BotFunctions(FakeDriver(tweets=3, latency=0), 'tester')
+    rows = replayed_tweets() + bot.fetch_tweets_data_batch()
+    frame = pd.DataFrame(rows, columns=TWEET_COLUMNS)
+    for column in ('reply', 'retweet', 'like', 'view'):
+        assert {type(value) for value in frame[column]} == {str}
+    counts = normalize_tweets(frame)
+    assert str(counts['like'].dtype) == 'Int64'
+    assert counts['like'].iloc[0] == 1234
+    assert counts['like'].notna().all()
+
+
+def test_unexpected_tweet_objects_are_counted():
+    failures = FailureCounters()
+    payload = {'entries': [{'__typename': 'Tweet', 'rest_id': '1'}]}
+    assert parse_tweets(payload, FETCH_DATETIME, failures) == []
+    assert failures.as_dict()['by_operation'] == {'parse_tweets': 1}
+
+
+def test_network_source_needs_the_capture():
+    bot = BotFunctions(FakeDriver(latency=0), 'tester')
+    with pytest.raises(BotError):
+        bot.explore_tab_data('trending', source='network')
+    with pytest.raises(BotError):
+        bot.harvest_timeline(source='network')
@@ -0,0 +1,20 @@
+import pandas as pd
+
+from normalize import parse_count, parse_counts
+
+
+def test_counts_are_parsed_to_nullable_integers():
+    values = ['', ' 7 ', '1,234', '1.2K', '56k', '3.4M', '1B', 'NA', None, 12, 'abc', 'K']
+    counts = parse_counts(pd.Series(values, index=range(10, 22), name='like', dtype=object))
+    assert str(counts.dtype) == 'Int64'
+    assert counts.name == 'like'
+    assert counts.index.tolist() == list(range(10, 22))
+    assert counts.astype('object').where(counts.notna(), None).tolist() == [
+        0, 7, 1234, 1200, 56000, 3400000, 1000000000, None, None, 12, None, None]
+
+
+def test_repeated_counts_match_the_scalar_parser():
+    values = ['1.2K', '', 'NA', '7'] * 1000
+    counts = parse_counts(pd.Series(values))
+    assert counts.astype('object').where(counts.notna(), None).tolist() == [parse_count(value) for value in values]
+    assert parse_counts(pd.Series([], dtype=object)).tolist() == []
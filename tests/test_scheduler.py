@@ -0,0 +1,177 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from errors import LoggedOut, RateLimited, SelectorTimeout
+from scheduler import AccountLimiter, Scheduler, SimulatedClock, TokenBucket
+
+
+class StubBot:
+    """
+    Bot whose jobs record their order, and raise the errors queued for them.
+    """
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+        self.limiter = None
+        self.errors = {}
+
+    def job(self, label):
+        self.log.append((label, self.name))
+        error = self.errors.get(label)
+        if isinstance(error, list):
+            error = error.pop(0) if error else None
+        if error is not None:
+            raise error
+        return label
+
+
+def new_scheduler(accounts=('a',), clock=None, **limiter_options):
+    clock = clock or SimulatedClock()
+    log = []
+    bots = {name: StubBot(name, log) for name in accounts}
+    options = {'rate': 1.0, 'capacity': 1, **limiter_options}
+    scheduler = Scheduler(bots, limiter_factory=lambda **kwargs: AccountLimiter(**options, **kwargs),
+                          clock=clock, sleep=clock.sleep)
+    return scheduler, bots, log, clock
+
+
+def test_token_bucket_refills_at_its_rate_up_to_capacity():
+    clock = SimulatedClock()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock)
+    assert all(bucket.take() for _ in range(3))
+    assert not bucket.take()
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.sleep(0.25)
+    assert bucket.wait_time() == pytest.approx(0.25)
+    clock.sleep(0.25)
+    assert bucket.take()
+    clock.sleep(100)
+    bucket.refill()
+    assert bucket.tokens == 3
+
+
+def test_limiter_acquire_waits_for_tokens():
+    clock = SimulatedClock()
+    limiter = AccountLimiter(rate=0.5, capacity=1, clock=clock, sleep=clock.sleep)
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(2.0)
+    assert clock() == pytest.approx(2.0)
+    assert limiter.stats()['acquired'] == 2
+
+
+def test_rate_limits_cut_the_rate_once_and_double_the_cooldown():
+    clock = SimulatedClock()
+    limiter = AccountLimiter(rate=1.0, decrease=0.5, cooldown=60, max_cooldown=200, clock=clock, sleep=clock.sleep)
+    assert limiter.on_rate_limited() == 60
+    assert limiter.rate == pytest.approx(0.5)
+    assert limiter.wait_time() == pytest.approx(60)
+    assert limiter.on_rate_limited() == 120
+    assert limiter.on_rate_limited() == 200
+    # Rate limits in a row belong to one lockout, the rate is cut once
+    assert limiter.rate == pytest.approx(0.5)
+    limiter.on_success()
+    # The next lockout starts with the pause the previous one needed
+    assert limiter.on_rate_limited() == 200
+    assert limiter.rate == pytest.approx(0.2525)
+
+
+def test_success_raises_the_rate_additively_up_to_max_rate():
+    limiter = AccountLimiter(rate=1.0, increase=0.1, max_rate=10.0, clock=SimulatedClock())
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(1.2)
+    capped = AccountLimiter(rate=1.0, increase=0.1, max_rate=1.05, clock=SimulatedClock())
+    for _ in range(10):
+        capped.on_success()
+    assert capped.rate == pytest.approx(1.05)
+
+
+def test_rate_climbs_slowly_near_the_rate_that_was_limited():
+    clock = SimulatedClock()
+    limiter = AccountLimiter(rate=1.0, increase=0.1, decrease=0.5, clock=clock)
+    limiter.on_rate_limited()
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(0.6)
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(0.8)
+    limiter.on_success()
+    # 0.9 would pass 80% of the limited rate
+    assert limiter.rate == pytest.approx(0.81)
+
+
+def test_rate_stays_below_the_limited_rate_until_probing():
+    clock = SimulatedClock()
+    limiter = AccountLimiter(rate=1.0, increase=0.1, decrease=0.5, headroom=0.9, probe_after=3600, clock=clock)
+    limiter.on_rate_limited()
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.rate == pytest.approx(0.9)
+    assert limiter.ceiling == pytest.approx(1.0)
+    clock.sleep(3600)
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.ceiling == pytest.approx(1.1)
+    assert limiter.rate == pytest.approx(0.99)
+
+
+def test_jobs_run_by_priority_then_submission_order():
+    scheduler, bots, log, clock = new_scheduler(rate=100.0, capacity=100)
+    scheduler.submit('job', 'low', priority=5)
+    scheduler.submit('job', 'first', priority=0)
+    scheduler.submit('job', 'second', priority=0)
+    finished = scheduler.run()
+    assert [label for label, _ in log] == ['first', 'second', 'low']
+    assert [job.result for job in finished] == ['first', 'second', 'low']
+
+
+def test_jobs_are_paced_by_the_token_bucket():
+    scheduler, bots, log, clock = new_scheduler(rate=0.5, capacity=1, increase=0)
+    for label in range(3):
+        scheduler.submit('job', label)
+    scheduler.run()
+    # One token every 2 seconds, the first one is available at once
+    assert clock() == pytest.approx(4.0)
+
+
+def test_ready_account_runs_the_job_before_a_blocked_one():
+    scheduler, bots, log, clock = new_scheduler(accounts=('a', 'b'))
+    scheduler.limiters['a'].on_rate_limited()
+    scheduler.submit('job', 'x')
+    scheduler.run()
+    assert log == [('x', 'b')]
+    assert clock() == 0
+
+
+def test_pinned_job_waits_for_its_account():
+    scheduler, bots, log, clock = new_scheduler(accounts=('a', 'b'), cooldown=30)
+    scheduler.limiters['a'].on_rate_limited()
+    scheduler.submit('job', 'x', account='a')
+    scheduler.run()
+    assert log == [('x', 'a')]
+    assert clock() >= 30
+
+
+def test_rate_limited_job_is_retried_then_fails():
+    scheduler, bots, log, clock = new_scheduler(cooldown=10)
+    bots['a'].errors['x'] = RateLimited('limited')
+    scheduler.max_attempts = 2
+    scheduler.submit('job', 'x')
+    finished = scheduler.run()
+    assert len(log) == 2
+    assert isinstance(finished[0].error, RateLimited)
+    assert finished[0].attempts == 2
+
+
+@pytest.mark.parametrize('error', [SelectorTimeout('tweet_container', 5), LoggedOut('logged out'),
+                                   WebDriverException('browser crashed')])
+def test_failed_job_is_recorded_and_the_queue_goes_on(error):
+    scheduler, bots, log, clock = new_scheduler(rate=100.0, capacity=100)
+    bots['a'].errors['bad'] = error
+    scheduler.submit('job', 'bad', priority=0)
+    scheduler.submit('job', 'good', priority=1)
+    finished = scheduler.run()
+    assert [job.args for job in finished] == [('bad',), ('good',)]
+    assert finished[0].error is error and finished[0].done
+    assert finished[1].result == 'good'
+    assert not scheduler.queue
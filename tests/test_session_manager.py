@@ -0,0 +1,157 @@
+import time
+
+import pytest
+
+from errors import LoggedOut, RateLimited, SelectorTimeout
+from fake_driver import FakeDriver
+from session_manager import CookieStore, SessionManager
+from twitterbot import BotFunctions
+
+VALID_COOKIES = [{'name': 'auth_token', 'value': 'a', 'expiry': time.time() + 86400},
+                 {'name': 'ct0', 'value': 'b', 'expiry': time.time() + 86400}]
+
+
+class ProbeDriver:
+    """
+    Driver whose session probe returns the scripted states in turn.
+    """
+    def __init__(self, states):
+        self.states = list(states)
+        self.cookies_deleted = False
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, *args):
+        return self.states.pop(0)
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return {}
+
+    def delete_all_cookies(self):
+        self.cookies_deleted = True
+
+    def get_cookies(self):
+        return VALID_COOKIES
+
+
+class StubBot:
+    def __init__(self, states, store):
+        self.username = 'tester'
+        self.driver = ProbeDriver(states)
+        self.cookie_store = store
+        self.wait_timeouts = {'element': 1}
+        self.limiter = None
+        self.logins = []
+        self.refreshes = 0
+
+    def open_website(self, url):
+        pass
+
+    def refresh_page(self):
+        self.refreshes += 1
+
+    def login(self, password):
+        self.logins.append(password)
+
+    def record_wait(self, step, budget, waited):
+        pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CookieStore(str(tmp_path / 'cookies'), legacy_path=None)
+
+
+def test_valid_cookies_start_warm(store):
+    store.save('tester', VALID_COOKIES)
+    bot = StubBot(['logged_in'], store)
+    assert SessionManager(bot).start()['mode'] == 'warm'
+    assert bot.logins == []
+
+
+def test_slow_probe_keeps_the_cookies(store):
+    store.save('tester', VALID_COOKIES)
+    bot = StubBot(['timeout', 'timeout'], store)
+    with pytest.raises(SelectorTimeout):
+        SessionManager(bot).start(password='secret')
+    assert bot.refreshes == 1
+    assert not bot.driver.cookies_deleted
+    assert store.load('tester') == VALID_COOKIES
+    assert bot.logins == []
+
+
+def test_slow_probe_recovers_after_reload(store):
+    store.save('tester', VALID_COOKIES)
+    bot = StubBot(['timeout', 'logged_in'], store)
+    assert SessionManager(bot).start()['mode'] == 'warm'
+
+
+def test_logged_out_probe_invalidates_the_cookies(store):
+    store.save('tester', VALID_COOKIES)
+    bot = StubBot(['logged_out', 'logged_in'], store)
+    report = SessionManager(bot).start(password='secret')
+    assert report['mode'] == 'cold' and report['rejected']
+    assert bot.driver.cookies_deleted
+    assert bot.logins == ['secret']
+
+
+def test_failed_login_is_not_saved(store):
+    bot = StubBot(['logged_out'], store)
+    with pytest.raises(LoggedOut):
+        SessionManager(bot).start(password='wrong')
+    assert store.load('tester') is None
+
+
+def test_confirmed_login_is_saved(store):
+    bot = StubBot(['logged_in'], store)
+    assert SessionManager(bot).start(password=lambda: 'secret')['mode'] == 'cold'
+    assert store.load('tester') == VALID_COOKIES
+
+
+def test_rate_limit_keeps_the_cookies(store):
+    store.save('tester', VALID_COOKIES)
+    bot = StubBot(['rate_limited'], store)
+    with pytest.raises(RateLimited):
+        SessionManager(bot).start(password='secret')
+    assert store.load('tester') == VALID_COOKIES
+
+
+class VerifiedLoginBot(BotFunctions):
+    """
+    Bot whose login form asks to verify the login, recording the keys typed in every field.
+    """
+    def __init__(self, username):
+        super().__init__(FakeDriver(latency=0), username)
+        self.typed = []
+
+    def locate(self, name, wait_time=None, find_all=False, context=None, required=True):
+        return []
+
+    def act(self, name, action, keys=None, message=None, context=None, wait_time=None):
+        if action == 'send_keys':
+            self.typed.append((name, keys))
+
+    def wait_until_ready(self, value, step='login_step'):
+        pass
+
+
+def test_login_is_verified_with_the_account_username(monkeypatch):
+    monkeypatch.setattr('builtins.input', lambda prompt='': pytest.fail('The login waits for a terminal'))
+    bot = VerifiedLoginBot('tester@example.com')
+    bot.handle = '@tester'
+    bot.login('secret')
+    assert bot.typed == [('username_or_email_input', 'tester@example.com'), ('username_or_phone_input', 'tester'),
+                         ('password_input', 'secret')]
+
+    bot = VerifiedLoginBot('tester')
+    bot.login('secret')
+    assert bot.typed[1] == ('username_or_phone_input', 'tester')
+
+
+def test_login_without_a_username_to_verify_it_is_logged_out(monkeypatch):
+    monkeypatch.setattr('builtins.input', lambda prompt='': pytest.fail('The login waits for a terminal'))
+    bot = VerifiedLoginBot('tester@example.com')
+    with pytest.raises(LoggedOut):
+        bot.login('secret')
+    assert bot.typed == [('username_or_email_input', 'tester@example.com')]
@@ -0,0 +1,71 @@
+import glob
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from sinks import SINKS
+
+RECORDS = [{'tweet_id': str(1790000000000000000 - n), 'tweet_text': f'tweet {n}', 'like': 'NA' if n % 3 else '1.2K',
+            'media_links': [f'https://pbs.twimg.com/media/{n}.jpg'] if n % 2 else []} for n in range(10)]
+
+
+def read_segment(path):
+    if path.endswith('.csv'):
+        return pd.read_csv(path, dtype=str, keep_default_na=False).to_dict('records')
+    if path.endswith('.jsonl'):
+        with open(path) as file:
+            return [json.loads(line) for line in file]
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    return pyarrow_parquet.read_table(path).to_pylist()
+
+
+def read_segment_text(path, name):
+    with open(path) as file:
+        lines = file.read().splitlines()
+    return lines[1:] if name == 'csv' else lines
+
+
+def expected(name):
+    if name == 'csv':
+        return [{**record, 'media_links': str(record['media_links'])} for record in RECORDS]
+    return RECORDS
+
+
+@pytest.mark.parametrize('name', sorted(SINKS))
+def test_rows_round_trip(name, tmp_path):
+    if name == 'parquet':
+        pytest.importorskip('pyarrow')
+    with SINKS[name](str(tmp_path / 'tweets'), flush_rows=4) as sink:
+        sink.write(RECORDS[:5])
+        sink.write(pd.DataFrame(RECORDS[5:]))
+    assert len(sink.segments) == 1
+    assert read_segment(sink.segments[0]) == expected(name)
+
+
+@pytest.mark.parametrize('name', sorted(SINKS))
+def test_segment_is_renamed_once_finished(name, tmp_path):
+    if name == 'parquet':
+        pytest.importorskip('pyarrow')
+    sink = SINKS[name](str(tmp_path / 'tweets'), flush_rows=1000)
+    sink.write(RECORDS)
+    sink.flush()
+    part_path = sink.part_path
+    assert os.listdir(tmp_path) == [os.path.basename(part_path)]
+    if name != 'parquet':
+        # Flushed batches of the text sinks can be read back from the .part file after a crash
+        assert len(read_segment_text(part_path, name)) == len(RECORDS)
+    sink.close()
+    assert not os.path.exists(part_path)
+    assert sorted(glob.glob(str(tmp_path / '*'))) == sink.segments
+    assert sink.segments[0] == part_path[:-len('.part')]
+
+
+def test_segments_rotate_by_size(tmp_path):
+    with SINKS['jsonl'](str(tmp_path / 'tweets'), flush_rows=2, rotate_bytes=1) as sink:
+        for start in range(0, len(RECORDS), 2):
+            sink.write(RECORDS[start:start + 2])
+    assert len(sink.segments) == 5
+    assert [record for path in sink.segments for record in read_segment(path)] == RECORDS
+    assert not glob.glob(str(tmp_path / '*.part'))
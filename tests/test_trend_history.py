@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from trend_history import TrendHistory  # noqa: E402
+
+
+def trends(*texts, posts=None):
+    return [{'rank': str(rank), 'tag_or_text': text, 'trending_in': 'Trending in Testland',
+             'posts': 'NA' if posts is None else posts[rank - 1]} for rank, text in enumerate(texts, start=1)]
+
+
+def changes(diffs):
+    return {row['key']: row['change'] for row in diffs.to_dict('records')}
+
+
+def test_snapshot_is_diffed_against_the_latest_state(tmp_path):
+    history = TrendHistory(str(tmp_path))
+    history.add_snapshot({'trending': trends('#Python', 'News', 'Matchday', posts=['1K', '500', 'NA']),
+                          'sports': trends('Matchday')}, '2024-05-01 12:00')
+    diffs = history.add_snapshot({'trending': trends('News', ' #python', 'Weather', posts=['800', '1.5K', '1'])},
+                                 '2024-05-01 14:00')
+
+    assert changes(diffs) == {'news': 'moved', '#python': 'moved', 'weather': 'entered', 'matchday': 'exited'}
+    python = diffs[diffs['key'] == '#python'].iloc[0]
+    assert (python['rank'], python['previous_rank'], python['rank_delta']) == (2, 1, -1)
+    assert (python['posts_delta'], python['posts_per_hour']) == (500, 250.0)
+    # The sports tab was not in the snapshot, so its trends did not exit
+    latest = history.latest()
+    assert latest[latest['tab'] == 'sports']['key'].tolist() == ['matchday']
+    news = latest[latest['key'] == 'news'].iloc[0]
+    assert str(news['first_seen']) == '2024-05-01 12:00:00+00:00'
+
+    # The state is read back from latest.parquet by a new instance
+    diffs = TrendHistory(str(tmp_path)).add_snapshot({'trending': trends('News', '#Python', 'Weather')},
+                                                     '2024-05-01 15:00')
+    assert set(changes(diffs).values()) == {'stayed'}
+
+
+def test_series_and_filters(tmp_path):
+    history = TrendHistory(str(tmp_path))
+    for hour, texts in enumerate([('#Python', 'News'), ('News', '#Python'), ('News',), ('#PYTHON', 'News')]):
+        history.add_snapshot({'trending': trends(*texts)}, f'2024-05-0{1 + hour // 2} 1{hour}:00')
+
+    series = history.series('#python')
+    assert series['rank'].tolist() == [1, 2, 1]
+    assert series['rank_delta'].tolist()[1:] == [-1, 1]
+    assert len(history.snapshots(since='2024-05-02')) == 3
+    assert len(history.snapshots(until='2024-05-02', tag_or_text='news')) == 2
+    assert history.diffs(changes=['exited'])['key'].tolist() == ['#python']
+
+
+def test_compaction_keeps_every_row_once(tmp_path, monkeypatch):
+    history = TrendHistory(str(tmp_path))
+    history.add_snapshot({'trending': trends('#Python', 'News')}, '2024-05-01 10:00')
+    history.add_snapshot({'trending': trends('News', '#Python')}, '2024-05-01 11:00')
+    assert history.compact(before='2024-05-02') == 2
+    assert len(history.snapshots()) == 4
+
+    # A snapshot added to a compacted day is read along with data.parquet, then merged into it
+    history.add_snapshot({'trending': trends('News')}, '2024-05-01 12:00')
+    assert len(history.snapshots()) == 5
+    partition = os.path.join(str(tmp_path), 'snapshots', 'date=2024-05-01')
+
+    # Compaction stops after replacing data.parquet, before deleting the merged parts
+    history.add_snapshot({'trending': trends('Weather')}, '2024-05-01 13:00')
+    remove = os.remove
+    monkeypatch.setattr(os, 'remove', lambda path: None)
+    assert history.compact(before='2024-05-02') == 2
+    monkeypatch.setattr(os, 'remove', remove)
+    assert len(os.listdir(partition)) == 3
+    assert len(history.snapshots()) == 6
+
+    assert history.compact(before='2024-05-02') == 0
+    assert os.listdir(partition) == ['data.parquet']
+    assert history.snapshots()['key'].value_counts().to_dict() == {'news': 3, '#python': 2, 'weather': 1}
+    assert len(history.diffs()) == 8
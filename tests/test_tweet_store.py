@@ -0,0 +1,74 @@
+import sqlite3
+
+from tweet_store import TweetStore
+
+
+def tweet(fetched, like='1.2K', view='NA', text='first version', tweet_id='1790000000000000000'):
+    return {'tweet_id': tweet_id, 'username': '@user', 'display_name': 'User', 'tweet_text': text,
+            'reply': '', 'retweet': '3', 'like': like, 'view': view, 'media_links': [],
+            'tweet_datetime': '12:00:00 01-05-2024 +0000', 'fetch_datetime': fetched}
+
+
+def test_refetched_tweet_is_updated_not_duplicated(tmp_path):
+    with TweetStore(str(tmp_path / 'tweets.sqlite'), batch_size=1) as store:
+        store.write([tweet('12:00:00 02-05-2024 +0000')])
+        store.write([tweet('12:00:00 03-05-2024 +0000', like='2K', text='edited')])
+        # An older fetch written late does not overwrite the latest one
+        store.write([tweet('12:00:00 01-05-2024 +0200', like='1', text='stale')])
+        rows = store.recent()
+    assert len(rows) == 1
+    assert rows[0]['tweet_text'] == 'edited'
+    assert rows[0]['like'] == 2000
+    assert rows[0]['first_fetched'] == '2024-05-02T12:00:00+00:00'
+    assert rows[0]['last_fetched'] == '2024-05-03T12:00:00+00:00'
+
+
+def test_stats_history_keeps_every_fetch_as_integers(tmp_path):
+    with TweetStore(str(tmp_path / 'tweets.sqlite')) as store:
+        store.write([tweet('12:00:00 02-05-2024 +0000'), tweet('12:00:00 03-05-2024 +0000', like='1,234', view='5M'),
+                     {'tweet_id': 'NA', 'like': '1'}])
+        store.flush()
+        history = store.stats_history('1790000000000000000')
+        assert store.skipped == 1
+    assert history == [
+        {'fetch_time': '2024-05-02T12:00:00+00:00', 'reply': 0, 'retweet': 3, 'like': 1200, 'view': None},
+        {'fetch_time': '2024-05-03T12:00:00+00:00', 'reply': 0, 'retweet': 3, 'like': 1234, 'view': 5000000}
+    ]
+
+
+def test_stats_can_be_aggregated_in_sql(tmp_path):
+    path = str(tmp_path / 'tweets.sqlite')
+    with TweetStore(path) as store:
+        store.write([tweet('12:00:00 02-05-2024 +0000', like='1.5K', tweet_id='1'),
+                     tweet('12:00:00 02-05-2024 +0000', like='500', tweet_id='2'),
+                     tweet('12:00:00 02-05-2024 +0000', like='NA', tweet_id='3')])
+    connection = sqlite3.connect(path)
+    assert connection.execute('SELECT SUM("like"), COUNT("like"), typeof(MAX("like")) FROM tweets').fetchone() == (
+        2000, 2, 'integer')
+    connection.close()
+
+
+def test_text_stats_of_an_old_store_are_converted(tmp_path):
+    path = str(tmp_path / 'tweets.sqlite')
+    connection = sqlite3.connect(path)
+    connection.executescript('''
+        CREATE TABLE tweets (tweet_id TEXT PRIMARY KEY, username TEXT, display_name TEXT, tweet_text TEXT,
+            media_links TEXT, tweet_time TEXT, reply TEXT, retweet TEXT, "like" TEXT, view TEXT,
+            first_fetched TEXT, last_fetched TEXT);
+        CREATE INDEX idx_tweets_username_time ON tweets (username, tweet_time);
+        CREATE INDEX idx_tweets_time ON tweets (tweet_time);
+        CREATE TABLE tweet_stats (tweet_id TEXT NOT NULL, fetch_time TEXT NOT NULL, reply TEXT, retweet TEXT,
+            "like" TEXT, view TEXT, PRIMARY KEY (tweet_id, fetch_time)) WITHOUT ROWID;
+        INSERT INTO tweets VALUES ('1', '@user', 'User', 'text', '[]', '2024-05-01T12:00:00+00:00',
+            '', '3', '1.2K', 'NA', '2024-05-02T12:00:00+00:00', '2024-05-02T12:00:00+00:00');
+        INSERT INTO tweet_stats VALUES ('1', '2024-05-02T12:00:00+00:00', '', '3', '1.2K', 'NA');
+    ''')
+    connection.close()
+
+    with TweetStore(path) as store:
+        assert [(row['reply'], row['like'], row['view']) for row in store.recent()] == [(0, 1200, None)]
+        assert store.stats_history('1')[0]['like'] == 1200
+        store.write([tweet('12:00:00 03-05-2024 +0000', like='2K', tweet_id='1')])
+    with TweetStore(path) as store:
+        assert [row['like'] for row in store.stats_history('1')] == [1200, 2000]
+        assert store.recent(username='@user')[0]['like'] == 2000
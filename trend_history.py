@@ -0,0 +1,489 @@
+"""
+History of the explore tabs across runs: trend snapshots, their diffs and rank and posts time series.
+
+Every snapshot of the explore tabs is appended to a Parquet dataset partitioned by day. Each snapshot is
+a new file, nothing is rewritten. A trend is keyed by its tab and its normalized tag_or_text, see
+normalize_key. The latest state of every tab is kept in latest.parquet, so a new snapshot is only diffed
+against that state: trends that entered or exited, rank deltas and posts growth. The history is never
+re-read for this. Diffs are stored in a second dataset, partitioned the same way:
+
+    <directory>/snapshots/date=2024-05-01/part-20240501T120000000000.parquet
+    <directory>/diffs/date=2024-05-01/part-20240501T120000000000.parquet
+    <directory>/latest.parquet
+
+Queries only open the day partitions in their time range and push their tab, key and time filters down
+to the Parquet row group statistics. compact merges the files of past days into one sorted data.parquet
+per day, so months of 5 minute snapshots stay a few files per day. Snapshots added to a compacted day are
+read along with its data.parquet until the next compaction. Requires pyarrow.
+
+    history = TrendHistory('trend_history')
+    bot.data_from_explore_tabs()
+    history.record(bot)
+    history.series('#Python', tab='trending', since='2024-05-01')
+"""
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import unicodedata
+
+import pandas as pd
+
+from normalize import parse_counts
+
+SNAPSHOT_COLUMNS = ['snapshot_time', 'tab', 'key', 'tag_or_text', 'trending_in', 'rank', 'posts']
+DIFF_COLUMNS = ['snapshot_time', 'previous_time', 'tab', 'key', 'tag_or_text', 'trending_in', 'change', 'rank',
+                'previous_rank', 'rank_delta', 'posts', 'previous_posts', 'posts_delta', 'posts_per_hour']
+STATE_COLUMNS = ['snapshot_time', 'tab', 'key', 'tag_or_text', 'trending_in', 'rank', 'posts', 'first_seen']
+
+
+def normalize_key(tag_or_text):
+    """
+    Key of a trend within its tab: the text in Unicode NFKC form, case folded, with collapsed whitespace.
+
+    Parameters:
+        tag_or_text (str): Trend text, e.g. '#Python ' or 'Champions League'.
+
+    Returns:
+        str: The key, e.g. '#python' or 'champions league'.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', str(tag_or_text)).split()).casefold()
+
+
+def to_timestamp(value):
+    """
+    Returns:
+        Timestamp: The value as a UTC timestamp, naive values being taken as UTC, or None if value is None.
+    """
+    if value is None:
+        return None
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize('UTC')
+    return timestamp.tz_convert('UTC')
+
+
+class TrendHistory:
+    """
+    Append-only Parquet history of explore tab snapshots, with incremental diffs.
+    """
+    def __init__(self, directory='trend_history', compression='zstd', row_group_size=64_000):
+        """
+        Initializes TrendHistory object.
+
+        Parameters:
+            directory (str): Directory of the datasets. Defaults to 'trend_history'.
+            compression (str): Parquet compression codec. Defaults to 'zstd'.
+            row_group_size (int): Rows per row group of the compacted files. Default is 64000.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow
+            import pyarrow.dataset
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('TrendHistory requires pyarrow, install it with "pip install pyarrow".')
+        self.pa = pyarrow
+        self.ds = pyarrow.dataset
+        self.pq = pyarrow.parquet
+        self.directory = directory
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.state_path = os.path.join(directory, 'latest.parquet')
+        self.state = None
+
+        timestamp = pyarrow.timestamp('us', tz='UTC')
+        self.schemas = {
+            'snapshots': pyarrow.schema([
+                ('snapshot_time', timestamp), ('tab', pyarrow.string()), ('key', pyarrow.string()),
+                ('tag_or_text', pyarrow.string()), ('trending_in', pyarrow.string()), ('rank', pyarrow.int32()),
+                ('posts', pyarrow.int64())]),
+            'diffs': pyarrow.schema([
+                ('snapshot_time', timestamp), ('previous_time', timestamp), ('tab', pyarrow.string()),
+                ('key', pyarrow.string()), ('tag_or_text', pyarrow.string()), ('trending_in', pyarrow.string()),
+                ('change', pyarrow.string()), ('rank', pyarrow.int32()), ('previous_rank', pyarrow.int32()),
+                ('rank_delta', pyarrow.int32()), ('posts', pyarrow.int64()), ('previous_posts', pyarrow.int64()),
+                ('posts_delta', pyarrow.int64()), ('posts_per_hour', pyarrow.float64())]),
+            'latest': pyarrow.schema([
+                ('snapshot_time', timestamp), ('tab', pyarrow.string()), ('key', pyarrow.string()),
+                ('tag_or_text', pyarrow.string()), ('trending_in', pyarrow.string()), ('rank', pyarrow.int32()),
+                ('posts', pyarrow.int64()), ('first_seen', timestamp)])
+        }
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def snapshot_records(tab_name, rows):
+        """
+        Compact records of the trends of one tab, as scraped by BotFunctions.explore_tab_data.
+
+        Trends without a text are dropped, and a trend listed twice only keeps its first, best ranked, record.
+        Only the 'trending' tab shows ranks, the trends of the other tabs are ranked by their position.
+
+        Parameters:
+            tab_name (str): Name of the explore tab.
+            rows (DataFrame or list): Trend rows of the tab, with tag_or_text, posts and trending_in, and rank
+                for the 'trending' tab.
+
+        Returns:
+            list: Dictionaries with tab, key, tag_or_text, trending_in, rank and posts. posts is still the scraped
+                string, see add_snapshot.
+        """
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.to_dict('records')
+        records = {}
+        for row in rows:
+            tag_or_text = row.get('tag_or_text')
+            if tag_or_text in ('NA', None):
+                continue
+            key = normalize_key(tag_or_text)
+            if not key or key in records:
+                continue
+            rank = pd.to_numeric(row['rank'], errors='coerce') if 'rank' in row else len(records) + 1
+            records[key] = {
+                'tab': tab_name,
+                'key': key,
+                'tag_or_text': str(tag_or_text),
+                'trending_in': None if row.get('trending_in') is None else str(row['trending_in']),
+                'rank': None if pd.isna(rank) else int(rank),
+                'posts': row.get('posts')
+            }
+        return list(records.values())
+
+    def to_pandas(self, table):
+        """
+        Returns:
+            DataFrame: The Arrow table, with nullable 'Int64' integer columns.
+        """
+        integers = {self.pa.int32(): pd.Int64Dtype(), self.pa.int64(): pd.Int64Dtype()}
+        return table.to_pandas(types_mapper=integers.get)
+
+    def load_state(self):
+        """
+        Returns:
+            dict: (tab, key) mapped to the latest record of every trend still shown, read from latest.parquet on
+                first use.
+        """
+        if self.state is None:
+            self.state = {}
+            if os.path.exists(self.state_path):
+                for record in self.pq.read_table(self.state_path).to_pylist():
+                    self.state[(record['tab'], record['key'])] = record
+        return self.state
+
+    def add_snapshot(self, trends, snapshot_time=None):
+        """
+        Append a snapshot of explore tabs and diff it against the latest state of the same tabs.
+
+        Trends of a tab present in the latest state but missing from the snapshot have exited. Tabs absent
+        from the snapshot are left as they are.
+
+        Parameters:
+            trends (dict): Tab name mapped to its trend rows, see snapshot_records.
+            snapshot_time (datetime or str): Optional. Time of the snapshot. Defaults to now.
+
+        Returns:
+            DataFrame: The diff records, with DIFF_COLUMNS. change is 'entered', 'exited', 'moved' or 'stayed'.
+                rank_delta is positive when a trend climbs, posts_per_hour is the posts growth since the
+                previous snapshot of the tab.
+        """
+        snapshot_time = to_timestamp(snapshot_time or datetime.now(timezone.utc)).floor('us').to_pydatetime()
+        records = [record for tab_name, rows in trends.items() for record in self.snapshot_records(tab_name, rows)]
+        posts = parse_counts(pd.Series([record['posts'] for record in records], dtype=object))
+        for record, count in zip(records, posts):
+            record['snapshot_time'] = snapshot_time
+            record['posts'] = None if pd.isna(count) else int(count)
+
+        state = self.load_state()
+        current = {}
+        diffs = []
+        for record in records:
+            previous = state.get((record['tab'], record['key']))
+            current[(record['tab'], record['key'])] = {
+                **record, 'first_seen': snapshot_time if previous is None else previous['first_seen']}
+            diffs.append(self.diff_record(snapshot_time, record, previous))
+        for (tab_name, key), previous in state.items():
+            if tab_name in trends and (tab_name, key) not in current:
+                diffs.append(self.diff_record(snapshot_time, None, previous))
+        self.state = {**{key: record for key, record in state.items() if key[0] not in trends}, **current}
+
+        self.append('snapshots', records, snapshot_time)
+        self.append('diffs', diffs, snapshot_time)
+        self.write_table(list(self.state.values()), 'latest', self.state_path)
+        return self.to_pandas(self.pa.Table.from_pylist(diffs, schema=self.schemas['diffs']))
+
+    @staticmethod
+    def diff_record(snapshot_time, record, previous):
+        """
+        Change of one trend between the latest state of its tab and a new snapshot.
+
+        Parameters:
+            snapshot_time (datetime): Time of the new snapshot.
+            record (dict): Record of the trend in the new snapshot, or None if it exited.
+            previous (dict): Record of the trend in the latest state, or None if it entered.
+
+        Returns:
+            dict: The diff record, with DIFF_COLUMNS.
+        """
+        latest = record or previous
+        diff = {
+            'snapshot_time': snapshot_time,
+            'previous_time': None if previous is None else previous['snapshot_time'],
+            'tab': latest['tab'],
+            'key': latest['key'],
+            'tag_or_text': latest['tag_or_text'],
+            'trending_in': latest['trending_in'],
+            'rank': None if record is None else record['rank'],
+            'previous_rank': None if previous is None else previous['rank'],
+            'posts': None if record is None else record['posts'],
+            'previous_posts': None if previous is None else previous['posts'],
+            'rank_delta': None,
+            'posts_delta': None,
+            'posts_per_hour': None
+        }
+        if previous is None:
+            diff['change'] = 'entered'
+        elif record is None:
+            diff['change'] = 'exited'
+        else:
+            diff['change'] = 'stayed' if diff['rank'] == diff['previous_rank'] else 'moved'
+            if diff['rank'] is not None and diff['previous_rank'] is not None:
+                diff['rank_delta'] = diff['previous_rank'] - diff['rank']
+            if diff['posts'] is not None and diff['previous_posts'] is not None:
+                diff['posts_delta'] = diff['posts'] - diff['previous_posts']
+                hours = (snapshot_time - diff['previous_time']).total_seconds() / 3600
+                if hours > 0:
+                    diff['posts_per_hour'] = diff['posts_delta'] / hours
+        return diff
+
+    def record(self, bot, snapshot_time=None):
+        """
+        Add a snapshot of the explore tabs scraped by a bot, see add_snapshot.
+
+        Parameters:
+            bot (BotFunctions): Bot whose trending row buffers hold the scraped tabs. Empty tabs are skipped.
+            snapshot_time (datetime or str): Optional. Time of the snapshot. Defaults to now.
+
+        Returns:
+            DataFrame: The diff records.
+        """
+        return self.add_snapshot({tab_name: rows.to_dataframe() for tab_name, rows in bot.trending_rows.items()
+                                  if len(rows)}, snapshot_time)
+
+    def write_table(self, records, schema, path):
+        """
+        Write records to a Parquet file, replacing it atomically.
+
+        Returns:
+            None
+        """
+        table = self.pa.Table.from_pylist(records, schema=self.schemas[schema])
+        self.pq.write_table(table, path + '.tmp', compression=self.compression, row_group_size=self.row_group_size)
+        os.replace(path + '.tmp', path)
+
+    def append(self, dataset, records, snapshot_time):
+        """
+        Add a file to the day partition of a dataset.
+
+        Returns:
+            None
+        """
+        partition = os.path.join(self.directory, dataset, f'date={snapshot_time:%Y-%m-%d}')
+        os.makedirs(partition, exist_ok=True)
+        path = os.path.join(partition, f'part-{snapshot_time:%Y%m%dT%H%M%S%f}.parquet')
+        suffix = 0
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(partition, f'part-{snapshot_time:%Y%m%dT%H%M%S%f}-{suffix}.parquet')
+        self.write_table(records, dataset, path)
+
+    def partitions(self, dataset, since=None, until=None):
+        """
+        Day partitions of a dataset overlapping a time range, oldest first.
+
+        Returns:
+            list: (day, directory) tuples, day being a 'YYYY-MM-DD' string.
+        """
+        root = os.path.join(self.directory, dataset)
+        if not os.path.isdir(root):
+            return []
+        first = None if since is None else f'{since:%Y-%m-%d}'
+        last = None if until is None else f'{until:%Y-%m-%d}'
+        days = []
+        for name in sorted(os.listdir(root)):
+            if not name.startswith('date='):
+                continue
+            day = name[len('date='):]
+            if (first is None or day >= first) and (last is None or day <= last):
+                days.append((day, os.path.join(root, name)))
+        return days
+
+    def merged_parts(self, path):
+        """
+        Returns:
+            set: Names of the snapshot parts merged into a compacted data.parquet, read from its metadata.
+        """
+        metadata = self.pq.read_schema(path).metadata or {}
+        return set(json.loads(metadata.get(b'merged_parts', b'[]')))
+
+    def partition_files(self, partition):
+        """
+        Data files of a day partition: its compacted data.parquet, if any, and the snapshot parts not merged
+        into it. Parts merged by a compaction that stopped before deleting them are skipped, see compact.
+
+        Returns:
+            list: File paths.
+        """
+        names = sorted(os.listdir(partition))
+        files = []
+        merged = set()
+        if 'data.parquet' in names:
+            files.append(os.path.join(partition, 'data.parquet'))
+            merged = self.merged_parts(files[0])
+        return files + [os.path.join(partition, name) for name in names
+                        if name.startswith('part-') and name.endswith('.parquet') and name not in merged]
+
+    def read(self, dataset, since=None, until=None, tab=None, tag_or_text=None, columns=None, where=None):
+        """
+        Read the records of a dataset in a time range.
+
+        Parameters:
+            dataset (str): 'snapshots' or 'diffs'.
+            since (datetime or str): Optional. Only snapshots at or after this time. Naive times are UTC.
+            until (datetime or str): Optional. Only snapshots before this time.
+            tab (str): Optional. Only this tab.
+            tag_or_text (str): Optional. Only this trend, matched by its key, see normalize_key.
+            columns (list): Optional. Columns to read. Defaults to all of them.
+            where: Optional. Extra pyarrow.dataset filter expression.
+
+        Returns:
+            DataFrame: The records, oldest first.
+        """
+        since, until = to_timestamp(since), to_timestamp(until)
+        files = [path for day, partition in self.partitions(dataset, since, until)
+                 for path in self.partition_files(partition)]
+        schema = self.schemas[dataset]
+        if not files:
+            return self.to_pandas(schema.empty_table().select(columns or schema.names))
+
+        field = self.ds.field
+        time_type = schema.field('snapshot_time').type
+        conditions = [] if where is None else [where]
+        if since is not None:
+            conditions.append(field('snapshot_time') >= self.pa.scalar(since.to_pydatetime(), type=time_type))
+        if until is not None:
+            conditions.append(field('snapshot_time') < self.pa.scalar(until.to_pydatetime(), type=time_type))
+        if tab is not None:
+            conditions.append(field('tab') == tab)
+        if tag_or_text is not None:
+            conditions.append(field('key') == normalize_key(tag_or_text))
+        condition = None
+        for expression in conditions:
+            condition = expression if condition is None else condition & expression
+
+        source = self.ds.dataset(files, schema=schema, format='parquet')
+        df = self.to_pandas(source.to_table(columns=columns, filter=condition))
+        if 'snapshot_time' in df:
+            df = df.sort_values('snapshot_time', kind='stable').reset_index(drop=True)
+        return df
+
+    def snapshots(self, since=None, until=None, tab=None, tag_or_text=None, columns=None):
+        """
+        Snapshot records in a time range, see read.
+
+        Returns:
+            DataFrame: SNAPSHOT_COLUMNS records, oldest first.
+        """
+        return self.read('snapshots', since, until, tab, tag_or_text, columns)
+
+    def diffs(self, since=None, until=None, tab=None, tag_or_text=None, changes=None):
+        """
+        Diff records in a time range, see read and add_snapshot.
+
+        Parameters:
+            changes (list): Optional. Only these changes, e.g. ['entered', 'exited'].
+
+        Returns:
+            DataFrame: DIFF_COLUMNS records, oldest first.
+        """
+        where = None if changes is None else self.ds.field('change').isin(list(changes))
+        return self.read('diffs', since, until, tab, tag_or_text, where=where)
+
+    def series(self, tag_or_text, tab='trending', since=None, until=None):
+        """
+        Rank and posts time series of one trend.
+
+        Parameters:
+            tag_or_text (str): The trend, matched by its key, see normalize_key.
+            tab (str): Name of the explore tab. Defaults to 'trending'.
+            since (datetime or str): Optional. Start of the series.
+            until (datetime or str): Optional. End of the series, excluded.
+
+        Returns:
+            DataFrame: rank, rank_delta (positive when climbing), posts and trending_in, indexed by
+                snapshot_time. Snapshots in which the trend was absent are not listed.
+        """
+        df = self.read('snapshots', since, until, tab, tag_or_text,
+                       columns=['snapshot_time', 'rank', 'posts', 'trending_in'])
+        df.insert(1, 'rank_delta', -df['rank'].diff())
+        return df.set_index('snapshot_time')
+
+    def latest(self, tab=None):
+        """
+        The trends of the latest snapshot of every tab.
+
+        Parameters:
+            tab (str): Optional. Only this tab.
+
+        Returns:
+            DataFrame: STATE_COLUMNS, with the first_seen time of every trend, sorted by tab and rank.
+        """
+        records = [record for record in self.load_state().values() if tab is None or record['tab'] == tab]
+        df = self.to_pandas(self.pa.Table.from_pylist(records, schema=self.schemas['latest']))
+        return df.sort_values(['tab', 'rank'], kind='stable').reset_index(drop=True)
+
+    def compact(self, before=None):
+        """
+        Merge the snapshot files of every past day into one data.parquet per day and dataset.
+
+        Rows are sorted by tab, key and snapshot time, so the row group statistics let queries of one trend
+        skip most of a day. Parts written to a day after its compaction are merged into its data.parquet by the
+        next one. The names of the merged parts are stored in the metadata of data.parquet and the parts are
+        deleted once it is in place. If compaction stops in between, readers skip the merged parts and the next
+        compaction deletes them, so no row is read twice.
+
+        Parameters:
+            before (datetime or str): Optional. Only days before this one. Defaults to today (UTC), whose
+                partition is still being appended to.
+
+        Returns:
+            int: Number of day partitions compacted.
+        """
+        before = to_timestamp(before or datetime.now(timezone.utc))
+        last_day = f'{before - timedelta(days=1):%Y-%m-%d}'
+        compacted = 0
+        for dataset in ('snapshots', 'diffs'):
+            for day, partition in self.partitions(dataset):
+                if day > last_day:
+                    continue
+                path = os.path.join(partition, 'data.parquet')
+                files = self.partition_files(partition)
+                if os.path.exists(path):
+                    # Parts merged by an earlier compaction that stopped before deleting them
+                    for name in self.merged_parts(path) & set(os.listdir(partition)):
+                        os.remove(os.path.join(partition, name))
+                parts = [file for file in files if file != path]
+                if not parts:
+                    continue
+                tables = [self.pq.read_table(file, schema=self.schemas[dataset]) for file in files]
+                table = self.pa.concat_tables(tables).sort_by([('tab', 'ascending'), ('key', 'ascending'),
+                                                               ('snapshot_time', 'ascending')])
+                table = table.replace_schema_metadata(
+                    {'merged_parts': json.dumps([os.path.basename(part) for part in parts])})
+                self.pq.write_table(table, path + '.tmp', compression=self.compression,
+                                    row_group_size=self.row_group_size)
+                os.replace(path + '.tmp', path)
+                for part in parts:
+                    os.remove(part)
+                compacted += 1
+        return compacted
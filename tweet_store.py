@@ -0,0 +1,274 @@
+"""
+Persistent SQLite store of scraped tweets, keyed by tweet ID.
+
+Re-scraping a tweet updates its row instead of adding a duplicate, and every fetch of its stats is kept
+in the tweet_stats history table, so engagement can be tracked over time. Stats are stored as integer
+counts ('1.2K' becomes 1200), NULL when they are missing, so they can be aggregated in SQL. The store
+implements the sink interface (write/close), so it can be attached to a bot:
+
+    store = TweetStore('tweets.sqlite')
+    bot.attach_sink(store, 'tweets')
+"""
+from datetime import datetime, timezone
+import json
+import sqlite3
+import threading
+
+import pandas as pd
+
+from normalize import parse_counts
+
+DATETIME_FORMAT = '%H:%M:%S %d-%m-%Y %z'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tweets (
+    tweet_id TEXT PRIMARY KEY,
+    username TEXT,
+    display_name TEXT,
+    tweet_text TEXT,
+    media_links TEXT,
+    tweet_time TEXT,
+    reply INTEGER,
+    retweet INTEGER,
+    "like" INTEGER,
+    view INTEGER,
+    first_fetched TEXT,
+    last_fetched TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_username_time ON tweets (username, tweet_time);
+CREATE INDEX IF NOT EXISTS idx_tweets_time ON tweets (tweet_time);
+
+CREATE TABLE IF NOT EXISTS tweet_stats (
+    tweet_id TEXT NOT NULL,
+    fetch_time TEXT NOT NULL,
+    reply INTEGER,
+    retweet INTEGER,
+    "like" INTEGER,
+    view INTEGER,
+    PRIMARY KEY (tweet_id, fetch_time)
+) WITHOUT ROWID;
+'''
+
+UPSERT_TWEET = '''
+INSERT INTO tweets (tweet_id, username, display_name, tweet_text, media_links, tweet_time,
+                    reply, retweet, "like", view, first_fetched, last_fetched)
+VALUES (:tweet_id, :username, :display_name, :tweet_text, :media_links, :tweet_time,
+        :reply, :retweet, :like, :view, :fetch_time, :fetch_time)
+ON CONFLICT (tweet_id) DO UPDATE SET
+    username = excluded.username,
+    display_name = excluded.display_name,
+    tweet_text = excluded.tweet_text,
+    media_links = excluded.media_links,
+    tweet_time = excluded.tweet_time,
+    reply = excluded.reply,
+    retweet = excluded.retweet,
+    "like" = excluded."like",
+    view = excluded.view,
+    last_fetched = excluded.last_fetched
+WHERE excluded.last_fetched >= tweets.last_fetched
+'''
+
+INSERT_STATS = '''
+INSERT OR IGNORE INTO tweet_stats (tweet_id, fetch_time, reply, retweet, "like", view)
+VALUES (:tweet_id, :fetch_time, :reply, :retweet, :like, :view)
+'''
+
+STAT_COLUMNS = ('reply', 'retweet', 'like', 'view')
+
+
+def to_iso(value):
+    """
+    Convert a datetime string in the bot's '%H:%M:%S %d-%m-%Y %z' format to a sortable ISO 8601 UTC string.
+
+    Parameters:
+        value (str): Datetime string, or 'NA'.
+
+    Returns:
+        str: ISO 8601 datetime in UTC, or None if the value is missing or malformed.
+    """
+    try:
+        return datetime.strptime(value, DATETIME_FORMAT).astimezone(timezone.utc).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_stats(rows):
+    """
+    Convert the stats of rows, in place, from the strings rendered by Twitter into integer counts.
+
+    Parameters:
+        rows (list): Dictionaries with the STAT_COLUMNS keys. Missing or unparsable stats ('NA') become None.
+
+    Returns:
+        None
+    """
+    for column in STAT_COLUMNS:
+        counts = parse_counts(pd.Series([row[column] for row in rows], dtype=object))
+        for row, count in zip(rows, counts.tolist()):
+            row[column] = None if count is pd.NA else int(count)
+
+
+class TweetStore:
+    """
+    A SQLite backed store of tweets with a history of their stats.
+    """
+    def __init__(self, path='tweets.sqlite', batch_size=500):
+        """
+        Initializes TweetStore object.
+
+        Parameters:
+            path (str): Path of the SQLite database file. Defaults to 'tweets.sqlite'.
+            batch_size (int): Number of buffered rows upserted in one transaction. Default is 500.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.skipped = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.upgrade()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def upgrade(self):
+        """
+        Rebuild the tables of a store created when stats were stored as text, with integer stats.
+
+        A TEXT column would turn the integers back into text, so the tables are recreated and their rows copied.
+
+        Returns:
+            None
+        """
+        types = {row['name']: row['type'] for row in self.connection.execute('PRAGMA table_info(tweets)')}
+        if types.get('reply') != 'TEXT':
+            return
+        with self.connection:
+            for table in ('tweets', 'tweet_stats'):
+                self.connection.execute(f'ALTER TABLE {table} RENAME TO {table}_text')
+            self.connection.execute('DROP INDEX idx_tweets_username_time')
+            self.connection.execute('DROP INDEX idx_tweets_time')
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    self.connection.execute(statement)
+            for table in ('tweets', 'tweet_stats'):
+                rows = [dict(row) for row in self.connection.execute(f'SELECT * FROM {table}_text')]
+                if rows:
+                    parse_stats(rows)
+                    columns = ', '.join(f'"{column}"' for column in rows[0])
+                    values = ', '.join(f':{column}' for column in rows[0])
+                    self.connection.executemany(f'INSERT INTO {table} ({columns}) VALUES ({values})', rows)
+                self.connection.execute(f'DROP TABLE {table}_text')
+
+    def write(self, records):
+        """
+        Buffer tweet rows, upserting them once batch_size rows are buffered.
+
+        Parameters:
+            records (list or DataFrame): Tweet rows, as produced by BotFunctions.
+
+        Returns:
+            None
+        """
+        if hasattr(records, 'to_dict'):
+            records = records.to_dict('records')
+        with self.lock:
+            self.buffer.extend(records)
+            if len(self.buffer) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        """
+        Upsert the buffered rows.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        rows = []
+        for record in self.buffer:
+            if record.get('tweet_id', 'NA') in ('NA', None):
+                self.skipped += 1
+                continue
+            media_links = record.get('media_links')
+            rows.append({
+                'tweet_id': str(record['tweet_id']),
+                'username': record.get('username'),
+                'display_name': record.get('display_name'),
+                'tweet_text': record.get('tweet_text'),
+                'media_links': json.dumps(media_links if isinstance(media_links, list) else []),
+                'tweet_time': to_iso(record.get('tweet_datetime')),
+                'reply': record.get('reply'),
+                'retweet': record.get('retweet'),
+                'like': record.get('like'),
+                'view': record.get('view'),
+                'fetch_time': to_iso(record.get('fetch_datetime')) or datetime.now(timezone.utc).isoformat()
+            })
+        self.buffer = []
+        if not rows:
+            return
+        parse_stats(rows)
+        with self.connection:
+            self.connection.executemany(UPSERT_TWEET, rows)
+            self.connection.executemany(INSERT_STATS, rows)
+
+    def close(self):
+        """
+        Upsert the buffered rows and close the database.
+
+        Returns:
+            None
+        """
+        self.flush()
+        self.connection.close()
+
+    def recent(self, username=None, since=None, limit=100):
+        """
+        Query the most recent tweets, newest first, using the tweet time indexes.
+
+        Parameters:
+            username (str): Optional. Only tweets of this username, e.g. '@user'.
+            since (datetime or str): Optional. Only tweets posted at or after this time (UTC ISO string or aware datetime).
+            limit (int): Maximum number of tweets returned. Default is 100.
+
+        Returns:
+            list: Tweets as dictionaries.
+        """
+        conditions, params = [], []
+        if username is not None:
+            conditions.append('username = ?')
+            params.append(username)
+        if since is not None:
+            conditions.append('tweet_time >= ?')
+            params.append(since.astimezone(timezone.utc).isoformat() if isinstance(since, datetime) else since)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self.lock:
+            rows = self.connection.execute(
+                f'SELECT * FROM tweets {where} ORDER BY tweet_time DESC LIMIT ?', (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats_history(self, tweet_id):
+        """
+        Query every stats snapshot of a tweet, oldest first.
+
+        Parameters:
+            tweet_id (str): ID of the tweet.
+
+        Returns:
+            list: Snapshots as dictionaries with fetch_time and the reply, retweet, like and view counts.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT fetch_time, reply, retweet, "like", view FROM tweet_stats WHERE tweet_id = ? ORDER BY fetch_time',
+                (str(tweet_id),)).fetchall()
+        return [dict(row) for row in rows]
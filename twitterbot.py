@@ -1,16 +1,114 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.edge.options import Options
+from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
 import time
 import pandas as pd
-from datetime import datetime
-import pytz
-import traceback
-import sys
-import os
-import pickle
+from contextlib import contextmanager
+import functools
+from datetime import datetime, timezone
+from urllib.parse import quote
+import re
+
+from checkpoints import Checkpoint
+from instrumentation import Metrics, instrument_driver, timed
+from errors import (BotError, DEFAULT_RETRY_POLICIES, FailureCounters, LoggedOut, RateLimited, SelectorTimeout,
+                    classify)
+from network_capture import NetworkCapture, parse_trends, parse_tweets
+from normalize import normalize_trends, normalize_tweets
+from row_buffer import RowBuffer
+from selector_registry import SelectorRegistry
+from session_manager import CookieStore, SessionManager, cookies_valid, inject_cookies
+
+# Per-step wait timeouts in seconds. 'scroll' and 'login_step' replace the former fixed sleeps,
+# 'idle' is how long the page must stay quiet to be considered settled.
+DEFAULT_WAIT_TIMEOUTS = {
+    'element': 15,
+    'scroll': 5,
+    'login_step': 5,
+    'idle': 1
+}
+
+TWEET_COLUMNS = ['display_name', 'username', 'tweet_text', 'reply', 'retweet', 'like', 'view', 'media_links',
+                 'tweet_datetime', 'fetch_datetime', 'tweet_id']
+
+# Browser launch profiles for TwitterBot, keyword arguments of TwitterBot.create_driver.
+# 'fast' is meant for scrape hosts: no window, no images, media or fonts, and pages handed over once the DOM is ready.
+LAUNCH_PROFILES = {
+    'default': {
+        'browser': 'edge',
+        'headless': False,
+        'window_size': None,
+        'block_resources': False,
+        'page_load_strategy': 'normal',
+        'capture_network': False
+    },
+    'fast': {
+        'browser': 'chrome',
+        'headless': True,
+        'window_size': (1280, 2400),
+        'block_resources': True,
+        'page_load_strategy': 'eager',
+        'capture_network': False
+    }
+}
+
+# URL patterns blocked through CDP when block_resources is set. Media URLs are still read from the src attributes.
+BLOCKED_URL_PATTERNS = ['*.mp4', '*.m3u8', '*.m4s', '*.ts', '*.woff', '*.woff2', '*.ttf', '*.otf',
+                        '*video.twimg.com*', '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp']
+
+
+def operation(name):
+    """
+    Decorator running a BotFunctions method under the retry policy of the named operation.
+
+    Every failed attempt is counted in the bot's failure counters, and the error of the last attempt is raised.
+
+    Parameters:
+        name (str): Operation name, a key of BotFunctions.retry_policies.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self.retry_policies[name].run(method, self, *args, **kwargs,
+                                                 on_failure=lambda error: self.failures.record(name, error))
+        return wrapper
+    return decorator
+
+
+class UTCClock:
+    """
+    A clock formatting the current UTC time as '%H:%M:%S %d-%m-%Y %z', caching the string for the current second.
+
+    The format has a one second resolution, so the string only has to be rendered once per second, and
+    reading the clock for every row in the extraction loops costs one time.time() call.
+    """
+    def __init__(self, time_func=time.time):
+        """
+        Initializes UTCClock object.
+
+        Parameters:
+            time_func (callable): Returns the current Unix time. Defaults to time.time.
+        """
+        self.time_func = time_func
+        self.second = None
+        self.text = None
+
+    def now(self):
+        """
+        Tells the current date and time in UTC timezone.
+
+        Returns:
+            str: Current date and time formatted as '%H:%M:%S %d-%m-%Y %z'.
+        """
+        second = int(self.time_func())
+        if second != self.second:
+            self.text = datetime.fromtimestamp(second, timezone.utc).strftime('%H:%M:%S %d-%m-%Y %z')
+            self.second = second
+        return self.text
 
 
 class UI:
@@ -44,6 +142,7 @@ class UI:
     tweet_by_display_name = './div[1]//span/span'
     tweet_by_username = './/span[starts-with(text(),"@")]'
     tweet_datetime = './/time'
+    tweet_status_link = './/time/parent::a'
 
     # Explore sections XPath selectors
     explore_btn = '//a[@data-testid="AppTabBar_Explore_Link"]'
@@ -54,11 +153,237 @@ class UI:
         "sports": './/span[text()="Sports"]',
         "entertainment": './/span[text()="Entertainment"]'
     }
+    explore_tab_urls = {
+        "trending": 'https://twitter.com/explore/tabs/trending',
+        "news": 'https://twitter.com/explore/tabs/news',
+        "sports": 'https://twitter.com/explore/tabs/sports',
+        "entertainment": 'https://twitter.com/explore/tabs/entertainment'
+    }
+    # Latest tab of the search results, newest tweets first
+    search_url = 'https://twitter.com/search?q={query}&src=typed_query&f=live'
 
     # Trend section XPath selectors
     trend_window = '//div[@aria-label="Timeline: Explore"]'
     trends = '//div[@data-testid="trend"]'
     single_trend_data = './div/div'
+    # Trends not extracted yet, see explore_step_script
+    new_trends = '//div[@data-testid="trend"][not(@data-bot-extracted)]'
+
+    # Candidate selectors per logical element, most likely first. BotFunctions uses a per-session copy
+    # that remembers the winning candidate, see selector_registry.py.
+    registry = SelectorRegistry({
+        'sign_in_btn': [(By.XPATH, sign_in_btn), (By.CSS_SELECTOR, 'a[href="/login"]')],
+        'username_or_email_input': [(By.XPATH, username_or_email_input), (By.CSS_SELECTOR, 'input[name="text"]')],
+        'sign_in_window_next_btn': [(By.XPATH, sign_in_window_next_btn),
+                                    (By.XPATH, '//button[@role="button"][.//span[text()="Next"]]')],
+        'username_or_phone_heading': [(By.XPATH, username_or_phone_heading)],
+        'username_or_phone_input': [(By.XPATH, username_or_phone_input),
+                                    (By.CSS_SELECTOR, 'input[data-testid="ocfEnterTextTextInput"]')],
+        'verify_window_next_btn': [(By.XPATH, verify_window_next_btn),
+                                   (By.CSS_SELECTOR, 'button[data-testid="ocfEnterTextNextButton"]')],
+        'password_input': [(By.XPATH, password_input), (By.CSS_SELECTOR, 'input[type="password"]')],
+        'login_button': [(By.XPATH, login_button), (By.CSS_SELECTOR, 'button[data-testid="LoginForm_Login_Button"]')],
+        'remove_pop_up': [(By.XPATH, remove_pop_up), (By.CSS_SELECTOR, 'button[data-testid="app-bar-close"]')],
+        'tweet_container': [(By.XPATH, tweet_container), (By.CSS_SELECTOR, 'article[data-testid="tweet"]')],
+        'tweet_by_container': [(By.XPATH, tweet_by_container), (By.CSS_SELECTOR, 'div[data-testid="User-Name"]')],
+        'tweet_text': [(By.XPATH, tweet_text), (By.CSS_SELECTOR, 'div[data-testid="tweetText"]')],
+        'tweet_stats': [(By.XPATH, tweet_stats),
+                        (By.CSS_SELECTOR, 'div[role="group"] span[data-testid="app-text-transition-container"]')],
+        'tweet_media': [(By.XPATH, tweet_media), (By.CSS_SELECTOR, 'div[data-testid="tweetPhoto"] img'),
+                        (By.CSS_SELECTOR, 'div[data-testid="videoComponent"] video')],
+        'explore_btn': [(By.XPATH, explore_btn), (By.CSS_SELECTOR, 'a[href="/explore"]')],
+        'explore_tabs': [(By.XPATH, explore_tabs), (By.CSS_SELECTOR, 'div[role="tablist"]')],
+        'explore_tab_trending': [(By.XPATH, explore_tabs_dict['trending']),
+                                 (By.CSS_SELECTOR, 'a[href="/explore/tabs/trending"]')],
+        'explore_tab_news': [(By.XPATH, explore_tabs_dict['news']), (By.CSS_SELECTOR, 'a[href="/explore/tabs/news"]')],
+        'explore_tab_sports': [(By.XPATH, explore_tabs_dict['sports']),
+                               (By.CSS_SELECTOR, 'a[href="/explore/tabs/sports"]')],
+        'explore_tab_entertainment': [(By.XPATH, explore_tabs_dict['entertainment']),
+                                      (By.CSS_SELECTOR, 'a[href="/explore/tabs/entertainment"]')],
+        'trend_window': [(By.XPATH, trend_window), (By.CSS_SELECTOR, 'div[aria-label^="Timeline: Explore"]'),
+                         (By.CSS_SELECTOR, 'main div[aria-label^="Timeline"]')],
+        'trends': [(By.XPATH, trends), (By.CSS_SELECTOR, 'div[data-testid="trend"]')],
+        'single_trend_data': [(By.XPATH, single_trend_data), (By.CSS_SELECTOR, ':scope > div > div')]
+    })
+
+    # DOM attribute set on the tweets already extracted by the batch extraction script
+    extracted_marker = 'data-bot-extracted'
+
+    # Batch extraction script, runs every tweet selector inside the page in a single round trip.
+    # arguments[0]: tweet_container XPath, arguments[1]: dict of relative tweet XPath selectors,
+    # arguments[2]: optional attribute name, when given only tweets without it are returned and then tagged with it,
+    # arguments[3]: optional maximum number of tweets returned, the tweets beyond it are left untagged.
+    tweets_data_script = r'''
+        const containerXPath = arguments[0];
+        const sel = arguments[1];
+        const mark = arguments[2];
+        const limit = arguments.length > 3 ? arguments[3] : null;
+        function first(xpath, context) {
+            return document.evaluate(xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        function all(xpath, context) {
+            const result = document.evaluate(xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const nodes = [];
+            for (let i = 0; i < result.snapshotLength; i++) {
+                nodes.push(result.snapshotItem(i));
+            }
+            return nodes;
+        }
+        function text(node) {
+            return node ? node.innerText : null;
+        }
+        let tweets = all(containerXPath, document);
+        if (mark) {
+            tweets = tweets.filter(function (tweet) { return !tweet.hasAttribute(mark); });
+        }
+        if (limit !== null) {
+            tweets = tweets.slice(0, limit);
+        }
+        if (mark) {
+            tweets.forEach(function (tweet) { tweet.setAttribute(mark, ''); });
+        }
+        return tweets.map(function (tweet) {
+            const by = first(sel.tweet_by_container, tweet);
+            const time = by ? first(sel.tweet_datetime, by) : null;
+            const link = by ? first(sel.tweet_status_link, by) : null;
+            const status = link ? /\/status\/(\d+)/.exec(link.getAttribute('href')) : null;
+            return {
+                tweet_id: status ? status[1] : null,
+                display_name: by ? text(first(sel.tweet_by_display_name, by)) : null,
+                username: by ? text(first(sel.tweet_by_username, by)) : null,
+                tweet_datetime: time ? time.getAttribute('datetime') : null,
+                tweet_text: text(first(sel.tweet_text, tweet)),
+                media_links: all(sel.tweet_media, tweet).map(function (node) { return node.getAttribute('src'); }),
+                stats: all(sel.tweet_stats, tweet).map(text)
+            };
+        });
+    '''
+
+    # Explore scroll step, runs in a single round trip: reads the text of every trend not tagged yet, tags them,
+    # then scrolls down one viewport. at_end is true if the page could not scroll any further.
+    # arguments: trend XPath, trend data XPath (relative to a trend), tag attribute.
+    explore_step_script = '''
+        const trendXPath = arguments[0];
+        const dataXPath = arguments[1];
+        const mark = arguments[2];
+        function all(xpath, context) {
+            const result = document.evaluate(xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const nodes = [];
+            for (let i = 0; i < result.snapshotLength; i++) {
+                nodes.push(result.snapshotItem(i));
+            }
+            return nodes;
+        }
+        const trends = all(trendXPath, document)
+            .filter(function (trend) { return !trend.hasAttribute(mark); })
+            .map(function (trend) {
+                trend.setAttribute(mark, '');
+                return all(dataXPath, trend).map(function (node) { return node.innerText; });
+            });
+        const before = window.scrollY;
+        window.scrollBy(0, window.innerHeight);
+        return {trends: trends, at_end: window.scrollY === before};
+    '''
+
+    # Asynchronous wait script, resolves as soon as the number of nodes matching an XPath grows, or when the
+    # page goes idle (no DOM mutations and no new network resources for idle_ms), or after timeout_ms.
+    # arguments: XPath, previous node count (null to count on start), timeout_ms, idle_ms, callback.
+    content_growth_script = '''
+        const xpath = arguments[0];
+        const timeoutMs = arguments[2];
+        const idleMs = arguments[3];
+        const done = arguments[arguments.length - 1];
+        const start = performance.now();
+        function count() {
+            return document.evaluate('count(' + xpath + ')', document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+        }
+        const previous = arguments[1] === null ? count() : arguments[1];
+        if (count() > previous) {
+            done({count: count(), reason: 'grown', elapsed: 0});
+            return;
+        }
+        let finished = false;
+        let idleTimer = null;
+        let timeoutTimer = null;
+        let resources = performance.getEntriesByType('resource').length;
+        const observer = new MutationObserver(function () {
+            if (count() > previous) {
+                finish('grown');
+            } else {
+                resetIdle();
+            }
+        });
+        function finish(reason) {
+            if (finished) {
+                return;
+            }
+            finished = true;
+            observer.disconnect();
+            clearTimeout(idleTimer);
+            clearTimeout(timeoutTimer);
+            done({count: count(), reason: reason, elapsed: (performance.now() - start) / 1000});
+        }
+        function resetIdle() {
+            clearTimeout(idleTimer);
+            idleTimer = setTimeout(function () {
+                const loaded = performance.getEntriesByType('resource').length;
+                if (loaded !== resources) {
+                    resources = loaded;
+                    resetIdle();
+                } else {
+                    finish('idle');
+                }
+            }, idleMs);
+        }
+        observer.observe(document.body, {childList: true, subtree: true});
+        timeoutTimer = setTimeout(function () { finish('timeout'); }, timeoutMs);
+        resetIdle();
+    '''
+
+    # Number of nodes matching an XPath and of network resources loaded so far, polled by the asyncio waits of
+    # async_bot.AsyncBot instead of holding a driver connection in content_growth_script.
+    # arguments: XPath.
+    node_count_script = '''
+        const xpath = arguments[0];
+        return {
+            count: document.evaluate('count(' + xpath + ')', document, null, XPathResult.NUMBER_TYPE, null).numberValue,
+            resources: performance.getEntriesByType('resource').length
+        };
+    '''
+
+    # Tells whether the page shows a logged out or rate limited state, checked when an expected element is missing.
+    page_state_script = r'''
+        if (/^\/(i\/flow\/)?login/.test(location.pathname) || document.querySelector('a[data-testid="loginButton"]')) {
+            return 'logged_out';
+        }
+        const text = document.body ? document.body.innerText : '';
+        if (/Rate limit exceeded|Something went wrong\. Try reloading/i.test(text)) {
+            return 'rate_limited';
+        }
+        return 'ok';
+    '''
+
+    # True if a search page shows its "No results" placeholder instead of tweets
+    no_results_script = 'return document.querySelector(\'[data-testid="emptyState"]\') !== null;'
+
+    @classmethod
+    def tweet_selectors(cls):
+        """
+        Collect the relative tweet XPath selectors used by the batch extraction script.
+
+        Returns:
+            dict: Selector name mapped to its XPath expression.
+        """
+        return {
+            'tweet_by_container': cls.tweet_by_container,
+            'tweet_text': cls.tweet_text,
+            'tweet_stats': cls.tweet_stats,
+            'tweet_media': cls.tweet_media,
+            'tweet_by_display_name': cls.tweet_by_display_name,
+            'tweet_by_username': cls.tweet_by_username,
+            'tweet_datetime': cls.tweet_datetime,
+            'tweet_status_link': cls.tweet_status_link
+        }
 
     @classmethod
     def wait_for_element_presence(cls, driver, wait_time, by, value, find_all=False):
@@ -77,14 +402,64 @@ class UI:
             Returns a single WebElement if find_all is False, otherwise returns a list of WebElements.
 
         Raises:
-            TimeoutException: If the element is not found within the specified wait time.
+            SelectorTimeout: If the element is not found within the specified wait time.
         """
         try:
             if find_all:
                 return WebDriverWait(driver, wait_time).until(EC.presence_of_all_elements_located((by, value)))
             return WebDriverWait(driver, wait_time).until(EC.presence_of_element_located((by, value)))
-        except Exception as e:
-            print(e)
+        except TimeoutException:
+            raise SelectorTimeout(value, wait_time)
+
+    @classmethod
+    def wait_for_element_clickable(cls, driver, wait_time, by, value):
+        """
+        Wait until a web element identified by the given selector is visible and enabled.
+
+        Parameters:
+            driver: WebDriver instance to use for locating the element.
+            wait_time (int): Maximum time to wait for the element to be clickable, in seconds.
+            by: Locator strategy to use for finding the element (e.g., By.ID, By.XPATH).
+            value: Value of the locator (e.g., ID, XPath expression) to locate the element.
+
+        Returns:
+            WebElement: The located web element if clickable within the specified wait time.
+
+        Raises:
+            SelectorTimeout: If the element is not clickable within the specified wait time.
+        """
+        try:
+            return WebDriverWait(driver, wait_time).until(EC.element_to_be_clickable((by, value)))
+        except TimeoutException:
+            raise SelectorTimeout(value, wait_time)
+
+    @classmethod
+    def wait_for_content_growth(cls, driver, wait_time, xpath, previous_count=None, idle_time=1):
+        """
+        Wait until the number of elements matching an XPath grows, or the page goes idle.
+
+        A MutationObserver injected by UI.content_growth_script returns as soon as new nodes appear,
+        instead of sleeping for a fixed time after every scroll.
+
+        Parameters:
+            driver: WebDriver instance.
+            wait_time (float): Maximum time to wait, in seconds.
+            xpath (str): XPath of the elements to count, e.g. UI.trends or UI.tweet_container.
+            previous_count (int): Optional. Node count to compare against. Defaults to the count when the wait starts.
+            idle_time (float): Seconds without DOM mutations or network activity after which the page
+                is considered idle. Default is 1.
+
+        Returns:
+            dict: 'count' of matching nodes, 'reason' ('grown', 'idle' or 'timeout') and 'elapsed' seconds.
+
+        Raises:
+            JavascriptException: If the script fails in the page.
+            TimeoutException: If the script does not return within its timeout.
+            WebDriverException: If the driver stopped responding.
+        """
+        driver.set_script_timeout(wait_time + 5)
+        return driver.execute_async_script(cls.content_growth_script, xpath, previous_count,
+                                           int(wait_time * 1000), int(idle_time * 1000))
 
 
 class BotFunctions(UI):
@@ -92,25 +467,50 @@ class BotFunctions(UI):
     A class representing bot functions for interacting with Twitter.
     Inherits UI class for accessing XPath selectors.
     """
-    def __init__(self, driver, username):
+    def __init__(self, driver, username, wait_timeouts=None, retry_policies=None, metrics=None):
         """
         Initializes BotFunctions object.
 
         Parameters:
             driver: WebDriver instance.
+            wait_timeouts (dict): Optional. Overrides for DEFAULT_WAIT_TIMEOUTS, in seconds.
+            retry_policies (dict): Optional. Overrides for errors.DEFAULT_RETRY_POLICIES, operation name mapped
+                to a RetryPolicy.
+            metrics (Metrics): Optional. Where spans, WebDriver round trips and extraction times are recorded,
+                see instrumentation.py. Defaults to a new Metrics instance.
         """
         super().__init__()
-        self.driver = driver
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.driver = instrument_driver(driver, self.metrics)
         self.username = str(username)
-        self.tweets_df = pd.DataFrame()
+        # Username of the account, entered if Twitter asks to verify a login started with an email address
+        self.handle = None
+        self.wait_timeouts = {**DEFAULT_WAIT_TIMEOUTS, **(wait_timeouts or {})}
+        self.wait_timings = {}
+        self.network_capture = None
+        self.sinks = {}
+        self.keep_in_memory = {}
+        self.clock = UTCClock()
+        self.registry = UI.registry.session()
+        self.batch_datetime = None
+        self.retry_policies = {**DEFAULT_RETRY_POLICIES, **(retry_policies or {})}
+        self.failures = FailureCounters()
+        self.cookie_store = CookieStore()
+        self.session_manager = None
+        self.limiter = None
+        self.logging_in = False
+        self.reset_data()
 
-        self.trending_df = {
-            'trending': pd.DataFrame(),
-            'news': pd.DataFrame(),
-            'sports': pd.DataFrame(),
-            'entertainment': pd.DataFrame()
-        }
+    def reset_data(self):
+        """
+        Reset data attributes to empty row buffers.
+
+        Resets the tweets row buffer and trending row buffers to empty buffers.
+        Also resets the trending dictionary with default values.
 
+        Returns:
+            None
+        """
         self.trending_dict = {
             'trending': {
                 'rank': 'NA',
@@ -139,65 +539,127 @@ class BotFunctions(UI):
             }
         }
 
-    def reset_data(self):
+        self.tweets_rows = RowBuffer(TWEET_COLUMNS)
+        self.seen_tweets = set()
+        self.trending_rows = {tab_name: RowBuffer(columns) for tab_name, columns in self.trending_dict.items()}
+
+    @property
+    def tweets_df(self):
+        """
+        DataFrame of the fetched tweets, materialized from the tweets row buffer on demand.
         """
-        Reset data attributes to empty DataFrames.
+        with self.metrics.span('to_dataframe'):
+            return self.tweets_rows.to_dataframe()
 
-        Resets the tweets DataFrame and trending DataFrames to empty DataFrames.
-        Also resets the trending dictionary with default values.
+    @tweets_df.setter
+    def tweets_df(self, df):
+        self.tweets_rows = RowBuffer(TWEET_COLUMNS)
+        self.tweets_rows.append_dataframe(df)
+
+    @property
+    def trending_df(self):
+        """
+        Dictionary of tab name mapped to a DataFrame of its trends, materialized from the trending row buffers on demand.
+        """
+        with self.metrics.span('to_dataframe'):
+            return {tab_name: rows.to_dataframe() for tab_name, rows in self.trending_rows.items()}
+
+    def to_dataframe(self, data_of='tweets', normalized=False):
+        """
+        Materialize the buffered rows into DataFrame(s).
+
+        Parameters:
+            data_of (str): Either 'tweets' or 'trending'. Defaults to 'tweets'.
+            normalized (bool): If True, convert stats to integer counts, datetimes to UTC datetimes and text
+                columns to category/string dtypes, see normalize.py. Default is False.
+
+        Returns:
+            DataFrame for 'tweets', or a dictionary of tab name mapped to DataFrame for 'trending'.
+        """
+        if data_of == 'trending':
+            if normalized:
+                return {tab_name: normalize_trends(df) for tab_name, df in self.trending_df.items()}
+            return self.trending_df
+        if normalized:
+            return normalize_tweets(self.tweets_df)
+        return self.tweets_df
+
+    def attach_sink(self, sink, data_of='tweets', keep_in_memory=True):
+        """
+        Stream the rows of a data type into a sink while scraping, see sinks.py.
+
+        Parameters:
+            sink: Object with write(records) and close() methods, e.g. sinks.CsvSink('data/tweets').
+            data_of (str): 'tweets' or an explore tab name ('trending', 'news', 'sports', 'entertainment').
+            keep_in_memory (bool): If False, rows of this data type are only written to the sinks and not kept
+                in the row buffers, so memory does not grow with the session. Default is True.
 
         Returns:
             None
         """
-        self.tweets_df = pd.DataFrame()
-        self.trending_df = {
-            'trending': pd.DataFrame(),
-            'news': pd.DataFrame(),
-            'sports': pd.DataFrame(),
-            'entertainment': pd.DataFrame()
-        }
+        self.sinks.setdefault(data_of, []).append(sink)
+        self.keep_in_memory[data_of] = keep_in_memory
 
-        self.trending_dict = {
-            'trending': {
-                'rank': 'NA',
-                'trending_in': 'Unknown',
-                'tag_or_text': 'NA',
-                'posts': 'NA',
-                'fetch_datetime': 'NA'
-            },
-            'news': {
-                'trending_in': 'Unknown',
-                'tag_or_text': 'NA',
-                'posts': 'NA',
-                'fetch_datetime': 'NA'
-            },
-            'sports': {
-                'trending_in': 'Unknown',
-                'tag_or_text': 'NA',
-                'posts': 'NA',
-                'fetch_datetime': 'NA'
-            },
-            'entertainment': {
-                'trending_in': 'Unknown',
-                'tag_or_text': 'NA',
-                'posts': 'NA',
-                'fetch_datetime': 'NA'
-            }
-        }
+    def close_sinks(self):
+        """
+        Flush and close every attached sink.
+
+        Returns:
+            None
+        """
+        for sinks in self.sinks.values():
+            for sink in sinks:
+                sink.close()
+        self.sinks = {}
+        self.keep_in_memory = {}
+
+    def store_rows(self, data_of, records):
+        """
+        Append scraped rows to the row buffer of their data type and push them into its sinks.
+
+        Parameters:
+            data_of (str): 'tweets' or an explore tab name.
+            records (list): Rows as dictionaries.
+
+        Returns:
+            None
+        """
+        if not records:
+            return
+        if self.keep_in_memory.get(data_of, True):
+            rows = self.tweets_rows if data_of == 'tweets' else self.trending_rows[data_of]
+            rows.extend(records)
+        for sink in self.sinks.get(data_of, []):
+            sink.write(records)
 
     def current_datetime(self):
         """
         Tells the current date and time in UTC timezone.
 
+        Inside a batch_timestamp block, the timestamp captured when the block started is returned instead,
+        so every row of one extraction pass shares a single clock reading.
+
+        Returns:
+            Current date and time in UTC timezone, formatted as '%H:%M:%S %d-%m-%Y %z'.
+        """
+        if self.batch_datetime is not None:
+            return self.batch_datetime
+        return self.clock.now()
+
+    @contextmanager
+    def batch_timestamp(self):
+        """
+        Capture the current time once and use it as the fetch datetime of every row extracted inside the block.
+
         Returns:
-            Current date and time in UTC timezone.
+            Context manager yielding the captured datetime string.
         """
-        current_datetime = time.strftime('%H:%M:%S %d-%m-%Y %z')
-        datetime_object = datetime.strptime(current_datetime, '%H:%M:%S %d-%m-%Y %z')
-        utc_timezone = pytz.timezone('UTC')
-        datetime_utc = datetime_object.astimezone(utc_timezone)
-        current_datetime_in_utc = datetime_utc.strftime('%H:%M:%S %d-%m-%Y %z')
-        return current_datetime_in_utc
+        outer = self.batch_datetime
+        self.batch_datetime = outer if outer is not None else self.clock.now()
+        try:
+            yield self.batch_datetime
+        finally:
+            self.batch_datetime = outer
 
     def perform(self, driver, wait_time, by, value, action, keys=None, message=None):
         """
@@ -213,30 +675,234 @@ class BotFunctions(UI):
             action (str): Type of action to perform on the located element.
                 Available actions: 'click', 'send_keys'.
             keys: Additional data to send to the located element (default is None).
-            message: Message to show if the element is not located (default is None).
+            message: Message to show if the element is not located (default is None). When given, the element
+                is optional and a missing element is not an error.
 
         Returns:
             None
 
         Raises:
-            TimeoutException: If the element is not found within the specified wait time.
+            SelectorTimeout: If the element is not found within the specified wait time and no message is given.
         """
         try:
             element = UI.wait_for_element_presence(driver, wait_time, by, value)
-            actions = {
-                'click': element.click,
-                'send_keys': element.send_keys
-            }
-            if action == 'send_keys':
-                actions[action](keys)
-            else:
-                actions[action]()
-        except Exception as e:
-            if message is not None:
-                print(message)
-            else:
-                print(e)
+        except SelectorTimeout:
+            if message is None:
+                raise
+            print(message)
+            return
+        actions = {
+            'click': element.click,
+            'send_keys': element.send_keys
+        }
+        if action == 'send_keys':
+            actions[action](keys)
+        else:
+            actions[action]()
+
+    def record_wait(self, step, budget, waited):
+        """
+        Record how long a wait step took against its configured timeout.
+
+        Parameters:
+            step (str): Name of the wait step, a key of self.wait_timeouts.
+            budget (float): Configured timeout of the step, i.e. the former fixed sleep, in seconds.
+            waited (float): Time actually spent waiting, in seconds.
+
+        Returns:
+            None
+        """
+        self.metrics.observe('wait_seconds', waited, step=step)
+        timing = self.wait_timings.setdefault(step, {'calls': 0, 'budget': 0.0, 'waited': 0.0})
+        timing['calls'] += 1
+        timing['budget'] += budget
+        timing['waited'] += waited
+
+    def timing_summary(self):
+        """
+        Summarize the time spent in adaptive waits and the time saved compared to fixed sleeps.
+
+        Returns:
+            dict: Step name mapped to its 'calls', 'budget', 'waited' and 'saved' seconds, plus a 'total' entry.
+        """
+        summary = {}
+        total = {'calls': 0, 'budget': 0.0, 'waited': 0.0, 'saved': 0.0}
+        for step, timing in self.wait_timings.items():
+            summary[step] = {**timing, 'saved': max(timing['budget'] - timing['waited'], 0.0)}
+            for key in total:
+                total[key] += summary[step][key]
+        summary['total'] = total
+        return summary
+
+    def wait_for_new_content(self, xpath, previous_count=None, step='scroll', wait_time=None):
+        """
+        Wait until new elements matching the XPath are rendered, or the page goes idle.
+
+        Falls back to sleeping the full step timeout if the wait script fails in the page or times out, the failure
+        is counted in self.failures under 'wait_for_content'. Other driver errors, e.g. a crashed browser, are raised.
+
+        Parameters:
+            xpath (str): XPath of the elements to count, e.g. UI.trends or UI.tweet_container.
+            previous_count (int): Optional. Node count before the action that loads new content.
+            step (str): Name of the wait step in self.wait_timeouts. Defaults to 'scroll'.
+            wait_time (float): Optional. Wait at most this long instead of the step timeout.
+
+        Returns:
+            dict: Result of UI.wait_for_content_growth, or None if it failed.
+
+        Raises:
+            WebDriverException: If the driver stopped responding.
+        """
+        timeout = self.wait_timeouts[step] if wait_time is None else wait_time
+        start = time.monotonic()
+        try:
+            result = UI.wait_for_content_growth(self.driver, timeout, xpath, previous_count,
+                                                self.wait_timeouts['idle'])
+        except (JavascriptException, TimeoutException) as e:
+            self.failures.record('wait_for_content', classify(e))
+            result = None
+            time.sleep(max(timeout - (time.monotonic() - start), 0))
+        self.record_wait(step, timeout, time.monotonic() - start)
+        return result
+
+    def wait_until_ready(self, value, step='login_step'):
+        """
+        Wait until the element located by the XPath is visible and enabled.
+
+        Parameters:
+            value (str): XPath of the element.
+            step (str): Name of the wait step in self.wait_timeouts. Defaults to 'login_step'.
+
+        Returns:
+            WebElement: The element.
+
+        Raises:
+            SelectorTimeout: If the element did not become clickable in time.
+        """
+        timeout = self.wait_timeouts[step]
+        start = time.monotonic()
+        try:
+            return UI.wait_for_element_clickable(self.driver, timeout, By.XPATH, value)
+        finally:
+            self.record_wait(step, timeout, time.monotonic() - start)
+
+    def locate(self, name, wait_time=None, find_all=False, context=None, required=True):
+        """
+        Locate an element by its logical name in the session's selector registry, see UI.registry.
+
+        Parameters:
+            name (str): Logical element name, e.g. 'tweet_container' or 'login_button'.
+            wait_time (float): Optional. Maximum time to wait, in seconds. Defaults to the 'element' wait timeout.
+            find_all (bool): If True, return all the matching elements. Default is False.
+            context: Optional. WebElement to search from instead of the whole page.
+            required (bool): If False, return None instead of raising when the element is missing. Default is True.
+
+        Returns:
+            WebElement or List[WebElement]: The located element(s), or None if not required and not found in time.
+
+        Raises:
+            SelectorTimeout: If a required element is not found in time.
+            RateLimited, LoggedOut: If a required element is missing because of the page state, see check_page_state.
+        """
+        if wait_time is None:
+            wait_time = self.wait_timeouts['element']
+        elements = self.registry.find(context if context is not None else self.driver, name, wait_time, find_all)
+        if elements is None and required:
+            self.check_page_state()
+            raise SelectorTimeout(name, wait_time)
+        return elements
+
+    def check_page_state(self):
+        """
+        Check whether the page shows a rate limit error or a logged out state.
+
+        Returns:
+            None
+
+        Raises:
+            RateLimited: If the page shows a rate limit or "Something went wrong" error. The rate limit is
+                reported to the account's limiter, if any.
+            LoggedOut: If the session is logged out. Not raised while logging in.
+        """
+        state = self.driver.execute_script(UI.page_state_script)
+        if state == 'rate_limited':
+            if self.limiter is not None:
+                self.limiter.on_rate_limited()
+            raise RateLimited('Twitter is rate limiting this session.')
+        if state == 'logged_out' and not self.logging_in:
+            raise LoggedOut(f'Session of {self.username} is logged out.')
+
+    def shows_no_results(self):
+        """
+        Check whether a search page shows that it has no results, rather than tweets that failed to load.
+
+        Returns:
+            bool: True if the page shows Twitter's "No results" placeholder.
+        """
+        return bool(self.driver.execute_script(UI.no_results_script))
+
+    def pace(self, tokens=1):
+        """
+        Wait for the account's limiter to allow the next scrape step, see scheduler.AccountLimiter.
+
+        Does nothing if no limiter is set, e.g. when the bot is not run by a scheduler.Scheduler.
+
+        Parameters:
+            tokens (float): Number of tokens the step takes. Default is 1.
+
+        Returns:
+            None
+        """
+        if self.limiter is not None:
+            self.limiter.acquire(tokens)
+
+    def failure_counts(self):
+        """
+        Failures counted per error class and per operation, to tune retry policies and throughput.
+
+        Returns:
+            dict: See FailureCounters.as_dict.
+        """
+        return self.failures.as_dict()
+
+    def act(self, name, action, keys=None, message=None, context=None, wait_time=None):
+        """
+        Perform the desired action on an element located by its logical name, like perform.
+
+        Parameters:
+            name (str): Logical element name in the selector registry.
+            action (str): Type of action to perform on the located element. Available actions: 'click', 'send_keys'.
+            keys: Additional data to send to the located element (default is None).
+            message: Message to show if the element is not located (default is None). When given, the element
+                is optional and a missing element is not an error.
+            context: Optional. WebElement to search from instead of the whole page.
+            wait_time (float): Optional. Maximum time to wait, in seconds. Defaults to the 'element' wait timeout.
+
+        Returns:
+            None
+
+        Raises:
+            SelectorTimeout: If the element is not found in time and no message is given.
+        """
+        element = self.locate(name, wait_time, context=context, required=message is None)
+        if element is None:
+            print(message)
+            return
+        if action == 'send_keys':
+            element.send_keys(keys)
+        else:
+            element.click()
+
+    def selector_report(self):
+        """
+        Hit, miss and latency counters of every selector used in this session, and the winner of each element.
+
+        Returns:
+            dict: See SelectorRegistry.report.
+        """
+        return self.registry.report()
 
+    @timed()
     def open_website(self, url='https://twitter.com/?lang=en'):
         """
         Open the Twitter website login page.
@@ -259,76 +925,65 @@ class BotFunctions(UI):
 
     def save_cookies(self):
         """
-        Save the cookies for the default user to a pickle file.
-
-        This method retrieves the cookies for the default user (stored in the object attribute `self.username`),
-        adds or updates them in a pickle file.
+        Save the cookies for the default user to its own file in the cookie store, see session_manager.CookieStore.
 
         Returns: None
         """
-        username = self.username
-
-        file_path = "cookies.pkl"
-        user_cookie = {username: self.driver.get_cookies()}
-
-        if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-            # File exists and is not empty, load existing data
-            with open(file_path, "rb") as cookies:
-                data = pickle.load(cookies)
-        else:
-            data = {}
-
-        # Add or update user cookie data
-        data.update(user_cookie)
-
-        # Write the updated data back to the file
-        with open(file_path, "wb") as cookies:
-            pickle.dump(data, cookies)
+        self.cookie_store.save(self.username, self.driver.get_cookies())
 
+    @timed()
     def load_cookies(self):
         """
-        Load cookies for the default user from a pickle file.
+        Load cookies for the default user from the cookie store.
+
+        The cookies are checked for expiry before the browser is touched, and added in a single CDP call
+        when the browser supports it, one add_cookie call per cookie otherwise.
 
         Returns:
             True if cookies are successfully loaded and added, False otherwise.
         """
-        username = self.username
-
-        if os.path.exists('cookies.pkl') and os.path.getsize('cookies.pkl') > 0:
-            with open("cookies.pkl", "rb") as cookies:
-                data = pickle.load(cookies)
-                if username in data:
-                    for cookie in data[username]:
-                        self.driver.add_cookie(cookie)
-                    return True
-                else:
-                    return False
-        else:
+        cookies = self.cookie_store.load(self.username)
+        if not cookies or not cookies_valid(cookies):
             return False
+        if not inject_cookies(self.driver, cookies):
+            for cookie in cookies:
+                self.driver.add_cookie(cookie)
+        return True
 
     def delete_cookies(self):
         """
-        Delete cookies for the default user from a pickle file.
+        Delete cookies for the default user from the cookie store.
 
         Returns:
             True if cookies are successfully deleted, False otherwise.
         """
-        username = self.username
+        return self.cookie_store.delete(self.username)
 
-        if os.path.exists('cookies.pkl') and os.path.getsize('cookies.pkl') > 0:
-            with open("cookies.pkl", "rb") as cookies:
-                data = pickle.load(cookies)
+    @timed()
+    def start_session(self, password=None):
+        """
+        Start a logged in session, reusing the saved cookies when they are valid and logging in otherwise.
 
-            if username in data:
-                data.pop(username)
-                with open("cookies.pkl", "wb") as cookies:
-                    pickle.dump(data, cookies)
-                return True
-            else:
-                return False
-        else:
-            return False
+        See session_manager.SessionManager.start.
+
+        Parameters:
+            password (str or callable): Optional. Password of the account, or a callable returning it, only called
+                when a login is needed.
 
+        Returns:
+            dict: 'mode' ('warm' or 'cold'), 'cookies', 'rejected' and 'seconds' of the bootstrap.
+
+        Raises:
+            RateLimited: If the page shows a rate limit.
+            LoggedOut: If a login is needed but no password is given, or the password callable returns None.
+            SelectorTimeout: If a step of the login form is not found.
+        """
+        if self.session_manager is None:
+            self.session_manager = SessionManager(self)
+        return self.session_manager.start(password)
+
+    @timed()
+    @operation('login')
     def login(self, password, username=None):
         """
         Login to Twitter.
@@ -342,36 +997,58 @@ class BotFunctions(UI):
             None
 
         Raises:
-            Any exceptions that occur during the login process are caught and printed.
+            SelectorTimeout: If a step of the login form is not found, the login is aborted at that step.
+            RateLimited: If Twitter rate limits the login.
+            LoggedOut: If Twitter asks to verify the login and no username to verify it with is known,
+                see verification_username.
         """
         if username is None:
             username = self.username
 
+        self.logging_in = True
         try:
             # Click the sign-in button, Input username/email/phone and Click next
-            self.perform(self.driver, 15, By.XPATH, UI.sign_in_btn, action='click')
-            self.perform(self.driver, 15, By.XPATH, UI.username_or_email_input, action='send_keys', keys=username)
-            self.perform(self.driver, 15, By.XPATH, UI.sign_in_window_next_btn, action='click')
+            self.act('sign_in_btn', action='click')
+            self.act('username_or_email_input', action='send_keys', keys=username)
+            self.act('sign_in_window_next_btn', action='click')
 
             # If additional verification is needed
-            if UI.wait_for_element_presence(self.driver, 15, By.XPATH, UI.username_or_phone_heading, find_all=True) is not None:
-                if not username.isdigit():
-                    username = input('Enter Username')
-                time.sleep(5)
-                self.perform(self.driver, 15, By.XPATH, UI.username_or_phone_input, action='send_keys', keys=username)
-                self.perform(self.driver, 15, By.XPATH, UI.verify_window_next_btn, action='click')
+            if self.locate('username_or_phone_heading', wait_time=self.wait_timeouts['login_step'],
+                           find_all=True, required=False) is not None:
+                self.wait_until_ready(UI.username_or_phone_input)
+                self.act('username_or_phone_input', action='send_keys', keys=self.verification_username(username))
+                self.act('verify_window_next_btn', action='click')
 
             # Input password and Click login button
-            time.sleep(2)
-            self.perform(self.driver, 15, By.XPATH, UI.password_input, action='send_keys', keys=password)
-            time.sleep(2)
-            self.perform(self.driver, 15, By.XPATH, UI.login_button, action='click')
+            self.wait_until_ready(UI.password_input)
+            self.act('password_input', action='send_keys', keys=password)
+            self.wait_until_ready(UI.login_button)
+            self.act('login_button', action='click')
 
             # Handle any pop-up if present
-            self.perform(self.driver, 15, By.XPATH, UI.remove_pop_up, action='click', message='No popup found.')
+            self.act('remove_pop_up', action='click', message='No popup found.')
+        finally:
+            self.logging_in = False
+
+    def verification_username(self, username):
+        """
+        Username or phone number entered when Twitter asks to verify a login.
 
-        except Exception as e:
-            print(e)
+        Parameters:
+            username (str): Username, phone number, or email address the login was started with.
+
+        Returns:
+            str: self.handle if it is set, else the login username or phone number.
+
+        Raises:
+            LoggedOut: If the login was started with an email address and self.handle is not set.
+        """
+        if self.handle:
+            return self.handle.lstrip('@')
+        if '@' not in username.lstrip('@'):
+            return username.lstrip('@')
+        raise LoggedOut(f'Twitter asks to verify the login of {username}, set the username of the account '
+                        f'(BotFunctions.handle) to verify it.')
 
     def scroll_down(self, scroll_to):
         """
@@ -382,14 +1059,8 @@ class BotFunctions(UI):
 
         Returns:
             None
-
-        Raises:
-            Any exceptions that occur during the scrolling process are caught and printed.
         """
-        try:
-            self.driver.execute_script(f'return window.scrollTo(0,{scroll_to});')
-        except Exception as e:
-            print(e)
+        self.driver.execute_script(f'return window.scrollTo(0,{scroll_to});')
 
     def current_scroll_position(self):
         """
@@ -399,14 +1070,8 @@ class BotFunctions(UI):
 
         Returns:
             int: The current vertical scroll position of the page, in pixels.
-
-        Raises:
-            Any exceptions that occur during the retrieval of the scroll position are caught and printed.
         """
-        try:
-            return self.driver.execute_script('return window.scrollY;')
-        except Exception as e:
-            print(e)
+        return self.driver.execute_script('return window.scrollY;')
 
     def check_page_end(self, last_scroll_position):
         """
@@ -418,17 +1083,11 @@ class BotFunctions(UI):
         Returns:
             bool: True if the user has reached the end of the page (scroll position unchanged),
                   False otherwise.
-
-        Raises:
-            Any exceptions that occur during the retrieval of the scroll position are caught and printed.
         """
-        try:
-            if self.current_scroll_position() == last_scroll_position:
-                return True
-            else:
-                return False
-        except Exception as e:
-            print(e)
+        if self.current_scroll_position() == last_scroll_position:
+            return True
+        else:
+            return False
 
     def filter_out_duplicates(self, trends, last_trend_location):
         """
@@ -444,26 +1103,18 @@ class BotFunctions(UI):
                 less than or equal to the last trend location.
 
         Raises:
-            Any exceptions that occur during the removal process are caught and printed, along with
-            the line number where the error occurred.
+            StaleElementReferenceException: If a trend was removed from the page while being read.
         """
         position = 0
-        try:
-            if last_trend_location is None:
-                return trends
-            else:
-                for trend in trends:
-                    if trend.location['y'] <= last_trend_location:
-                        position += 1
-                if len(trends) == position:
-                    return []
-                return trends[position:]
-        except Exception as e:
-            print(e)
-            # Use traceback to get the line number
-            traceback_details = traceback.extract_tb(sys.exc_info()[2])
-            line_number = traceback_details[len(traceback_details) - 1][1]
-            print(f"Error occurred on line {line_number}: {e}")
+        if last_trend_location is None:
+            return trends
+        else:
+            for trend in trends:
+                if trend.location['y'] <= last_trend_location:
+                    position += 1
+            if len(trends) == position:
+                return []
+            return trends[position:]
 
     def load_tweets(self):
         """
@@ -473,13 +1124,10 @@ class BotFunctions(UI):
             list: A list containing all the tweets found on the webpage.
 
         Raises:
-            Any exceptions that occur during the tweet loading process are caught and printed.
+            SelectorTimeout: If no tweet is found.
         """
-        try:
-            tweets = UI.wait_for_element_presence(self.driver, 15, By.XPATH, UI.tweet_container, find_all=True)
-            return tweets
-        except Exception as e:
-            print(e)
+        tweets = self.locate('tweet_container', find_all=True)
+        return tweets
 
     def fetch_single_tweet_data(self, tweet):
         """
@@ -489,19 +1137,33 @@ class BotFunctions(UI):
             tweet: WebElement object representing the tweet element to extract data from.
 
         Returns:
-            DataFrame: A pandas DataFrame containing the extracted data from the tweet.
+            DataFrame: A pandas DataFrame containing the extracted data from the tweet, or None if the tweet
+                could not be read, see fetch_single_tweet_details.
+        """
+        tweet_details = self.fetch_single_tweet_details(tweet)
+        if tweet_details is not None:
+            return pd.DataFrame([tweet_details])
 
-        Raises:
-            Any exceptions that occur during the data extraction process are caught and printed.
+    def fetch_single_tweet_details(self, tweet):
         """
+        Extract data from a single tweet element and return it as a dictionary.
+
+        Parameters:
+            tweet: WebElement object representing the tweet element to extract data from.
+
+        Returns:
+            dict: The extracted data from the tweet, keyed by column name, or None if the tweet could not be read.
+                Such failures are counted under the 'fetch_tweet' operation, see failure_counts.
+        """
+        start = time.perf_counter()
         try:
             tweet_container = tweet
 
             tweet_details = {'display_name': 'NA', 'username': 'NA', 'tweet_text': 'NA', 'reply': 'NA', 'retweet': 'NA',
                              'like': 'NA', 'view': 'NA', 'media_links': 'NA', 'tweet_datetime': 'NA',
-                             'fetch_datetime': 'NA'}
+                             'fetch_datetime': 'NA', 'tweet_id': 'NA'}
 
-            tweet_by_container = tweet_container.find_element(by='xpath', value=UI.tweet_by_container)
+            tweet_by_container = self.locate('tweet_by_container', wait_time=0, context=tweet_container)
             # from tweet_by_container
             tweet_details['display_name'] = tweet_by_container.find_element(by='xpath', value=UI.tweet_by_display_name).text
             tweet_details['username'] = tweet_by_container.find_element(by='xpath', value=UI.tweet_by_username).text
@@ -511,46 +1173,434 @@ class BotFunctions(UI):
             tweet_datetime = datetime.fromisoformat(tweet_datetime)
             tweet_details['tweet_datetime'] = tweet_datetime.strftime('%H:%M:%S %d-%m-%Y %z')
 
+            # tweet id, taken from the status link wrapping the tweet datetime
+            status_links = tweet_by_container.find_elements(by='xpath', value=UI.tweet_status_link)
+            if status_links:
+                tweet_details['tweet_id'] = self.tweet_id_from_url(status_links[0].get_attribute('href'))
+
             # tweet text
-            tweet_details['tweet_text'] = tweet_container.find_element(by='xpath', value=UI.tweet_text).text
+            tweet_details['tweet_text'] = self.locate('tweet_text', wait_time=0, context=tweet_container).text
 
             # media links
-            media_links = tweet_container.find_elements(by='xpath', value=UI.tweet_media)
+            media_links = self.locate('tweet_media', wait_time=0, find_all=True, context=tweet_container,
+                                      required=False) or []
             tweet_details['media_links'] = [link.get_attribute('src') for link in media_links]
 
             # tweet stats
-            tweet_stats = tweet_container.find_elements(by='xpath', value=UI.tweet_stats)
+            tweet_stats = self.locate('tweet_stats', wait_time=0, find_all=True, context=tweet_container,
+                                      required=False) or []
             (tweet_details['reply'], tweet_details['retweet'], tweet_details['like'],
                 tweet_details['view']) = [stat.text for stat in tweet_stats]
 
             # fetch datetime
             tweet_details['fetch_datetime'] = self.current_datetime()
 
-            return pd.DataFrame([tweet_details])
+            self.metrics.observe('tweet_extraction_seconds', time.perf_counter() - start, method='element')
+            return tweet_details
 
-        except Exception as e:
-            print(e)
+        except (BotError, WebDriverException, ValueError) as e:
+            self.failures.record('fetch_tweet', classify(e))
+            return None
 
-    def fetch_multiple_tweets_data(self):
+    @timed()
+    def fetch_tweets_data_batch(self, only_new=False, limit=None):
         """
-        Fetch data from multiple tweets and append it to the DataFrame.
+        Extract data from every tweet present on the webpage in a single WebDriver round trip.
 
-        This method iterates through the tweets loaded on the webpage, extracts data from each tweet using
-        the fetch_single_tweet_data method, and appends the extracted data to the DataFrame self.tweets_df.
+        All the tweet selectors are evaluated inside the page by UI.tweets_data_script, which returns
+        plain values instead of WebElements, so no further calls to the driver are needed per tweet.
+
+        Parameters:
+            only_new (bool): If True, skip the tweets returned by an earlier call and tag the returned ones
+                in the DOM, so repeated calls while scrolling only extract newly rendered tweets. Default is False.
+            limit (int): Optional. Extract at most this many tweets, in page order. With only_new, the tweets beyond
+                the limit are not tagged, so a later call still returns them.
+
+        Returns:
+            list: A list of dictionaries with the same keys as fetch_single_tweet_data.
+
+        Raises:
+            SelectorTimeout: If no tweet is found.
+            RateLimited, LoggedOut: If no tweet is found because of the page state, see check_page_state.
+            JavascriptException: If the extraction script fails.
+        """
+        self.locate('tweet_container')
+        mark = UI.extracted_marker if only_new else None
+        start = time.perf_counter()
+        raw_tweets = self.driver.execute_script(UI.tweets_data_script, UI.tweet_container, UI.tweet_selectors(), mark,
+                                                limit)
+        tweets_data = self.tweets_from_raw(raw_tweets, self.current_datetime())
+
+        # One round trip extracts every tweet, its time is spread evenly over them
+        elapsed = time.perf_counter() - start
+        for _ in tweets_data:
+            self.metrics.observe('tweet_extraction_seconds', elapsed / len(tweets_data), method='batch')
+        return tweets_data
+
+    def tweets_from_raw(self, raw_tweets, fetch_datetime):
+        """
+        Build the tweet rows from the plain values returned by UI.tweets_data_script.
+
+        Parameters:
+            raw_tweets (list): Values of every tweet, as returned by the script.
+            fetch_datetime (str): Fetch datetime of every row.
+
+        Returns:
+            list: A list of dictionaries with the same keys as fetch_single_tweet_details.
+        """
+        tweets_data = []
+        for raw in raw_tweets:
+            tweet_details = {'display_name': 'NA', 'username': 'NA', 'tweet_text': 'NA', 'reply': 'NA',
+                             'retweet': 'NA', 'like': 'NA', 'view': 'NA', 'media_links': 'NA',
+                             'tweet_datetime': 'NA', 'fetch_datetime': fetch_datetime, 'tweet_id': 'NA'}
+
+            for key in ('display_name', 'username', 'tweet_text', 'tweet_id'):
+                if raw[key] is not None:
+                    tweet_details[key] = raw[key]
+
+            if raw['tweet_datetime']:
+                tweet_datetime = datetime.fromisoformat(raw['tweet_datetime'])
+                tweet_details['tweet_datetime'] = tweet_datetime.strftime('%H:%M:%S %d-%m-%Y %z')
+
+            tweet_details['media_links'] = raw['media_links']
+
+            if len(raw['stats']) == 4:
+                (tweet_details['reply'], tweet_details['retweet'], tweet_details['like'],
+                    tweet_details['view']) = raw['stats']
+
+            tweets_data.append(tweet_details)
+        return tweets_data
+
+    def enable_network_capture(self, record_to=None):
+        """
+        Start capturing the API responses received by the browser, for the 'network' extraction source.
+
+        The driver must have been started with the capture_network launch option.
+
+        Parameters:
+            record_to (str): Optional. Path of a JSONL file the captured responses are appended to, for offline replay.
+
+        Returns:
+            NetworkCapture: The capture, also stored in self.network_capture.
+        """
+        self.network_capture = NetworkCapture(self.driver, record_to=record_to, failures=self.failures)
+        return self.network_capture
+
+    def poll_network(self):
+        """
+        Read the API responses captured since the last poll, see NetworkCapture.poll.
+
+        Returns:
+            list: (url, payload) tuples.
+
+        Raises:
+            BotError: If enable_network_capture was not called.
+            WebDriverException: If the performance log cannot be read.
+        """
+        if self.network_capture is None:
+            raise BotError("The 'network' source needs enable_network_capture to be called first.")
+        return self.network_capture.poll()
+
+    def fetch_tweets_from_network(self):
+        """
+        Parse the tweets of the timeline responses captured since the last call.
+
+        Stats are exact counts instead of the abbreviated ones rendered in the DOM, see network_capture.tweet_record.
+        Tweet objects that cannot be read are skipped and counted in self.failures.
+
+        Returns:
+            list: A list of dictionaries with the same keys as fetch_single_tweet_details.
+
+        Raises:
+            BotError: If enable_network_capture was not called.
+            WebDriverException: If the performance log cannot be read.
+        """
+        tweets_data = []
+        fetch_datetime = self.current_datetime()
+        for url, payload in self.poll_network():
+            tweets_data.extend(parse_tweets(payload, fetch_datetime, self.failures))
+        return tweets_data
+
+    @timed()
+    @operation('fetch_tweets')
+    def fetch_multiple_tweets_data(self, batch=True):
+        """
+        Fetch data from multiple tweets and append it to the tweets row buffer.
+
+        By default all the tweets loaded on the webpage are extracted in one round trip using the
+        fetch_tweets_data_batch method. If the extraction script fails, or batch is False, this method iterates through the
+        tweets, extracts data from each tweet using the fetch_single_tweet_details method. The extracted data
+        is appended to the tweets row buffer, which backs self.tweets_df.
+
+        Parameters:
+            batch (bool): If True, use the single round trip extraction. Default is True.
 
         Returns:
             None
 
         Raises:
-            Any exceptions that occur during the data fetching process are caught and printed.
+            SelectorTimeout: If no tweet is found.
+            RateLimited, LoggedOut: If no tweet is found because of the page state, see check_page_state.
         """
-        try:
-            tweets = self.load_tweets()
+        self.pace()
+        if batch:
+            try:
+                tweets_data = self.fetch_tweets_data_batch()
+            except BotError:
+                raise
+            except WebDriverException as e:
+                self.failures.record('fetch_tweets_batch', e)
+                print('Batch extraction failed, falling back to per element extraction.')
+            else:
+                self.store_rows('tweets', tweets_data)
+                return
+
+        tweets = self.load_tweets()
+        with self.batch_timestamp():
             for tweet in tweets:
-                tweet_details = self.fetch_single_tweet_data(tweet)
-                self.tweets_df = pd.concat((self.tweets_df, tweet_details))
-        except Exception as e:
-            print(e)
+                tweet_details = self.fetch_single_tweet_details(tweet)
+                if tweet_details is not None:
+                    self.store_rows('tweets', [tweet_details])
+
+    @staticmethod
+    def tweet_id_from_url(url):
+        """
+        Extract the tweet ID from a tweet status URL.
+
+        Parameters:
+            url (str): A URL like 'https://twitter.com/<username>/status/<tweet_id>'.
+
+        Returns:
+            str: The tweet ID, or 'NA' if the URL is not a status URL.
+        """
+        match = re.search(r'/status/(\d+)', url or '')
+        return match.group(1) if match else 'NA'
+
+    @staticmethod
+    def tweet_key(tweet_details):
+        """
+        Stable key identifying a tweet, used to drop duplicates while scrolling.
+
+        Parameters:
+            tweet_details (dict): Tweet data as returned by fetch_tweets_data_batch.
+
+        Returns:
+            The tweet ID, or a (username, tweet_datetime, tweet_text) tuple if the ID is not available.
+        """
+        if tweet_details['tweet_id'] != 'NA':
+            return tweet_details['tweet_id']
+        return tweet_details['username'], tweet_details['tweet_datetime'], tweet_details['tweet_text']
+
+    @timed()
+    @operation('harvest_timeline')
+    def harvest_timeline(self, max_tweets=None, max_seconds=None, max_idle_scrolls=3, url=None, source='dom',
+                         on_new_tweets=None):
+        """
+        Scroll the current timeline and collect every new tweet into the tweets row buffer.
+
+        Each pass extracts only the tweets rendered since the previous pass, drops the ones already seen
+        (by tweet ID, kept in the set self.seen_tweets), scrolls down by one viewport and waits for new tweets
+        using wait_for_new_content. Harvesting stops
+        when max_tweets or max_seconds is reached, or when max_idle_scrolls scrolls in a row bring no new tweets.
+        A pass without new tweets also checks the page state, so a rate limit or a logout is raised at once
+        instead of being mistaken for the end of the timeline.
+
+        Parameters:
+            max_tweets (int): Optional. Stop after this many new tweets.
+            max_seconds (float): Optional. Stop after this many seconds.
+            max_idle_scrolls (int): Number of scrolls in a row without new tweets before stopping. Default is 3.
+            url (str): Optional. Home or profile timeline URL to open before harvesting.
+            source (str): 'dom' to extract the rendered tweets, or 'network' to parse the timeline responses
+                captured since the last pass (needs enable_network_capture). Defaults to 'dom'.
+            on_new_tweets (callable): Optional. Called after every pass with the list of its new tweets.
+
+        Returns:
+            int: Number of new tweets harvested.
+
+        Raises:
+            SelectorTimeout: If no tweet is found on the timeline.
+            RateLimited, LoggedOut: If the page shows a rate limit or the session is logged out.
+        """
+        harvested = 0
+        idle_scrolls = 0
+        start = time.monotonic()
+        if url is not None:
+            self.open_website(url)
+
+        while True:
+            remaining = None if max_tweets is None else max_tweets - harvested
+            if source == 'network':
+                tweets_data = self.fetch_tweets_from_network()
+            else:
+                # Tweets beyond the limit stay untagged, so a later harvest still finds them
+                tweets_data = self.fetch_tweets_data_batch(only_new=True, limit=remaining)
+            new_tweets = {}
+            for tweet_details in tweets_data:
+                key = self.tweet_key(tweet_details)
+                if key not in self.seen_tweets and key not in new_tweets:
+                    new_tweets[key] = tweet_details
+
+            # Only the tweets kept are marked as seen, the others can be harvested later
+            keys = list(new_tweets)[:remaining]
+            self.seen_tweets.update(keys)
+            new_tweets = [new_tweets[key] for key in keys]
+            self.store_rows('tweets', new_tweets)
+            harvested += len(new_tweets)
+            if on_new_tweets is not None:
+                on_new_tweets(new_tweets)
+
+            if new_tweets:
+                idle_scrolls = 0
+            else:
+                idle_scrolls += 1
+                self.check_page_state()
+            if max_tweets is not None and harvested >= max_tweets:
+                break
+            if max_seconds is not None and time.monotonic() - start >= max_seconds:
+                break
+            if idle_scrolls >= max_idle_scrolls:
+                break
+
+            self.pace()
+            tweet_count = self.driver.execute_script(
+                'window.scrollBy(0, window.innerHeight); '
+                'return document.evaluate("count(" + arguments[0] + ")", document, null, '
+                'XPathResult.NUMBER_TYPE, null).numberValue;', UI.tweet_container)
+            self.wait_for_new_content(UI.tweet_container, tweet_count)
+        return harvested
+
+    @staticmethod
+    def search_query(query, since=None, until=None):
+        """
+        Build a search query restricted to a date range.
+
+        Parameters:
+            query (str): Search terms and operators, e.g. 'python lang:en'.
+            since (str or date): Optional. Only tweets posted on or after this day, 'YYYY-MM-DD'.
+            until (str or date): Optional. Only tweets posted before this day, 'YYYY-MM-DD'.
+
+        Returns:
+            str: The query with since: and until: operators.
+        """
+        if since is not None:
+            query = f'{query} since:{since}'
+        if until is not None:
+            query = f'{query} until:{until}'
+        return query
+
+    def scrape_search(self, query, since=None, until=None, max_tweets=None, max_seconds=None, resume=True,
+                      checkpoint_dir='checkpoints'):
+        """
+        Collect the tweets of a search, newest first, resuming an interrupted crawl of the same search.
+
+        Progress is saved to a checkpoint (see checkpoints.Checkpoint) after every pass. On resume the search
+        is opened with a max_id operator just below the oldest tweet reached, so no time is spent
+        re-scrolling through the tweets already collected. Once the search is crawled to its end,
+        later calls collect the tweets posted since, with a since_id operator at the newest tweet collected.
+
+        Parameters:
+            query (str): Search terms and operators, e.g. 'python lang:en'.
+            since (str or date): Optional. Only tweets posted on or after this day, 'YYYY-MM-DD'.
+            until (str or date): Optional. Only tweets posted before this day, 'YYYY-MM-DD'.
+            max_tweets (int): Optional. Stop after this many new tweets, the crawl can be resumed later.
+            max_seconds (float): Optional. Stop after this many seconds, the crawl can be resumed later.
+            resume (bool): If False, start the crawl again from the top. Default is True.
+            checkpoint_dir (str): Directory of the checkpoint files. Defaults to 'checkpoints'.
+
+        Returns:
+            int: Number of new tweets collected by this call.
+
+        Raises:
+            RateLimited, LoggedOut: If the page shows a rate limit or the session is logged out. The progress
+                made so far is saved.
+            SelectorTimeout: If the results do not load. The progress made so far is saved.
+        """
+        query = self.search_query(query, since, until)
+        return self.crawl(f'search:{query}', query, max_tweets, max_seconds, resume, checkpoint_dir)
+
+    def scrape_profile(self, username, since=None, until=None, include_replies=False, max_tweets=None,
+                       max_seconds=None, resume=True, checkpoint_dir='checkpoints'):
+        """
+        Collect the tweets posted by an account, newest first, resuming an interrupted crawl of the same account.
+
+        The account is crawled through a 'from:' search rather than its profile page, whose pinned tweet and
+        retweets are out of order and cannot be resumed from, see scrape_search.
+
+        Parameters:
+            username (str): The account, with or without the leading '@'.
+            since (str or date): Optional. Only tweets posted on or after this day, 'YYYY-MM-DD'.
+            until (str or date): Optional. Only tweets posted before this day, 'YYYY-MM-DD'.
+            include_replies (bool): Also collect the account's replies. Default is False.
+            max_tweets (int): Optional. Stop after this many new tweets, the crawl can be resumed later.
+            max_seconds (float): Optional. Stop after this many seconds, the crawl can be resumed later.
+            resume (bool): If False, start the crawl again from the top. Default is True.
+            checkpoint_dir (str): Directory of the checkpoint files. Defaults to 'checkpoints'.
+
+        Returns:
+            int: Number of new tweets collected by this call.
+
+        Raises:
+            RateLimited, LoggedOut: If the page shows a rate limit or the session is logged out. The progress
+                made so far is saved.
+            SelectorTimeout: If the results do not load. The progress made so far is saved.
+        """
+        query = f'from:{username.lstrip("@")}'
+        if not include_replies:
+            query = f'{query} -filter:replies'
+        query = self.search_query(query, since, until)
+        return self.crawl(f'profile:{query}', query, max_tweets, max_seconds, resume, checkpoint_dir)
+
+    @timed()
+    def crawl(self, key, query, max_tweets=None, max_seconds=None, resume=True, checkpoint_dir='checkpoints'):
+        """
+        Harvest the latest results of a search query, saving the progress to the crawl's checkpoint.
+
+        The crawl is done once harvest_timeline stops at the end of the results rather than at max_tweets or
+        max_seconds, or once the search page shows that it has no results. A done crawl is refreshed: later
+        calls collect the tweets posted since, see Checkpoint.start_refresh.
+
+        Parameters:
+            key (str): Identifies the crawl and its checkpoint.
+            query (str): Search query.
+            max_tweets (int): Optional. Stop after this many new tweets.
+            max_seconds (float): Optional. Stop after this many seconds.
+            resume (bool): If False, start the crawl again from the top. Default is True.
+            checkpoint_dir (str): Directory of the checkpoint files. Defaults to 'checkpoints'.
+
+        Returns:
+            int: Number of new tweets collected.
+
+        Raises:
+            SelectorTimeout: If no tweet loaded and the page does not show that the search has no results.
+                The checkpoint is saved, the crawl is not done.
+        """
+        checkpoint = Checkpoint.load(key, checkpoint_dir)
+        if not resume:
+            checkpoint.reset()
+        if checkpoint.done:
+            checkpoint.start_refresh()
+
+        def on_new_tweets(new_tweets):
+            if new_tweets:
+                checkpoint.update(new_tweets)
+                checkpoint.save()
+
+        url = UI.search_url.format(query=quote(checkpoint.resume_query(query)))
+        start = time.monotonic()
+        count = checkpoint.count
+        try:
+            harvested = self.harvest_timeline(max_tweets, max_seconds, url=url, on_new_tweets=on_new_tweets)
+            if ((max_tweets is None or harvested < max_tweets)
+                    and (max_seconds is None or time.monotonic() - start < max_seconds)):
+                checkpoint.finish()
+        except SelectorTimeout:
+            # No tweet rendered: the end of the results only if the page says so, not a page that failed to load
+            if not self.shows_no_results():
+                raise
+            checkpoint.finish()
+        finally:
+            checkpoint.save()
+        return checkpoint.count - count
 
     def click_on_explore(self):
         """
@@ -563,15 +1613,11 @@ class BotFunctions(UI):
             WebElement: An object representing the explore tabs section containing trending sections.
 
         Raises:
-            Any exceptions that occur during the process of clicking on explore or waiting for the explore
-            tabs to load are caught and printed.
+            SelectorTimeout: If the explore button or the explore tabs are not found.
         """
-        try:
-            self.perform(self.driver, 15, By.XPATH, UI.explore_btn, action='click')
-            explore_tabs = UI.wait_for_element_presence(self.driver, 15, By.XPATH, UI.explore_tabs)
-            return explore_tabs
-        except Exception as e:
-            print(e)
+        self.act('explore_btn', action='click')
+        explore_tabs = self.locate('explore_tabs')
+        return explore_tabs
 
     def click_on_explore_tabs(self, tab_name):
         """
@@ -588,103 +1634,234 @@ class BotFunctions(UI):
             None
 
         Raises:
-            Any exceptions that occur during the process of clicking on explore or the specified tab
-            are caught and printed.
+            SelectorTimeout: If the explore section or the specified tab is not found.
         """
-        try:
-            explore_tabs = self.click_on_explore()
-            self.perform(explore_tabs, 15, By.XPATH, UI.explore_tabs_dict[tab_name], action='click')
-        except Exception as e:
-            print(e)
+        explore_tabs = self.click_on_explore()
+        self.act(f'explore_tab_{tab_name}', action='click', context=explore_tabs)
 
-    def explore_tab_data(self, tab_name):
+    @timed()
+    @operation('explore_tab')
+    def explore_tab_data(self, tab_name, source='dom'):
         """
         Extract data from the specified explore tab and store it in the trending DataFrame.
 
         This method clicks on the explore tab specified by the tab_name parameter, iterates through
         the trending topics present in the tab, extracts relevant data for each topic, and appends
-        it to the trending DataFrame.
+        it to the tab's trending row buffer.
 
         Parameters:
             tab_name (str): The name of the explore tab to extract data from.
+            source (str): 'dom' to scroll through the rendered trends, or 'network' to parse the explore response
+                captured when the tab loads (needs enable_network_capture). Defaults to 'dom'.
 
         Returns:
             None
 
         Raises:
-            Any exceptions that occur during the data extraction process are caught and printed, along
-            with the line number where the error occurred.
+            SelectorTimeout: If the explore tab or its trends are not found.
+            RateLimited, LoggedOut: If the trends are missing because of the page state, see check_page_state.
+            BotError: If source is 'network' and enable_network_capture was not called.
         """
-        last_trend_location = None
-        last_scroll_position = None
-        try:
+        if source == 'network':
+            # Drop the responses of previously opened pages
+            self.poll_network()
             self.click_on_explore_tabs(tab_name)
-            while True:
-                trend_window = UI.wait_for_element_presence(self.driver, 15, By.XPATH, UI.trend_window)
-                trends = UI.wait_for_element_presence(trend_window, 15, By.XPATH, UI.trends, find_all=True)
-                trends = self.filter_out_duplicates(trends, last_trend_location)
+            self.locate('trends')
+            fetch_datetime = self.current_datetime()
+            for url, payload in self.poll_network():
+                self.store_rows(tab_name, parse_trends(payload, tab_name, fetch_datetime))
+            return
+
+        self.click_on_explore_tabs(tab_name)
+        state = self.new_explore_state()
+        while self.explore_tab_step(tab_name, state):
+            self.wait_for_new_content(UI.new_trends, 0)
+
+    @staticmethod
+    def new_explore_state(max_idle_passes=3):
+        """
+        Create the scrolling state of an explore tab, used by explore_tab_step.
+
+        Parameters:
+            max_idle_passes (int): Number of passes in a row without new trends before the tab is done. Default is 3.
+
+        Returns:
+            dict: Number of passes, of passes in a row without new trends, and max_idle_passes.
+        """
+        return {'passes': 0, 'idle_passes': 0, 'max_idle_passes': max_idle_passes}
+
+    @timed()
+    def explore_tab_step(self, tab_name, state):
+        """
+        Extract the new trends of the explore tab open in the current window, then scroll down one viewport.
 
-                if not trends:
-                    break
+        Extraction, tagging of the extracted trends and scrolling run in one round trip of UI.explore_step_script,
+        so a pass only costs in proportion to the trends it has not seen yet. The caller waits for new
+        content between steps, e.g. for UI.new_trends to match, which lets several tabs be stepped in turn.
+        The extracted trends are stored by store_explore_step.
 
-                for trend in trends:
+        Parameters:
+            tab_name (str): The name of the explore tab open in the current window.
+            state (dict): Scrolling state of the tab, created by new_explore_state and updated in place.
+
+        Returns:
+            bool: True if the tab may have more trends, False if the page cannot scroll further and the pass brought
+                no new trend, or after max_idle_passes passes in a row without new trends.
+
+        Raises:
+            SelectorTimeout: If no trend is found on the first pass.
+            RateLimited, LoggedOut: If the trends are missing because of the page state, see check_page_state.
+        """
+        self.pace()
+        if state['passes'] == 0:
+            self.locate('trends')
+        start = time.perf_counter()
+        result = self.driver.execute_script(UI.explore_step_script, UI.trends, UI.single_trend_data,
+                                            UI.extracted_marker)
+        return self.store_explore_step(tab_name, state, result, time.perf_counter() - start)
+
+    def store_explore_step(self, tab_name, state, result, elapsed):
+        """
+        Store the trends extracted by a pass of UI.explore_step_script and update the scrolling state of the tab.
+
+        A trend that cannot be read is skipped and counted under the 'trend' operation, see failure_counts.
+
+        Parameters:
+            tab_name (str): The name of the explore tab.
+            state (dict): Scrolling state of the tab, created by new_explore_state and updated in place.
+            result (dict): Return value of the script, the texts of the new 'trends' and 'at_end'.
+            elapsed (float): Duration of the round trip, in seconds, spread over the extracted trends.
+
+        Returns:
+            bool: True if the tab may have more trends, see explore_tab_step.
+        """
+        state['passes'] += 1
+        fetch_datetime = self.current_datetime()
+        rows = []
+        for texts in result['trends']:
+            try:
+                trending_data = self.trending_dict[tab_name].copy()
+                if tab_name == 'trending':
+                    rank_and_trending = [i.strip() for i in texts[0].split('\u00B7')]
+                    trending_data['rank'] = rank_and_trending[0]
+                    trending_data['trending_in'] = ' '.join(rank_and_trending[1:])
+                else:
+                    trending_data['trending_in'] = texts[0]
+                trending_data['tag_or_text'] = texts[1]
+                trending_data['posts'] = texts[2].split()[0]
+                trending_data['fetch_datetime'] = fetch_datetime
+                rows.append(trending_data)
+            except IndexError as e:
+                self.failures.record('trend', e)
+        self.store_rows(tab_name, rows)
+        # One round trip extracts every new trend, its time is spread evenly over them
+        for _ in result['trends']:
+            self.metrics.observe('trend_extraction_seconds', elapsed / len(result['trends']), tab=tab_name)
+
+        if result['trends']:
+            state['idle_passes'] = 0
+            return True
+        state['idle_passes'] += 1
+        return not result['at_end'] and state['idle_passes'] < state['max_idle_passes']
+
+    def open_explore_windows(self, tab_names):
+        """
+        Open every explore tab in its own browser window.
+
+        Navigation is started by a script, so the windows load in parallel instead of one after another.
+
+        Parameters:
+            tab_names (list): Names of the explore tabs, keys of UI.explore_tab_urls.
+
+        Returns:
+            dict: Tab name mapped to the window handle it was opened in.
+        """
+        handles = {}
+        for tab_name in tab_names:
+            self.driver.switch_to.new_window('window')
+            self.driver.execute_script('window.location.href = arguments[0];', UI.explore_tab_urls[tab_name])
+            handles[tab_name] = self.driver.current_window_handle
+        return handles
+
+    def explore_tabs_concurrently(self, tab_names):
+        """
+        Extract data from several explore tabs, each open in its own window, scrolling them in turn.
+
+        While one tab is being extracted the others keep loading the trends requested by their last scroll,
+        so the sweep takes about as long as the slowest tab instead of the sum of all of them. A tab is only
+        waited on for what is left of its 'scroll' timeout since it was scrolled.
+
+        Parameters:
+            tab_names (list): Names of the explore tabs, keys of UI.explore_tab_urls.
+
+        Returns:
+            None
+
+        Raises:
+            RateLimited, LoggedOut: If a tab shows a rate limit or the session is logged out. Any other error
+                of a tab is counted under the 'explore_tab' operation and that tab is dropped.
+        """
+        main_window = self.driver.current_window_handle
+        handles = self.open_explore_windows(tab_names)
+        states = {tab_name: self.new_explore_state() for tab_name in tab_names}
+        scrolled_at = {}
+        try:
+            while states:
+                for tab_name in list(states):
                     try:
-                        trending_data = self.trending_dict[tab_name].copy()
-                        single_trend_data = UI.wait_for_element_presence(trend, 15, By.XPATH, UI.single_trend_data, find_all=True)
-                        if tab_name == 'trending':
-                            rank_and_trending = [i.strip() for i in single_trend_data[0].text.split('\u00B7')]
-                            trending_data['rank'] = rank_and_trending[0]
-                            trending_data['trending_in'] = ' '.join(rank_and_trending[1:])
+                        self.driver.switch_to.window(handles[tab_name])
+                        if tab_name in scrolled_at:
+                            remaining = self.wait_timeouts['scroll'] - (time.monotonic() - scrolled_at[tab_name])
+                            if remaining > 0:
+                                self.wait_for_new_content(UI.new_trends, 0, wait_time=remaining)
+                        if self.explore_tab_step(tab_name, states[tab_name]):
+                            scrolled_at[tab_name] = time.monotonic()
                         else:
-                            trending_data['trending_in'] = single_trend_data[0].text
-                        trending_data['tag_or_text'] = single_trend_data[1].text
-                        trending_data['posts'] = single_trend_data[2].text.split()[0]
-                        trending_data['fetch_datetime'] = self.current_datetime()
-
-                        self.trending_df[tab_name] = pd.concat((self.trending_df[tab_name], pd.DataFrame([trending_data])))
-                    except Exception as e:
-                        # Use traceback to get the line number
-                        traceback_details = traceback.extract_tb(sys.exc_info()[2])
-                        line_number = traceback_details[len(traceback_details) - 1][1]
-                        print(f"Error occurred on line {line_number}: {e}")
-
-                # checking end
-                if self.check_page_end(last_scroll_position) or last_trend_location == trends[-1].location['y']:
-                    break
-
-                last_trend_location = trends[-1].location['y']
-                last_scroll_position = self.current_scroll_position()
-                self.scroll_down(last_trend_location)
-                time.sleep(5)
-
-        except Exception as e:
-            print(e)
-            # Use traceback to get the line number
-            traceback_details = traceback.extract_tb(sys.exc_info()[2])
-            line_number = traceback_details[len(traceback_details) - 1][1]
-            print(f"Error occurred on line {line_number}: {e}")
-
-    def data_from_explore_tabs(self):
-        """
-        Extract data from multiple explore tabs and store it in the trending DataFrame.
+                            states.pop(tab_name)
+                    except (RateLimited, LoggedOut):
+                        raise
+                    except (BotError, WebDriverException) as e:
+                        self.failures.record('explore_tab', classify(e))
+                        print(f"Error occurred on tab {tab_name}: {e}")
+                        states.pop(tab_name)
+        finally:
+            for handle in handles.values():
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            self.driver.switch_to.window(main_window)
+
+    @timed()
+    def data_from_explore_tabs(self, concurrent=False):
+        """
+        Extract data from multiple explore tabs and store it in the trending row buffers.
 
         This method extracts data from the 'Trending', 'News', 'Sports', and 'Entertainment' explore tabs
-        using the explore_tab_data method and stores it in the trending DataFrame.
+        using the explore_tab_data method and stores it in the trending row buffers. With concurrent set,
+        the tabs are opened in separate windows and scrolled in turn by explore_tabs_concurrently.
+
+        Parameters:
+            concurrent (bool): If True, scrape all the tabs at once in separate windows. Default is False.
 
         Returns:
             None
 
         Raises:
-            Any exceptions that occur during the data extraction process are caught and printed.
+            RateLimited, LoggedOut: If a tab shows a rate limit or the session is logged out. Any other error
+                of a tab is counted by explore_tab_data's retry policy and that tab is skipped.
         """
-        try:
-            self.explore_tab_data('trending')
-            self.explore_tab_data('news')
-            self.explore_tab_data('sports')
-            self.explore_tab_data('entertainment')
-        except Exception as e:
-            print(e)
-
+        tab_names = ['trending', 'news', 'sports', 'entertainment']
+        if concurrent:
+            self.explore_tabs_concurrently(tab_names)
+            return
+        for tab_name in tab_names:
+            try:
+                self.explore_tab_data(tab_name)
+            except (RateLimited, LoggedOut):
+                raise
+            except (BotError, WebDriverException) as e:
+                print(f"Error occurred on tab {tab_name}: {e}")
+
+    @timed()
     def generate_csv(self, csv_of, file_name='tweets'):
         """
         Generate CSV file(s) based on the provided data type.
@@ -712,22 +1889,86 @@ class TwitterBot(BotFunctions):
     """
     Initializes a TwitterBot instance.
 
-    This constructor sets up the TwitterBot instance by initializing the WebDriver for
-    Microsoft Edge browser, maximizing the window, and navigating to the Twitter homepage.
+    This constructor sets up the TwitterBot instance by initializing the WebDriver for the browser of
+    the chosen launch profile (see LAUNCH_PROFILES), and maximizing the window when it has no fixed size.
 
-    Parameters: None
+    Parameters:
+        username (str): Account used by the bot.
+        profile (str): Name of the launch profile in LAUNCH_PROFILES. Defaults to 'default'.
+        wait_timeouts (dict): Optional. Overrides for DEFAULT_WAIT_TIMEOUTS, in seconds.
+        **launch_options: Overrides for the launch profile, see create_driver.
 
     Returns:
         None
     """
-    def __init__(self, username):
+    def __init__(self, username, profile='default', wait_timeouts=None, **launch_options):
         self.driver = None
-        self.options = Options()
-        self.driver_loc = 'D:/Software/edgeDriver/msedgedriver.exe'
-        self.edge_service = webdriver.EdgeService(executable_path=self.driver_loc)
-        self.driver = webdriver.Edge(service=self.edge_service, options=self.options)
-        self.driver.maximize_window()
-        super().__init__(self.driver, username)
+        self.launch_options = {**LAUNCH_PROFILES[profile], **launch_options}
+        start = time.perf_counter()
+        self.driver = self.create_driver(**self.launch_options)
+        if self.launch_options['window_size'] is None and not self.launch_options['headless']:
+            self.driver.maximize_window()
+        startup = time.perf_counter() - start
+        super().__init__(self.driver, username, wait_timeouts)
+        self.metrics.observe('span_seconds', startup, span='driver_startup')
+
+    @staticmethod
+    def build_options(browser='edge', headless=False, window_size=None, block_resources=False,
+                      page_load_strategy='normal', capture_network=False, binary_location=None):
+        """
+        Build the browser options of a launch profile.
+
+        Parameters:
+            browser (str): 'edge', 'chrome' or 'chromium'. Defaults to 'edge'.
+            headless (bool): Run the browser without a window. Default is False.
+            window_size (tuple): Optional. Fixed (width, height) viewport.
+            block_resources (bool): Disable image loading through the browser prefs. Default is False.
+            page_load_strategy (str): 'normal', 'eager' or 'none'. Defaults to 'normal'.
+            capture_network (bool): Enable the performance log read by BotFunctions.enable_network_capture. Default is False.
+            binary_location (str): Optional. Path of the browser executable, e.g. a Chromium build.
+
+        Returns:
+            Options: Edge or Chrome options.
+        """
+        options = Options() if browser == 'edge' else ChromeOptions()
+        if headless:
+            options.add_argument('--headless=new')
+        if window_size is not None:
+            options.add_argument(f'--window-size={window_size[0]},{window_size[1]}')
+        if block_resources:
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        if capture_network:
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        if binary_location is not None:
+            options.binary_location = binary_location
+        options.page_load_strategy = page_load_strategy
+        return options
+
+    @staticmethod
+    def create_driver(browser='edge', headless=False, window_size=None, block_resources=False,
+                      page_load_strategy='normal', capture_network=False, binary_location=None, driver_loc=None):
+        """
+        Start a WebDriver with the given launch options.
 
+        Can be used as the driver_factory of a BotPool, e.g. functools.partial(TwitterBot.create_driver, **LAUNCH_PROFILES['fast']).
+
+        Parameters:
+            browser, headless, window_size, block_resources, page_load_strategy, capture_network, binary_location:
+                See build_options.
+                With block_resources, media, font and image requests are also blocked through CDP.
+            driver_loc (str): Optional. Path of the driver executable. Selenium Manager locates it when not given.
 
+        Returns:
+            WebDriver: Edge or Chrome driver.
+        """
+        options = TwitterBot.build_options(browser, headless, window_size, block_resources, page_load_strategy,
+                                           capture_network, binary_location)
+        if browser == 'edge':
+            driver = webdriver.Edge(service=webdriver.EdgeService(executable_path=driver_loc), options=options)
+        else:
+            driver = webdriver.Chrome(service=webdriver.ChromeService(executable_path=driver_loc), options=options)
 
+        if block_resources:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        return driver